@@ -1,80 +1,124 @@
+import time
+
+# 新增：记录模块开始导入的时间，用于启动耗时报告
+IMPORT_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import messagebox, simpledialog, filedialog
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageTk
 import os
 import sys
+import json
+import argparse
+import base64
+import hashlib
+import urllib.parse
+import io
+import mmap
+import struct
+import tempfile
+import importlib
+import importlib.util
 import platform
-import ctypes  # 用于设置Windows任务栏图标
-
-# 动态导入win32gui和win32con，解决打包后导入失败问题
-try:
-    import win32gui
-    import win32con
-
-    WIN32GUI_AVAILABLE = True
-except ImportError:
-    WIN32GUI_AVAILABLE = False
-
+import math
+import threading
+import weakref
+from collections import OrderedDict, deque
 
-    # 创建模拟类，实现必要的方法签名以避免代码错误
-    class MockWin32:
-        def FindWindow(self, *args, **kwargs):
-            print("警告: win32gui.FindWindow不可用")
-            return 0
 
-        def GetForegroundWindow(self, *args, **kwargs):
-            print("警告: win32gui.GetForegroundWindow不可用")
-            return 0
+class LazyModule:
+    """延迟导入的模块代理：首次访问属性时才导入，导入失败时使用fallback创建的替代对象"""
 
-        def GetTopWindow(self, *args, **kwargs):
-            print("警告: win32gui.GetTopWindow不可用")
-            return 0
-
-        def GetWindowLong(self, *args, **kwargs):
-            print("警告: win32gui.GetWindowLong不可用")
-            return 0
+    def __init__(self, name, fallback=None):
+        self._lazy_name = name
+        self._lazy_fallback = fallback
 
-        def SetWindowLong(self, *args, **kwargs):
-            print("警告: win32gui.SetWindowLong不可用")
-            return 0
-
-        def LoadImage(self, *args, **kwargs):
-            print("警告: win32gui.LoadImage不可用")
-            return 0
-
-        def SendMessage(self, *args, **kwargs):
-            print("警告: win32gui.SendMessage不可用")
-            return 0
-
-        def ShowWindow(self, *args, **kwargs):
-            print("警告: win32gui.ShowWindow不可用")
+    def __getattr__(self, attr):
+        # 模块导入后其属性复制到实例字典中，之后的访问不再经过这里
+        module = self.__dict__.get("_lazy_module")
+        if module is None:
+            try:
+                module = importlib.import_module(self._lazy_name)
+            except ImportError:
+                if self._lazy_fallback is None:
+                    raise
+                module = self._lazy_fallback()
+            self._lazy_module = module
+            self.__dict__.update(vars(module))
+        return getattr(module, attr)
+
+
+# 只有开启控制接口时才需要的模块在第一次使用时才导入（PIL的绘图、字体和Tk模块首帧就要用，直接导入）
+asyncio = LazyModule("asyncio")
+futures = LazyModule("concurrent.futures")
+
+
+# 创建模拟类，实现必要的方法签名以避免代码错误
+class MockWin32:
+    def FindWindow(self, *args, **kwargs):
+        print("警告: win32gui.FindWindow不可用")
+        return 0
+
+    def GetForegroundWindow(self, *args, **kwargs):
+        print("警告: win32gui.GetForegroundWindow不可用")
+        return 0
+
+    def GetTopWindow(self, *args, **kwargs):
+        print("警告: win32gui.GetTopWindow不可用")
+        return 0
+
+    def GetWindowLong(self, *args, **kwargs):
+        print("警告: win32gui.GetWindowLong不可用")
+        return 0
+
+    def SetWindowLong(self, *args, **kwargs):
+        print("警告: win32gui.SetWindowLong不可用")
+        return 0
+
+    def LoadImage(self, *args, **kwargs):
+        print("警告: win32gui.LoadImage不可用")
+        return 0
+
+    def SendMessage(self, *args, **kwargs):
+        print("警告: win32gui.SendMessage不可用")
+        return 0
+
+    def ShowWindow(self, *args, **kwargs):
+        print("警告: win32gui.ShowWindow不可用")
+        return 0
+
+    def __getattr__(self, name):
+        def mock_func(*args, **kwargs):
+            print(f"警告: 未实现的win32函数{name}被调用")
             return 0
 
-        def __getattr__(self, name):
-            def mock_func(*args, **kwargs):
-                print(f"警告: 未实现的win32函数{name}被调用")
-                return 0
+        return mock_func
 
-            return mock_func
 
-
-    # 实例化模拟对象
-    win32gui = MockWin32()
-    win32con = MockWin32()
+def create_mock_win32con():
+    """创建带有必要win32常量的模拟对象"""
+    mock = MockWin32()
 
     # 手动定义必要的win32常量
-    win32con.GWL_EXSTYLE = -20
-    win32con.WS_EX_APPWINDOW = 0x00040000
-    win32con.WS_EX_TOOLWINDOW = 0x00000080
-    win32con.IMAGE_ICON = 1
-    win32con.LR_LOADFROMFILE = 0x00000010
-    win32con.LR_DEFAULTSIZE = 0x00000040
-    win32con.WM_SETICON = 0x0080
-    win32con.ICON_BIG = 1
-    win32con.ICON_SMALL = 0
-    win32con.SW_HIDE = 0
-    win32con.SW_SHOW = 5
-    win32con.SW_SHOWNA = 8  # 新增常量
+    mock.GWL_EXSTYLE = -20
+    mock.WS_EX_APPWINDOW = 0x00040000
+    mock.WS_EX_TOOLWINDOW = 0x00000080
+    mock.IMAGE_ICON = 1
+    mock.LR_LOADFROMFILE = 0x00000010
+    mock.LR_DEFAULTSIZE = 0x00000040
+    mock.WM_SETICON = 0x0080
+    mock.ICON_BIG = 1
+    mock.ICON_SMALL = 0
+    mock.SW_HIDE = 0
+    mock.SW_SHOW = 5
+    mock.SW_SHOWNA = 8  # 新增常量
+    return mock
+
+
+# 延迟导入win32gui和win32con（首次调用时导入），导入失败时使用模拟对象，解决打包后导入失败问题
+WIN32GUI_AVAILABLE = sys.platform == "win32" and importlib.util.find_spec("win32gui") is not None
+win32gui = LazyModule("win32gui", MockWin32)
+win32con = LazyModule("win32con", create_mock_win32con)
 
 # -------------------------- 配置区域 --------------------------
 # 平行四边形区域（文字）
@@ -105,8 +149,25 @@ LEFT_BUTTON_Y = 110  # 左侧按钮Y坐标
 RIGHT_BUTTON_X = 1025  # 右侧按钮X坐标
 RIGHT_BUTTON_Y = 110  # 右侧按钮Y坐标
 
+def env_positive_int(name, default):
+    """读取环境变量中的正整数，未设置时返回default，不合法时给出警告并使用default"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        print(f"警告: 环境变量{name}必须为正整数（当前为{value}），使用{default}")
+        return default
+    return number
+
+
 # 抗锯齿参数
-SMOOTH_FACTOR = 2  # 用于文字渲染的缩放因子
+# 用于文字渲染的缩放因子：文字和描边按该倍数放大绘制后缩小，1表示不超采样，可通过环境变量SCOREBOARD_SMOOTH_FACTOR修改
+SMOOTH_FACTOR = env_positive_int("SCOREBOARD_SMOOTH_FACTOR", 2)
+SMOOTH_RESAMPLE = Image.LANCZOS  # 超采样文字缩小时使用的滤波器
 
 # 版权信息
 COPYRIGHT_TEXT = "By bilibili 纳瑞亚之星"
@@ -130,6 +191,125 @@ USE_WIN32GUI = WIN32GUI_AVAILABLE and CURRENT_OS == "Windows"
 # 新增：自定义图片路径变量
 custom_image_path = None
 
+# 新增：预设文件（保存上次使用的配置和命名预设）
+CONFIG_FILE = "scoreboard_config.json"
+
+# 新增：解码后背景图片的缓存目录和容量上限（MB），缓存文件为可直接内存映射的RGBA原始像素
+BACKGROUND_CACHE_DIR = os.path.join(".scoreboard_cache", "backgrounds")
+BACKGROUND_CACHE_SIZE_MB = 512
+
+# 新增：UI模板索引的缓存目录（模板尺寸、修改时间和缩略图）、缩略图最大尺寸和后台预取的背景数量
+TEMPLATE_CACHE_DIR = os.path.join(".scoreboard_cache", "templates")
+TEMPLATE_THUMBNAIL_SIZE = (320, 80)
+TEMPLATE_PREFETCH_SIZE = 2
+
+# 新增：支持的背景图片扩展名
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+# 新增：系统字体索引文件（记录字体家族、样式、TTC索引和字形覆盖情况）
+FONT_INDEX_FILE = os.path.join(".scoreboard_cache", "font_index.json")
+
+# 新增：各系统的字体目录
+FONT_DIRS = {
+    "Windows": [os.path.join(os.environ.get("WINDIR", "C:/Windows"), "Fonts"),
+                os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts")],
+    "Linux": ["/usr/share/fonts", "/usr/local/share/fonts",
+              os.path.expanduser("~/.fonts"), os.path.expanduser("~/.local/share/fonts")],
+    "Darwin": ["/System/Library/Fonts", "/Library/Fonts", os.path.expanduser("~/Library/Fonts")],
+}
+FONT_EXTENSIONS = (".ttf", ".ttc", ".otf", ".otc")
+
+# 新增：硬编码字体都不可用或不支持队伍名称时，按顺序优先选择的字体家族
+PREFERRED_FONT_FAMILIES = (
+    "SimHei", "Microsoft YaHei", "PingFang SC", "Heiti SC", "STHeiti", "WenQuanYi Micro Hei",
+    "Noto Sans CJK SC", "Source Han Sans SC", "Noto Sans CJK JP", "SimSun", "DejaVu Sans",
+)
+
+# 新增：文字描边宽度（像素）
+OUTLINE_WIDTH = 2
+
+# 新增：文字描边绘制方式，可通过环境变量SCOREBOARD_OUTLINE_MODE选择
+# classic: 8次偏移绘制描边（原始方式）；stroke: Pillow原生描边；dilate: 文字遮罩膨胀生成描边
+OUTLINE_MODES = ("classic", "stroke", "dilate")
+OUTLINE_MODE = os.environ.get("SCOREBOARD_OUTLINE_MODE", "dilate")
+if OUTLINE_MODE not in OUTLINE_MODES:
+    print(f"警告: 未知的描边方式 {OUTLINE_MODE}，使用dilate")
+    OUTLINE_MODE = "dilate"
+
+# 新增：可独立重绘的元素（按绘制顺序排列）
+RENDER_ELEMENTS = ("left_name", "right_name", "left_score", "right_score", "bout")
+
+# 新增：渲染帧率上限（连续操作在一个帧间隔内只渲染一次，0表示在Tk空闲时立即渲染）
+RENDER_FPS_CAP = 60
+
+# 新增：是否在后台线程中渲染（Tk线程只负责替换PhotoImage）
+RENDER_IN_THREAD = True
+
+# 新增：Tk线程检查后台渲染结果的间隔（毫秒）
+RENDER_POLL_INTERVAL = 5
+
+# 新增：窗口拖动时每个显示刷新间隔内最多移动一次窗口，无法获取显示器刷新率时使用该值（Hz）
+DISPLAY_REFRESH_RATE = 60
+
+# 新增：拖动窗口时靠近屏幕边缘或水平居中位置多少像素以内自动吸附（0为不吸附，命令行--snap开启）
+DRAG_SNAP_DISTANCE = 20
+
+# 新增：撤销/重做事件日志容量（按字段修改计数，满时丢弃最旧的操作）及快捷键
+EVENT_LOG_CAPACITY = 4096
+# 开启大写锁定时按键为大写字母，因此大小写都绑定；是否为Ctrl+Shift+Z（重做全部）按事件的Shift位区分
+UNDO_KEYS = ("<Control-z>", "<Control-Z>")
+REDO_KEYS = ("<Control-y>", "<Control-Y>")
+SHIFT_MASK = 0x1
+
+# 新增：导出的会话文件格式版本
+SESSION_FORMAT_VERSION = 1
+
+# 新增：本地控制接口（HTTP/WebSocket）只监听本机地址，--control开启时的默认端口
+CONTROL_HOST = "127.0.0.1"
+CONTROL_PORT = 8765
+CONTROL_POLL_INTERVAL = 10  # Tk线程处理控制指令的间隔（毫秒）
+CONTROL_MAX_BODY = 64 * 1024  # 请求体和WebSocket消息的最大字节数
+CONTROL_MAX_BUFFER = 1024 * 1024  # 订阅者未发送数据超过该字节数时断开
+
+# 新增：PNG帧输出的压缩级别（0-9，越低编码越快、文件越大）
+FRAME_PNG_COMPRESS_LEVEL = 1
+
+# 新增：共享内存帧缓冲区的文件头：魔数、版本、宽、高、每行字节数、帧序号（写入中为奇数），共32字节
+FRAME_BUFFER_MAGIC = b"SCBF"
+FRAME_BUFFER_VERSION = 1
+FRAME_BUFFER_HEADER = struct.Struct("<4sIIIIQ4x")
+
+# 新增：渲染性能分析（环境变量SCOREBOARD_PROFILE=1或命令行--profile开启）
+PROFILE_ENABLED = os.environ.get("SCOREBOARD_PROFILE", "") not in ("", "0")
+PROFILE_OVERLAY = os.environ.get("SCOREBOARD_PROFILE_OVERLAY", "") not in ("", "0")  # 屏幕上显示最近一帧耗时
+PROFILE_HISTORY = 1000  # 每个阶段保留的最近样本数
+PROFILE_TRACE_EVENTS = 100000  # 内存中保留的Chrome trace事件数
+
+# 新增：冷启动各阶段耗时预算（毫秒），total为从开始导入到首帧显示
+STARTUP_BUDGET_MS = {
+    "import": 500,
+    "font_discovery": 50,
+    "image_decode": 300,
+    "first_frame": 1000,
+    "total": 2000,
+}
+
+# 新增：字体缓存容量（按字体路径、字号、索引计数）
+FONT_CACHE_SIZE = 256
+
+# 新增：文字测量结果缓存容量（按文字、字体路径、字号、索引计数）
+TEXT_METRICS_CACHE_SIZE = 4096
+
+# 新增：字号适配结果缓存容量（按文字、区域宽度、最大字号、字体路径计数）
+FIT_CACHE_SIZE = 1024
+
+# 新增：分数精灵图集数量上限（按字体和字号组合计数）及新图集预渲染的分数
+SCORE_ATLAS_SIZE = 32
+SCORE_ATLAS_PREBUILT = tuple(str(score) for score in range(10))
+
+# 新增：超采样文字图层缓存容量（按文字、字体、字号、亚像素位置、描边方式、缩放因子计数）
+TEXT_LAYER_CACHE_SIZE = 256
+
 # 新增：配置区域范围变量
 left_parallelogram = LEFT_PARALLELOGRAM
 right_parallelogram = RIGHT_PARALLELOGRAM
@@ -141,13 +321,2661 @@ bout_region_offset_y = BOUT_REGION_OFFSET_Y
 
 # -------------------------------------------------------------
 
+
+class _ProfileStage:
+    """单个阶段的计时上下文"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class _NullStage:
+    """分析关闭时使用的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class RenderProfiler:
+    """渲染阶段计时：保留滚动直方图和最近一次耗时，可导出Chrome trace事件文件"""
+
+    # 直方图分桶上限（毫秒）
+    BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, float("inf"))
+
+    def __init__(self, enabled=PROFILE_ENABLED, history=PROFILE_HISTORY, trace_events=PROFILE_TRACE_EVENTS):
+        self.enabled = enabled
+        self.history = history
+        self.trace_path = None  # 退出时导出trace的路径
+        self.samples = {}  # 阶段名 -> 最近的耗时样本（毫秒）
+        self.last = {}  # 阶段名 -> 最近一次耗时（毫秒）
+        self.events = deque(maxlen=trace_events)
+        self.origin = time.perf_counter()
+        self._null_stage = _NullStage()
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """返回计时上下文：with PROFILER.stage("阶段名"): ..."""
+        if not self.enabled:
+            return self._null_stage
+        return _ProfileStage(self, name)
+
+    def record(self, name, start, end):
+        """记录一个阶段的起止时间（time.perf_counter()）"""
+        duration_ms = (end - start) * 1000
+        with self._lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.history)
+            samples.append(duration_ms)
+            self.last[name] = duration_ms
+            self.events.append({
+                "name": name, "cat": "render", "ph": "X",
+                "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident(),
+            })
+
+    def histogram(self, name):
+        """返回阶段耗时的滚动直方图：[(分桶上限毫秒, 样本数), ...]"""
+        with self._lock:
+            samples = list(self.samples.get(name, ()))
+        counts = [0] * len(self.BUCKETS_MS)
+        for value in samples:
+            for i, limit in enumerate(self.BUCKETS_MS):
+                if value <= limit:
+                    counts[i] += 1
+                    break
+        return list(zip(self.BUCKETS_MS, counts))
+
+    def summary(self):
+        """返回各阶段的样本数、平均值、p50、p95和最大值（毫秒）"""
+        with self._lock:
+            stages = {name: sorted(samples) for name, samples in self.samples.items()}
+        result = {}
+        for name, values in stages.items():
+            if not values:
+                continue
+            result[name] = {
+                "count": len(values),
+                "mean_ms": sum(values) / len(values),
+                "p50_ms": values[len(values) // 2],
+                "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max_ms": values[-1],
+            }
+        return result
+
+    def dump_chrome_trace(self, path):
+        """导出Chrome trace事件JSON（可在chrome://tracing或Perfetto中打开）"""
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"渲染trace已导出到 {path}")
+
+    def reset(self):
+        """清空所有样本和事件"""
+        with self._lock:
+            self.samples.clear()
+            self.last.clear()
+            self.events.clear()
+
+
+# 全局渲染分析器
+PROFILER = RenderProfiler()
+
+# 启动耗时分析器（始终开启，每个阶段只保留最近一次）
+STARTUP_PROFILER = RenderProfiler(enabled=True, history=1)
+
+
+def startup_report(stages=None, budget=None):
+    """返回启动耗时报告的文本行和超出预算的阶段列表，stages默认为本进程记录的启动耗时"""
+    stages = STARTUP_PROFILER.last if stages is None else stages
+    budget = STARTUP_BUDGET_MS if budget is None else budget
+    lines = []
+    over_budget = []
+    for stage, duration_ms in stages.items():
+        limit = budget.get(stage)
+        marker = ""
+        if limit is not None and duration_ms > limit:
+            marker = f"  <-- 超出预算 {limit} ms"
+            over_budget.append(stage)
+        lines.append(f"{stage:<16} {duration_ms:9.1f} ms{marker}")
+    return lines, over_budget
+
+
+class FontCache:
+    """进程级字体缓存，按(路径, 字号, 索引)缓存字体对象，超出容量时按LRU淘汰"""
+
+    def __init__(self, max_size=FONT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._fonts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, size, index=0):
+        """获取字体对象，path为None或加载失败时返回默认字体"""
+        key = (path, size, index)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self.hits += 1
+                return font
+            self.misses += 1
+
+        # 在锁外解析字体文件，避免大体积TTC阻塞其他线程
+        if path:
+            try:
+                with PROFILER.stage("font_load"):
+                    font = ImageFont.truetype(path, size, index=index)
+            except Exception:
+                print(f"警告: 无法加载字体 {path}，使用默认字体")
+                font = self.get_default()
+        else:
+            font = self.get_default()
+        return self._store(key, font)
+
+    def get_default(self):
+        """获取Pillow内置默认字体（同样经过缓存）"""
+        key = (None, None, 0)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self.hits += 1
+                return font
+            self.misses += 1
+        return self._store(key, ImageFont.load_default())
+
+    def _store(self, key, font):
+        """加入缓存并按LRU淘汰超出容量的字体，返回font"""
+        with self._lock:
+            self._fonts[key] = font
+            self._fonts.move_to_end(key)
+            while len(self._fonts) > self.max_size:
+                self._fonts.popitem(last=False)
+        return font
+
+    def stats(self):
+        """返回命中/未命中计数和当前缓存数量"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._fonts)}
+
+    def clear(self):
+        """清空缓存并重置计数"""
+        with self._lock:
+            self._fonts.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 全局字体缓存实例（所有渲染路径共用）
+FONT_CACHE = FontCache()
+
+
+class FontIndex:
+    """系统字体索引：只扫描一次字体目录，记录每个字体的家族、样式和TTC索引，并缓存各字体对字符的覆盖情况
+
+    索引和覆盖情况保存到磁盘，字体目录的修改时间不变时直接读取，查找均为字典查询
+    """
+
+    # 检查字形覆盖时使用的字号
+    COVERAGE_SIZE = 16
+
+    def __init__(self, path=FONT_INDEX_FILE, font_dirs=None):
+        self.path = path
+        self.font_dirs = font_dirs if font_dirs is not None else FONT_DIRS.get(CURRENT_OS, [])
+        self.faces = []  # [{"path", "index", "family", "style"}, ...]
+        self.by_family = {}  # 小写家族名 -> [face, ...]
+        self.coverage = {}  # "路径|索引" -> {字符: 是否覆盖}
+        self.dir_mtimes = {}
+        self.loaded = False
+        self.dirty = False  # 有尚未保存的字形覆盖结果
+        self._exists = {}
+        self._lock = threading.RLock()
+
+    def ensure_loaded(self):
+        """首次查找时读取磁盘上的索引，字体目录有变化或索引不存在时重新扫描"""
+        with self._lock:
+            if self.loaded:
+                return
+            if not self.load():
+                self.scan()
+                self.save()
+            self.loaded = True
+
+    def current_dir_mtimes(self):
+        """返回字体目录（含子目录）及其修改时间，用于判断索引是否过期"""
+        mtimes = {}
+        for font_dir in self.font_dirs:
+            for dir_path, _, _ in os.walk(font_dir):
+                try:
+                    mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+                except OSError:
+                    continue
+        return mtimes
+
+    def load(self):
+        """读取磁盘上的索引，索引过期或无法读取时返回False"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if stored.get("dir_mtimes") != self.current_dir_mtimes():
+            return False
+        self.set_faces(stored.get("faces", []))
+        self.coverage = {}
+        for key, value in stored.get("coverage", {}).items():
+            chars = dict.fromkeys(value.get("covered", ""), True)
+            chars.update(dict.fromkeys(value.get("missing", ""), False))
+            self.coverage[key] = chars
+        self.dir_mtimes = stored["dir_mtimes"]
+        return True
+
+    def scan(self):
+        """扫描字体目录，读取每个字体（含TTC中的每个字体）的家族和样式"""
+        with PROFILER.stage("font_scan"):
+            faces = []
+            for font_dir in self.font_dirs:
+                for dir_path, _, file_names in os.walk(font_dir):
+                    for file_name in sorted(file_names):
+                        if file_name.lower().endswith(FONT_EXTENSIONS):
+                            faces.extend(self.read_faces(os.path.join(dir_path, file_name)))
+            self.set_faces(faces)
+            self.coverage = {}
+            self.dir_mtimes = self.current_dir_mtimes()
+
+    @staticmethod
+    def read_faces(path):
+        """读取字体文件中的所有字体，TTC/OTC文件按索引依次读取直到失败"""
+        faces = []
+        index = 0
+        while True:
+            try:
+                font = ImageFont.truetype(path, FontIndex.COVERAGE_SIZE, index=index)
+                family, style = font.getname()
+            except Exception:
+                break
+            faces.append({"path": path, "index": index, "family": family or "", "style": style or ""})
+            if not path.lower().endswith((".ttc", ".otc")):
+                break
+            index += 1
+        return faces
+
+    def set_faces(self, faces):
+        """设置字体列表并重建按家族的查找表"""
+        self.faces = faces
+        self.by_family = {}
+        for face in faces:
+            self.by_family.setdefault(face["family"].lower(), []).append(face)
+            self._exists[face["path"]] = True
+
+    def save(self):
+        """保存索引和字形覆盖情况（先写临时文件再替换）"""
+        with self._lock:
+            data = {
+                "dir_mtimes": self.dir_mtimes,
+                "faces": self.faces,
+                "coverage": {
+                    key: {"covered": "".join(char for char, ok in chars.items() if ok),
+                          "missing": "".join(char for char, ok in chars.items() if not ok)}
+                    for key, chars in self.coverage.items()
+                },
+            }
+            self.dirty = False
+        temp_path = None
+        try:
+            # 批量渲染的多个进程可能同时保存，每次使用唯一的临时文件
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"警告: 无法保存字体索引 {self.path}: {e}")
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def exists(self, path):
+        """字体文件是否存在（每个路径只检查一次）"""
+        if not path:
+            return False
+        result = self._exists.get(path)
+        if result is None:
+            result = self._exists[path] = os.path.exists(path)
+        return result
+
+    def find(self, family, style=None):
+        """按家族名（不区分大小写）和样式查找字体，找不到时返回None"""
+        self.ensure_loaded()
+        faces = self.by_family.get(family.lower(), [])
+        for face in faces:
+            if style is None or face["style"].lower() == style.lower():
+                return face
+        return None
+
+    def covers(self, path, text, index=0):
+        """字体是否包含text中所有非空白字符的字形，结果按字符缓存"""
+        chars = {char for char in text if not char.isspace()}
+        if not chars:
+            return self.exists(path)
+        if not self.exists(path):
+            return False
+        key = f"{path}|{index}"
+        with self._lock:
+            known = self.coverage.setdefault(key, {})
+            unknown = chars.difference(known)
+            if unknown:
+                font = FONT_CACHE.get(path, self.COVERAGE_SIZE, index)
+                # 缺失的字符会被渲染为.notdef字形
+                notdef = self.glyph_signature(font, "\uffff")
+                for char in unknown:
+                    known[char] = self.glyph_signature(font, char) != notdef
+            covered = all(known[char] for char in chars)
+            if unknown and self.loaded:
+                # 只标记，由best_font/find_font_path在查找结束后统一保存一次
+                self.dirty = True
+        return covered
+
+    def flush(self):
+        """有新的字形覆盖结果时保存索引"""
+        if self.dirty:
+            self.save()
+
+    @staticmethod
+    def glyph_signature(font, char):
+        """返回字符渲染结果的尺寸和像素，用于和.notdef字形比较"""
+        mask = font.getmask(char)
+        return mask.size, bytes(mask)
+
+    def best_font(self, text=""):
+        """返回能显示text的字体：优先按PREFERRED_FONT_FAMILIES顺序，其次为其他字体，都不支持时返回首选字体"""
+        self.ensure_loaded()
+
+        def face_order(face):
+            # 同一家族中常规字重优先，TTC中的第一个字体优先
+            return face["index"], face["style"].lower() not in ("regular", "book")
+
+        preferred = [face for family in PREFERRED_FONT_FAMILIES
+                     for face in sorted(self.by_family.get(family.lower(), []), key=face_order)]
+        others = sorted((face for face in self.faces if face not in preferred), key=face_order)
+        try:
+            for face in preferred + others:
+                if self.covers(face["path"], text, face["index"]):
+                    return face
+            return preferred[0] if preferred else None
+        finally:
+            self.flush()
+
+
+# 全局系统字体索引
+FONT_INDEX = FontIndex()
+
+
+class TextMetricsCache:
+    """文字测量缓存：按(文字, 字体路径, 字号, 索引)缓存包围盒、宽度和高度，超出容量时按LRU淘汰
+
+    所有需要文字尺寸的地方（字号适配、居中、描边遮罩）都经由这里测量；除总计数外还按线程记录实际测量次数，
+    渲染器据此统计每帧的测量次数（状态不变的帧应为0）
+    """
+
+    def __init__(self, max_size=TEXT_METRICS_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0  # 实际调用getbbox测量的次数
+        self._metrics = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def measure(self, text, font):
+        """返回(包围盒, 宽度, 高度)"""
+        key = (text,) + font_identity(font)
+        with self._lock:
+            metrics = self._metrics.get(key)
+            if metrics is not None:
+                self._metrics.move_to_end(key)
+                self.hits += 1
+                return metrics
+
+        with PROFILER.stage("textbbox"):
+            bbox = font.getbbox(text)
+        metrics = (bbox, bbox[2] - bbox[0], bbox[3] - bbox[1])
+        self._local.misses = self.thread_misses() + 1
+        with self._lock:
+            self.misses += 1
+            self._metrics[key] = metrics
+            while len(self._metrics) > self.max_size:
+                self._metrics.popitem(last=False)
+        return metrics
+
+    def thread_misses(self):
+        """返回当前线程中实际测量的次数"""
+        return getattr(self._local, "misses", 0)
+
+    def stats(self):
+        """返回命中/测量计数和当前缓存数量"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._metrics)}
+
+    def clear(self):
+        """清空缓存并重置计数"""
+        with self._lock:
+            self._metrics.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 全局文字测量缓存实例
+TEXT_METRICS = TextMetricsCache()
+
+
+class FitCache:
+    """字号适配结果缓存，按(文字, 区域宽度, 最大字号, 字体路径, 字体索引)缓存适配后的字号"""
+
+    MIN_SIZE = 11  # 与原逐级递减搜索的下限一致
+    WIDTH_RATIO = 0.9  # 文字宽度不超过区域宽度的90%
+
+    def __init__(self, max_size=FIT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.measurements = 0  # 实际测量次数
+        self._sizes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fit(self, text, region_width, max_size, font_path, font_index=0):
+        """返回使文字宽度适配区域的最大字号，全部不适配时返回max_size"""
+        key = (text, region_width, max_size, font_path, font_index)
+        with self._lock:
+            size = self._sizes.get(key)
+            if size is not None:
+                self._sizes.move_to_end(key)
+                self.hits += 1
+                return size
+            self.misses += 1
+
+        with PROFILER.stage("fit"):
+            size = self._search(text, region_width, max_size, font_path, font_index)
+
+        with self._lock:
+            self._sizes[key] = size
+            while len(self._sizes) > self.max_size:
+                self._sizes.popitem(last=False)
+        return size
+
+    def _search(self, text, region_width, max_size, font_path, font_index):
+        """二分查找适配字号（文字宽度随字号单调递增）"""
+        # 默认字体不可缩放，任何字号结果都相同
+        if not font_path:
+            return max_size
+
+        limit = region_width * self.WIDTH_RATIO
+        low, high = self.MIN_SIZE, max_size
+        best = None
+        while low <= high:
+            mid = (low + high) // 2
+            font = FONT_CACHE.get(font_path, mid, font_index)
+            _, width, _ = TEXT_METRICS.measure(text, font)
+            self.measurements += 1
+            if width <= limit:
+                best = mid
+                low = mid + 1
+            else:
+                high = mid - 1
+        return best if best is not None else max_size
+
+    def stats(self):
+        """返回命中/未命中/测量计数和当前缓存数量"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "measurements": self.measurements, "size": len(self._sizes)}
+
+    def clear(self):
+        """清空缓存并重置计数"""
+        with self._lock:
+            self._sizes.clear()
+            self.hits = 0
+            self.misses = 0
+            self.measurements = 0
+
+
+# 全局字号适配缓存实例
+FIT_CACHE = FitCache()
+
+
+def boxes_intersect(a, b):
+    """判断两个(x_min, y_min, x_max, y_max)矩形是否相交"""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def merge_boxes(boxes):
+    """合并相交的矩形，返回互不相交的矩形列表"""
+    merged = []
+    for box in boxes:
+        if box[0] >= box[2] or box[1] >= box[3]:
+            continue
+        # 与已有矩形相交则合并，直到不再与任何矩形相交
+        while True:
+            for other in merged:
+                if boxes_intersect(box, other):
+                    merged.remove(other)
+                    box = (min(box[0], other[0]), min(box[1], other[1]),
+                           max(box[2], other[2]), max(box[3], other[3]))
+                    break
+            else:
+                break
+        merged.append(box)
+    return merged
+
+
+def font_identity(font):
+    """返回可作为缓存键的字体标识(路径, 字号, 索引)"""
+    return getattr(font, "path", None), getattr(font, "size", None), getattr(font, "index", 0)
+
+
+def set_outline_mode(mode):
+    """运行时切换描边绘制方式"""
+    global OUTLINE_MODE
+    if mode not in OUTLINE_MODES:
+        raise ValueError(f"未知的描边方式: {mode}")
+    OUTLINE_MODE = mode
+
+
+def render_outline_masks(text, font, x, y, mode=None, outline_width=None):
+    """栅格化文字的描边遮罩和文字遮罩，返回(描边遮罩, 文字遮罩, 左上角x, 左上角y)"""
+    mode = mode or OUTLINE_MODE
+    outline_width = OUTLINE_WIDTH if outline_width is None else outline_width
+    bbox = TEXT_METRICS.measure(text, font)[0]
+    int_x, int_y = math.floor(x), math.floor(y)
+    # 绘制坐标必须非负，否则Pillow对负坐标的取整方式与直接绘制不一致
+    origin_x = outline_width + max(0, -bbox[0])
+    origin_y = outline_width + max(0, -bbox[1])
+    size = (origin_x + bbox[2] + outline_width + 2, origin_y + bbox[3] + outline_width + 2)
+    text_x, text_y = origin_x + x - int_x, origin_y + y - int_y
+
+    fill_mask = Image.new("L", size, 0)
+    ImageDraw.Draw(fill_mask).text((text_x, text_y), text, font=font, fill=255)
+    if mode == "dilate":
+        # 文字只栅格化一次，描边由遮罩向8个方向平移后合并（膨胀）得到，效果与classic一致
+        outline_mask = Image.new("L", size, 0)
+        for dx in (-outline_width, 0, outline_width):
+            for dy in (-outline_width, 0, outline_width):
+                if dx != 0 or dy != 0:
+                    outline_mask.paste(255, (dx, dy), fill_mask)
+    elif mode == "stroke":
+        outline_mask = Image.new("L", size, 0)
+        ImageDraw.Draw(outline_mask).text((text_x, text_y), text, font=font, fill=255,
+                                          stroke_width=outline_width, stroke_fill=255)
+    else:
+        # 描边遮罩为8次偏移绘制的并集
+        outline_mask = Image.new("L", size, 0)
+        outline_draw = ImageDraw.Draw(outline_mask)
+        for dx in (-outline_width, 0, outline_width):
+            for dy in (-outline_width, 0, outline_width):
+                if dx != 0 or dy != 0:
+                    outline_draw.text((text_x + dx, text_y + dy), text, font=font, fill=255)
+
+    # 裁掉文字上方和左侧的空白，只保留文字及描边
+    crop_box = (origin_x + bbox[0] - outline_width, origin_y + bbox[1] - outline_width, size[0], size[1])
+    return (outline_mask.crop(crop_box), fill_mask.crop(crop_box),
+            int_x - origin_x + crop_box[0], int_y - origin_y + crop_box[1])
+
+
+def set_smooth_factor(factor):
+    """运行时切换文字超采样倍数（1表示不超采样）"""
+    global SMOOTH_FACTOR
+    factor = int(factor)
+    if factor < 1:
+        raise ValueError(f"超采样倍数必须为正整数: {factor}")
+    SMOOTH_FACTOR = factor
+
+
+def render_smooth_masks(text, font, x, y, mode=None, factor=None):
+    """按factor倍字号和描边宽度栅格化遮罩后缩小，返回值与render_outline_masks相同
+
+    factor为1或字体不可缩放（默认字体）时直接按原尺寸栅格化
+    """
+    mode = mode or OUTLINE_MODE
+    factor = SMOOTH_FACTOR if factor is None else factor
+    path, size, index = font_identity(font)
+    if factor <= 1 or not path or not size:
+        return render_outline_masks(text, font, x, y, mode)
+
+    int_x, int_y = math.floor(x), math.floor(y)
+    large_font = FONT_CACHE.get(path, size * factor, index)
+    # 字体微调使放大后的字形度量不是严格的factor倍，按包围盒中心对齐，保证与原尺寸绘制的位置一致
+    bbox = TEXT_METRICS.measure(text, font)[0]
+    large_bbox = TEXT_METRICS.measure(text, large_font)[0]
+    large_x = (x - int_x + (bbox[0] + bbox[2]) / 2) * factor - (large_bbox[0] + large_bbox[2]) / 2
+    large_y = (y - int_y + (bbox[1] + bbox[3]) / 2) * factor - (large_bbox[1] + large_bbox[3]) / 2
+    outline_mask, fill_mask, left, top = render_outline_masks(
+        text, large_font, large_x, large_y, mode, OUTLINE_WIDTH * factor)
+
+    # 左上角对齐到factor的整数倍，使缩小后的每个像素正好对应原尺寸的一个像素
+    pad_x, pad_y = left % factor, top % factor
+    width = -(-(outline_mask.width + pad_x) // factor)
+    height = -(-(outline_mask.height + pad_y) // factor)
+    masks = []
+    for mask in (outline_mask, fill_mask):
+        aligned = Image.new("L", (width * factor, height * factor), 0)
+        aligned.paste(mask, (pad_x, pad_y))
+        masks.append(aligned.resize((width, height), SMOOTH_RESAMPLE))
+    return masks[0], masks[1], int_x + (left - pad_x) // factor, int_y + (top - pad_y) // factor
+
+
+def draw_outlined_text(draw, x, y, text, font, outline_color, fill_color, mode=None):
+    """改进的文字描边绘制方法，确保描边不透明"""
+    mode = mode or OUTLINE_MODE
+    if mode == "stroke":
+        # Pillow原生描边：一次绘制完成描边和主文字
+        draw.text((x, y), text, font=font, fill=fill_color,
+                  stroke_width=OUTLINE_WIDTH, stroke_fill=outline_color)
+    elif mode == "dilate":
+        outline_mask, fill_mask, left, top = render_outline_masks(text, font, x, y, mode)
+        draw.bitmap((left, top), outline_mask, fill=outline_color)
+        draw.bitmap((left, top), fill_mask, fill=fill_color)
+    else:
+        # 绘制文字描边（增加描边宽度以增强效果）
+        for dx in (-OUTLINE_WIDTH, 0, OUTLINE_WIDTH):
+            for dy in (-OUTLINE_WIDTH, 0, OUTLINE_WIDTH):
+                if dx != 0 or dy != 0:
+                    draw.text((x + dx, y + dy), text, font=font, fill=outline_color)
+        # 绘制主文字（使用指定颜色）
+        draw.text((x, y), text, font=font, fill=fill_color)
+
+
+def blit_sprite(image, sprite, x, y, outline_color, fill_color):
+    """将描边/文字遮罩精灵按颜色绘制到图片的(x, y)处，超出图片的部分自动裁剪"""
+    outline_mask, fill_mask = sprite
+    left, top = max(0, -x), max(0, -y)
+    right = min(outline_mask.width, image.width - x)
+    bottom = min(outline_mask.height, image.height - y)
+    if left >= right or top >= bottom:
+        return
+    box = (x + left, y + top, x + right, y + bottom)
+    if (left, top, right, bottom) != (0, 0) + outline_mask.size:
+        outline_mask = outline_mask.crop((left, top, right, bottom))
+        fill_mask = fill_mask.crop((left, top, right, bottom))
+    # 与逐次draw.text相同的混合方式：先描边后主文字
+    image.paste(outline_color, box, outline_mask)
+    image.paste(fill_color, box, fill_mask)
+
+
+class ScoreSpriteAtlas:
+    """分数精灵图集，按(字体, 字号, 描边方式)预渲染分数的描边遮罩和文字遮罩"""
+
+    def __init__(self, max_atlases=SCORE_ATLAS_SIZE, prebuilt=SCORE_ATLAS_PREBUILT):
+        self.max_atlases = max_atlases
+        self.prebuilt = prebuilt
+        self.hits = 0
+        self.misses = 0  # 实际渲染的精灵数量
+        self._atlases = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text, font, center):
+        """获取居中于center的分数精灵，返回((描边遮罩, 文字遮罩), 左上角x, 左上角y)"""
+        # 居中坐标的小数部分影响字形的亚像素位置，因此也作为图集键的一部分
+        center_x, center_y = center
+        frac = (center_x - math.floor(center_x), center_y - math.floor(center_y))
+        mode = OUTLINE_MODE
+        key = (font_identity(font), frac, mode, SMOOTH_FACTOR)
+
+        with self._lock:
+            atlas = self._atlases.get(key)
+            if atlas is None:
+                # 首次使用该字体和字号时一次性预渲染常用分数
+                atlas = {}
+                for score_text in self.prebuilt:
+                    atlas[score_text] = self.render_sprite(score_text, font, frac, mode)
+                    self.misses += 1
+                self._atlases[key] = atlas
+                while len(self._atlases) > self.max_atlases:
+                    self._atlases.popitem(last=False)
+            self._atlases.move_to_end(key)
+
+            sprite = atlas.get(text)
+            if sprite is None:
+                sprite = self.render_sprite(text, font, frac, mode)
+                atlas[text] = sprite
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        masks, origin_x, origin_y, width, height = sprite
+        # 与直接绘制时的取整方式一致：文字左上角为 center - 尺寸 / 2
+        x = math.floor(center_x - width / 2) - origin_x
+        y = math.floor(center_y - height / 2) - origin_y
+        return masks, x, y
+
+    @staticmethod
+    def render_sprite(text, font, frac, mode):
+        """渲染单个分数精灵，返回((描边遮罩, 文字遮罩), 文字原点x, 文字原点y, 文字宽, 文字高)"""
+        _, width, height = TEXT_METRICS.measure(text, font)
+        # 居中位置的小数部分：文字左上角 = 中心 - 尺寸 / 2
+        text_x = (frac[0] - width / 2) % 1
+        text_y = (frac[1] - height / 2) % 1
+        outline_mask, fill_mask, left, top = render_smooth_masks(text, font, text_x, text_y, mode)
+        return (outline_mask, fill_mask), -left, -top, width, height
+
+    def stats(self):
+        """返回命中/渲染计数和当前图集数量"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "atlases": len(self._atlases)}
+
+    def clear(self):
+        """清空图集并重置计数"""
+        with self._lock:
+            self._atlases.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 全局分数精灵图集实例
+SCORE_ATLAS = ScoreSpriteAtlas()
+
+
+class TextLayerCache:
+    """超采样文字图层缓存：名称和赛制文字按(文字, 字体, 字号, 亚像素位置, 描边方式, 缩放因子)缓存缩小后的遮罩
+
+    图层只保存描边和文字的覆盖率遮罩，颜色在绘制时由blit_sprite填充，因此换色不需要重新栅格化
+    """
+
+    def __init__(self, max_size=TEXT_LAYER_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._layers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text, font, x, y):
+        """获取左上角在(x, y)的文字图层，返回((描边遮罩, 文字遮罩), 左上角x, 左上角y)"""
+        int_x, int_y = math.floor(x), math.floor(y)
+        frac = (x - int_x, y - int_y)
+        key = (text, font_identity(font), frac, OUTLINE_MODE, SMOOTH_FACTOR)
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is not None:
+                self._layers.move_to_end(key)
+                self.hits += 1
+        if layer is None:
+            # 在锁外栅格化，避免长文字阻塞其他线程
+            with PROFILER.stage("supersample"):
+                outline_mask, fill_mask, left, top = render_smooth_masks(text, font, frac[0], frac[1])
+            layer = ((outline_mask, fill_mask), left, top)
+            with self._lock:
+                self.misses += 1
+                self._layers[key] = layer
+                while len(self._layers) > self.max_size:
+                    self._layers.popitem(last=False)
+        masks, left, top = layer
+        return masks, int_x + left, int_y + top
+
+    def stats(self):
+        """返回命中/未命中计数和当前缓存数量"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._layers)}
+
+    def clear(self):
+        """清空缓存并重置计数"""
+        with self._lock:
+            self._layers.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 全局超采样文字图层缓存实例
+TEXT_LAYER_CACHE = TextLayerCache()
+
+
+class BackgroundCache:
+    """背景图片解码缓存：RGBA像素以原始格式保存到磁盘，再次打开时内存映射为只读图片，无需解码
+
+    缓存按(路径, 修改时间, 文件大小)区分，文件名中记录图片尺寸；超出容量上限时删除最久未使用的文件。
+    同一进程中多个计分板打开同一背景时共用同一个图片对象（只读）
+    """
+
+    SUFFIX = ".rgba"
+
+    def __init__(self, cache_dir=BACKGROUND_CACHE_DIR, max_bytes=BACKGROUND_CACHE_SIZE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True  # 缓存目录不可写时自动关闭
+        self.shared = 0  # 直接复用进程中已打开图片的次数
+        self._images = weakref.WeakValueDictionary()  # 进程中仍在使用的背景图片
+        self._lock = threading.Lock()
+
+    def open(self, path):
+        """打开背景图片并返回RGBA图片：命中缓存时内存映射原始像素，否则解码后写入缓存"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return Image.open(path).convert("RGBA")
+        key = hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}".encode("utf-8")).hexdigest()
+
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self.shared += 1
+                return image
+
+        image = self.map_cached(key) if self.enabled else None
+        if image is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            image = Image.open(path).convert("RGBA")
+            if self.enabled:
+                self.store(key, image)
+        with self._lock:
+            # 其他线程同时打开了同一背景时使用先完成的结果
+            image = self._images.setdefault(key, image)
+        return image
+
+    def map_cached(self, key):
+        """内存映射缓存中的原始像素，未命中时返回None"""
+        for name in self.list_files():
+            if not name.startswith(key + "_"):
+                continue
+            file_path = os.path.join(self.cache_dir, name)
+            try:
+                width, height = (int(value) for value in name[len(key) + 1:-len(self.SUFFIX)].split("x"))
+                with open(file_path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if len(mapped) != width * height * 4:
+                    mapped.close()
+                    continue
+                # 更新修改时间，作为LRU淘汰的使用顺序
+                os.utime(file_path)
+            except (OSError, ValueError):
+                continue
+            # 图片直接引用映射的内存（只读），渲染器只会复制或裁剪背景
+            return Image.frombuffer("RGBA", (width, height), mapped, "raw", "RGBA", 0, 1)
+        return None
+
+    def store(self, key, image):
+        """把解码后的像素写入缓存（先写临时文件再替换），并按容量上限淘汰旧文件
+
+        每次写入使用唯一的临时文件，预取线程和批量渲染的多个进程可以同时写入同一背景
+        """
+        name = f"{key}_{image.width}x{image.height}{self.SUFFIX}"
+        file_path = os.path.join(self.cache_dir, name)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=self.cache_dir)
+        except OSError as e:
+            print(f"警告: 无法写入背景缓存 {self.cache_dir}: {e}")
+            self.enabled = False
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(image.tobytes())
+            os.replace(temp_path, file_path)
+        except OSError:
+            # 写入失败或目标文件正被其他进程映射（Windows上无法替换）：只跳过本次写入，缓存仍然可用
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self.evict(keep=name)
+
+    def list_files(self):
+        """返回缓存目录中的缓存文件名"""
+        try:
+            return [name for name in os.listdir(self.cache_dir) if name.endswith(self.SUFFIX)]
+        except OSError:
+            return []
+
+    def evict(self, keep=None):
+        """删除最久未使用的缓存文件，直到总大小不超过上限"""
+        with self._lock:
+            entries = []
+            for name in self.list_files():
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in entries:
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    # Windows上正在被映射的文件无法删除，下次再淘汰
+                    continue
+                total -= size
+
+    def stats(self):
+        """返回命中/未命中计数和缓存占用（字节）"""
+        size = 0
+        for name in self.list_files():
+            try:
+                size += os.path.getsize(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+        return {"hits": self.hits, "misses": self.misses, "shared": self.shared, "bytes": size}
+
+    def clear(self):
+        """删除所有缓存文件并重置计数"""
+        with self._lock:
+            for name in self.list_files():
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+            self._images.clear()
+            self.hits = 0
+            self.misses = 0
+            self.shared = 0
+
+
+# 全局背景图片缓存
+BACKGROUND_CACHE = BackgroundCache()
+
+
+class TemplateIndex:
+    """UI模板索引：扫描一次模板文件夹，在磁盘上缓存模板尺寸、修改时间和缩略图，并在后台预取背景"""
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, folder=None, cache_dir=TEMPLATE_CACHE_DIR, prefetch_size=TEMPLATE_PREFETCH_SIZE):
+        self.folder = folder  # None表示程序目录下的CUSTOM_IMAGE_FOLDER
+        self.cache_dir = cache_dir
+        self.prefetch_size = prefetch_size
+        self.entries = None  # 尚未扫描
+        self._prefetched = OrderedDict()  # 路径 -> 预取的RGBA背景
+        self._pending = set()  # 正在预取的路径
+        self._lock = threading.Lock()
+
+    def templates(self):
+        """返回模板列表（默认模板在前），首次调用时扫描"""
+        if self.entries is None:
+            self.scan()
+        return self.entries
+
+    def scan(self):
+        """扫描模板文件夹：修改时间和文件大小未变的模板直接使用磁盘上的索引，其余只读取图片头获取尺寸"""
+        folder = self.folder or get_resource_path(CUSTOM_IMAGE_FOLDER)
+        stored = {entry["path"]: entry for entry in self.load()}
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            names = []
+
+        entries = []
+        for name in names:
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(folder, name)
+            try:
+                stat = os.stat(path)
+                entry = stored.get(path)
+                if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["file_size"] != stat.st_size:
+                    with Image.open(path) as image:
+                        width, height = image.size
+                    entry = {"name": name, "path": path, "width": width, "height": height,
+                             "mtime_ns": stat.st_mtime_ns, "file_size": stat.st_size, "thumbnail": None}
+            except Exception as e:
+                print(f"警告: 无法读取模板 {path}: {e}")
+                continue
+            entries.append(entry)
+
+        entries.sort(key=lambda entry: (entry["name"] != DEFAULT_IMAGE_NAME, entry["name"].lower()))
+        self.entries = entries
+        self.save()
+
+    def load(self):
+        """读取磁盘上的模板索引"""
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def save(self):
+        """保存模板索引（先写临时文件再替换）"""
+        path = os.path.join(self.cache_dir, self.INDEX_NAME)
+        temp_path = None
+        try:
+            # 批量渲染的多个进程可能同时保存，每次使用唯一的临时文件
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=self.INDEX_NAME + ".", suffix=".tmp", dir=self.cache_dir)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.entries or [], f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"警告: 无法保存模板索引 {path}: {e}")
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def thumbnails(self):
+        """返回[(模板, 缩略图), ...]，缺少的缩略图会生成并保存到磁盘"""
+        result = []
+        created = False
+        for entry in self.templates():
+            thumbnail = self.load_thumbnail(entry)
+            if thumbnail is None:
+                thumbnail = self.create_thumbnail(entry)
+                created = True
+            if thumbnail is not None:
+                result.append((entry, thumbnail))
+        if created:
+            self.save()
+        return result
+
+    def load_thumbnail(self, entry):
+        """读取磁盘上的缩略图，不存在时返回None"""
+        if not entry.get("thumbnail"):
+            return None
+        try:
+            with Image.open(os.path.join(self.cache_dir, entry["thumbnail"])) as thumbnail:
+                thumbnail.load()
+                return thumbnail.copy()
+        except OSError:
+            return None
+
+    def create_thumbnail(self, entry):
+        """生成模板缩略图并保存到缓存目录"""
+        try:
+            with Image.open(entry["path"]) as image:
+                image.draft("RGB", TEMPLATE_THUMBNAIL_SIZE)  # JPEG只解码到接近缩略图的尺寸
+                thumbnail = image.convert("RGBA")
+            thumbnail.thumbnail(TEMPLATE_THUMBNAIL_SIZE)
+        except Exception as e:
+            print(f"警告: 无法生成模板缩略图 {entry['path']}: {e}")
+            return None
+
+        key = f"{entry['path']}|{entry['mtime_ns']}|{entry['file_size']}"
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            thumbnail.save(os.path.join(self.cache_dir, name))
+            entry["thumbnail"] = name
+        except OSError as e:
+            print(f"警告: 无法保存模板缩略图: {e}")
+        return thumbnail
+
+    def next_template(self, path):
+        """返回模板列表中path之后的模板路径（循环），没有其他模板时返回None"""
+        paths = [entry["path"] for entry in self.templates()]
+        if len(paths) < 2:
+            return None
+        normalized = os.path.normcase(os.path.abspath(path)) if path else None
+        for i, candidate in enumerate(paths):
+            if os.path.normcase(os.path.abspath(candidate)) == normalized:
+                return paths[(i + 1) % len(paths)]
+        return paths[0]
+
+    def prefetch(self, path):
+        """在后台线程中解码背景，已预取或正在预取时直接返回"""
+        if not path:
+            return
+        with self._lock:
+            if path in self._prefetched or path in self._pending:
+                return
+            self._pending.add(path)
+        threading.Thread(target=self._prefetch_worker, args=(path,), daemon=True).start()
+
+    def _prefetch_worker(self, path):
+        try:
+            image = BACKGROUND_CACHE.open(path)
+        except Exception as e:
+            print(f"警告: 无法预取模板 {path}: {e}")
+            image = None
+        with self._lock:
+            self._pending.discard(path)
+            if image is not None:
+                self._prefetched[path] = image
+                while len(self._prefetched) > self.prefetch_size:
+                    self._prefetched.popitem(last=False)
+
+    def is_ready(self, path):
+        """背景是否已预取完成（或不在预取中，可以直接打开）"""
+        with self._lock:
+            return path in self._prefetched or path not in self._pending
+
+    def open(self, path):
+        """打开背景：优先使用预取的图片，否则经由背景缓存打开"""
+        with self._lock:
+            image = self._prefetched.get(path)
+            if image is not None:
+                self._prefetched.move_to_end(path)
+                return image
+        return BACKGROUND_CACHE.open(path)
+
+
+# 全局UI模板索引
+TEMPLATE_INDEX = TemplateIndex()
+
+
+class RenderScheduler:
+    """合并渲染请求：状态变化只标记需要重绘，每个帧间隔内最多渲染一次"""
+
+    def __init__(self, root, render_callback, fps_cap=RENDER_FPS_CAP):
+        self.root = root
+        self.render_callback = render_callback
+        self.fps_cap = fps_cap
+        self.pending_id = None  # 已安排但尚未执行的渲染
+        self.last_render_time = 0.0
+        self.requests = 0  # 收到的渲染请求数
+        self.renders = 0  # 实际渲染次数
+        self.coalesced = 0  # 被合并（丢弃中间状态）的请求数
+
+    def request(self):
+        """请求渲染；已有待执行的渲染时直接合并"""
+        self.requests += 1
+        if self.pending_id is not None:
+            self.coalesced += 1
+            return
+
+        delay = 0.0
+        if self.fps_cap > 0:
+            delay = self.last_render_time + 1.0 / self.fps_cap - time.perf_counter()
+        if delay > 0:
+            self.pending_id = self.root.after(max(1, int(delay * 1000)), self.run)
+        else:
+            self.pending_id = self.root.after_idle(self.run)
+
+    def run(self):
+        """执行渲染（由Tk事件循环调用）"""
+        self.pending_id = None
+        self.last_render_time = time.perf_counter()
+        self.renders += 1
+        self.render_callback()
+
+    def flush(self):
+        """立即执行待处理的渲染"""
+        if self.pending_id is not None:
+            self.root.after_cancel(self.pending_id)
+            self.run()
+
+    def cancel(self):
+        """取消待处理的渲染（关闭窗口时）"""
+        if self.pending_id is not None:
+            self.root.after_cancel(self.pending_id)
+            self.pending_id = None
+
+    def stats(self):
+        """返回请求/渲染/合并计数"""
+        return {"requests": self.requests, "renders": self.renders, "coalesced": self.coalesced}
+
+
+def display_refresh_rate():
+    """返回主显示器的刷新率（Hz），无法获取时返回DISPLAY_REFRESH_RATE"""
+    if CURRENT_OS == "Windows":
+        try:
+            import ctypes
+            hdc = ctypes.windll.user32.GetDC(0)
+            try:
+                rate = ctypes.windll.gdi32.GetDeviceCaps(hdc, 116)  # VREFRESH
+            finally:
+                ctypes.windll.user32.ReleaseDC(0, hdc)
+            # 0和1表示使用硬件默认刷新率
+            if rate > 1:
+                return rate
+        except Exception:
+            pass
+    return DISPLAY_REFRESH_RATE
+
+
+class DragThrottle:
+    """合并窗口拖动事件：只记录最新的目标位置，每个显示刷新间隔内最多移动一次窗口"""
+
+    def __init__(self, root, move_callback, refresh_rate=None):
+        self.root = root
+        self.move_callback = move_callback  # move_callback(x, y)，实际移动了窗口时返回True
+        self.interval = 1.0 / (refresh_rate or display_refresh_rate())
+        self.pending_id = None  # 已安排但尚未执行的移动
+        self.target = None  # 尚未应用的最新目标位置
+        self.last_move_time = 0.0
+        self.events = 0  # 收到的移动事件数
+        self.updates = 0  # 应用目标位置的次数
+        self.geometry_calls = 0  # 实际移动窗口的次数
+
+    def motion(self, x, y):
+        """记录新的目标位置；距上次移动已超过刷新间隔时立即移动，否则在间隔结束时移动"""
+        self.events += 1
+        self.target = (x, y)
+        if self.pending_id is not None:
+            return
+        delay = self.last_move_time + self.interval - time.perf_counter()
+        if delay > 0:
+            self.pending_id = self.root.after(max(1, int(delay * 1000)), self.run)
+        else:
+            self.run()
+
+    def run(self):
+        """应用最新的目标位置（由Tk事件循环调用）"""
+        self.pending_id = None
+        if self.target is None:
+            return
+        (x, y), self.target = self.target, None
+        self.last_move_time = time.perf_counter()
+        self.updates += 1
+        if self.move_callback(x, y):
+            self.geometry_calls += 1
+
+    def flush(self):
+        """立即应用待处理的目标位置（松开鼠标时）"""
+        if self.pending_id is not None:
+            self.root.after_cancel(self.pending_id)
+        self.run()
+
+    def cancel(self):
+        """取消待处理的移动（关闭窗口时）"""
+        if self.pending_id is not None:
+            self.root.after_cancel(self.pending_id)
+            self.pending_id = None
+        self.target = None
+
+    def stats(self):
+        """返回移动事件数、应用次数和实际移动窗口次数"""
+        return {"events": self.events, "updates": self.updates, "geometry_calls": self.geometry_calls}
+
+
+def snap_position(value, targets, distance):
+    """value与targets中最近的目标相差不超过distance时吸附到该目标"""
+    if distance <= 0:
+        return value
+    nearest = min(targets, key=lambda target: abs(target - value))
+    return nearest if abs(nearest - value) <= distance else value
+
+
+class RenderWorker:
+    """后台渲染线程：根据不可变的状态快照渲染，只把完成的帧交给Tk线程"""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.submitted_version = 0
+        self.frames = 0  # 已交付的帧数
+        self.stale_frames = 0  # 渲染期间有新状态到达而丢弃的帧数
+        self._condition = threading.Condition()
+        self._job = None  # 最新的待渲染快照，旧快照直接被覆盖
+        self._result = None  # 尚未被Tk线程取走的帧
+        self._carry_boxes = []  # 被丢弃帧的变化区域，并入下一帧
+        self._carry_full = False
+        self._busy = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="ScoreboardRenderWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, fields, background=None):
+        """提交变化的字段（字典），返回该提交的版本号；尚未处理的旧提交与其合并"""
+        with self._condition:
+            self.submitted_version += 1
+            if self._job is not None:
+                # 未处理的旧提交中的字段和新背景需要保留
+                fields = {**self._job[1], **fields}
+                if background is None:
+                    background = self._job[2]
+            self._job = (self.submitted_version, dict(fields), background)
+            self._condition.notify()
+            return self.submitted_version
+
+    def poll(self):
+        """取走已完成的帧，返回(版本号, 帧)或None（在Tk线程调用）"""
+        with self._condition:
+            result, self._result = self._result, None
+            return result
+
+    def idle(self):
+        """是否所有已提交的快照都已交付"""
+        with self._condition:
+            return self._job is None and self._result is None and not self._busy
+
+    def stop(self):
+        """停止工作线程"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._job is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                version, state, background = self._job
+                self._job = None
+                self._busy = True
+
+            try:
+                if background is not None:
+                    self.renderer.set_background(background)
+                self.renderer.update(**state)
+                # 帧可能因过期被丢弃，确定交付后才输出到帧输出
+                boxes = self.renderer.render(publish=False)
+            except Exception as e:
+                print(f"后台渲染出错: {e}")
+                with self._condition:
+                    self._busy = False
+                continue
+
+            if boxes is None:
+                self._carry_full = True
+            else:
+                self._carry_boxes.extend(boxes)
+
+            with self._condition:
+                if self._job is not None:
+                    # 渲染期间已有更新的状态：丢弃这一帧，变化区域并入下一帧
+                    self.stale_frames += 1
+                    self._busy = False
+                    continue
+                pending, self._result = self._result, None
+
+            # 帧输出收到的变化区域包含之前被丢弃的帧（不含已输出过的未取走帧）
+            self.renderer.publish_frame(None if self._carry_full else merge_boxes(self._carry_boxes))
+
+            # Tk线程尚未取走上一帧时与其合并，保证中间变化不会丢失
+            if pending is not None:
+                if pending[1][0] == "full":
+                    self._carry_full = True
+                else:
+                    self._carry_boxes.extend(box for box, tile in pending[1][1])
+            frame = self.renderer.take_frame(None if self._carry_full else merge_boxes(self._carry_boxes))
+            self._carry_boxes = []
+            self._carry_full = False
+
+            with self._condition:
+                self._result = (version, frame)
+                self.frames += 1
+                self._busy = False
+
+    def stats(self):
+        """返回提交/交付/丢弃计数"""
+        with self._condition:
+            return {"submitted": self.submitted_version, "frames": self.frames, "stale_frames": self.stale_frames}
+
+
+class FrameSink:
+    """帧输出的基类：渲染器每完成一帧调用publish，并记录每帧的编码和写入耗时"""
+
+    name = "sink"
+
+    def __init__(self):
+        self.frames = 0  # 实际输出的帧数
+        self.last_encode_ms = 0.0
+        self.last_write_ms = 0.0
+        self.total_encode_ms = 0.0
+        self.total_write_ms = 0.0
+        self.failed = False
+
+    def publish(self, image, boxes):
+        """输出一帧：boxes为变化的矩形列表，None表示整帧变化"""
+        if self.failed:
+            return
+        try:
+            start = time.perf_counter()
+            data = self.encode(image, boxes)
+            encoded = time.perf_counter()
+            self.write(data, image, boxes)
+            end = time.perf_counter()
+        except OSError as e:
+            print(f"警告: 帧输出{self.name}失败，已停用: {e}")
+            self.failed = True
+            return
+        self.frames += 1
+        self.last_encode_ms = (encoded - start) * 1000
+        self.last_write_ms = (end - encoded) * 1000
+        self.total_encode_ms += self.last_encode_ms
+        self.total_write_ms += self.last_write_ms
+        if PROFILER.enabled:
+            PROFILER.record(f"{self.name}_encode", start, encoded)
+            PROFILER.record(f"{self.name}_write", encoded, end)
+
+    def encode(self, image, boxes):
+        raise NotImplementedError
+
+    def write(self, data, image, boxes):
+        raise NotImplementedError
+
+    def close(self):
+        """释放输出占用的资源"""
+
+    def stats(self):
+        """返回输出帧数和平均/最近一次编码、写入耗时（毫秒）"""
+        frames = max(self.frames, 1)
+        return {
+            "frames": self.frames,
+            "last_encode_ms": self.last_encode_ms,
+            "last_write_ms": self.last_write_ms,
+            "mean_encode_ms": self.total_encode_ms / frames,
+            "mean_write_ms": self.total_write_ms / frames,
+        }
+
+
+class PngFileSink(FrameSink):
+    """PNG文件输出（供OBS等作为图片源）：只在帧变化时写入，先写临时文件再替换，读取方不会读到半个文件"""
+
+    name = "png"
+
+    def __init__(self, path, compress_level=FRAME_PNG_COMPRESS_LEVEL):
+        super().__init__()
+        self.path = path
+        self.compress_level = compress_level
+
+    def encode(self, image, boxes):
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG", compress_level=self.compress_level)
+        return buffer.getvalue()
+
+    def write(self, data, image, boxes):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+
+class SharedMemorySink(FrameSink):
+    """内存映射的RGBA帧缓冲区：固定布局（FRAME_BUFFER_HEADER + 宽*高*4字节像素），只写入变化的区域
+
+    写入前帧序号加一变为奇数，写完再加一变为偶数；读取方在序号为偶数且读取前后一致时得到完整的帧
+    """
+
+    name = "shm"
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.file = None
+        self.buffer = None
+        self.size = None
+        self.sequence = 0
+
+    def open(self, size):
+        """按帧尺寸创建（或重建）映射文件并写入文件头"""
+        self.close()
+        width, height = size
+        self.file = open(self.path, "w+b")
+        self.file.truncate(FRAME_BUFFER_HEADER.size + width * height * 4)
+        self.buffer = mmap.mmap(self.file.fileno(), 0)
+        self.size = size
+        self.write_header()
+
+    def write_header(self):
+        width, height = self.size
+        self.buffer[:FRAME_BUFFER_HEADER.size] = FRAME_BUFFER_HEADER.pack(
+            FRAME_BUFFER_MAGIC, FRAME_BUFFER_VERSION, width, height, width * 4, self.sequence)
+
+    def encode(self, image, boxes):
+        # 尺寸变化时整帧写入
+        if image.size != self.size:
+            self.open(image.size)
+            boxes = None
+        if boxes is None:
+            return [((0, 0) + image.size, image.tobytes())]
+        width, height = image.size
+        tiles = []
+        for box in boxes:
+            box = (max(0, box[0]), max(0, box[1]), min(width, box[2]), min(height, box[3]))
+            if box[0] < box[2] and box[1] < box[3]:
+                tiles.append((box, image.crop(box).tobytes()))
+        return tiles
+
+    def write(self, tiles, image, boxes):
+        stride = self.size[0] * 4
+        self.sequence += 1
+        self.write_header()
+        for (x0, y0, x1, y1), data in tiles:
+            row_bytes = (x1 - x0) * 4
+            if row_bytes == stride:
+                # 整行连续，一次复制
+                offset = FRAME_BUFFER_HEADER.size + y0 * stride
+                self.buffer[offset:offset + len(data)] = data
+                continue
+            view = memoryview(data)
+            for row in range(y1 - y0):
+                offset = FRAME_BUFFER_HEADER.size + (y0 + row) * stride + x0 * 4
+                self.buffer[offset:offset + row_bytes] = view[row * row_bytes:(row + 1) * row_bytes]
+        self.sequence += 1
+        self.write_header()
+
+    def close(self):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.size = None
+
+
+def create_frame_sinks(png_path=None, shm_path=None):
+    """按命令行参数创建帧输出"""
+    sinks = []
+    if png_path:
+        sinks.append(PngFileSink(png_path))
+    if shm_path:
+        sinks.append(SharedMemorySink(shm_path))
+    return sinks
+
+
+class ControlServer:
+    """本地控制接口：在后台线程的asyncio事件循环中提供HTTP和WebSocket服务
+
+    收到的指令放入队列，由Tk线程调用drain()取出执行（与界面按钮走同一渲染路径），执行结果通过Future返回；
+    Tk线程调用publish()发布新状态后推送给所有WebSocket订阅者。
+
+    HTTP:      GET /state                    返回{"version": 版本号, "state": 计分板状态}
+               POST /mutate                  请求体为一条指令或指令列表，返回执行后的状态
+    WebSocket: GET /ws                       连接后推送{"type": "state", ...}，发送的每条消息为一条指令或指令列表
+
+    为防止浏览器中打开的其他网页修改计分板：带Origin头且不是本机来源的请求（含WebSocket握手）返回403，
+    POST的Content-Type必须为application/json（网页无法跨域发送该类型的简单请求）
+    """
+
+    WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+    STATUS_TEXT = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+                   413: "Payload Too Large", 500: "Internal Server Error"}
+    LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+    def __init__(self, host=CONTROL_HOST, port=CONTROL_PORT):
+        self.host = host
+        self.port = port  # 为0时由系统分配，start()后为实际端口
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.commands = deque()  # (指令列表, Future)
+        self.subscribers = set()  # WebSocket连接的writer
+        self.snapshot = {"version": 0, "state": {}}
+        self.requests = 0  # 收到的指令请求数
+        self._ready = threading.Event()
+        self._error = None
+
+    # ---------------- Tk线程调用 ----------------
+
+    def start(self):
+        """启动后台线程并等待端口监听成功，返回实际端口"""
+        self.thread = threading.Thread(target=self._run, name="ControlServer", daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.port
+
+    def stop(self):
+        """关闭服务并结束后台线程"""
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=1)
+
+    def drain(self):
+        """取出所有待执行的指令：[(指令列表, Future), ...]"""
+        commands = []
+        while self.commands:
+            commands.append(self.commands.popleft())
+        return commands
+
+    def publish(self, state, version):
+        """发布新的计分板状态并推送给订阅者"""
+        snapshot = {"version": version, "state": state}
+        self.snapshot = snapshot
+        if self.loop is not None:
+            message = json.dumps(dict(snapshot, type="state"), ensure_ascii=False).encode("utf-8")
+            self.loop.call_soon_threadsafe(self._broadcast, message)
+
+    # ---------------- 后台线程 ----------------
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self.handle_client, self.host, self.port))
+            self.port = self.server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            for writer in list(self.subscribers):
+                writer.close()
+            # 结束仍在处理中的连接，避免事件循环关闭后再执行它们的清理代码
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.close()
+
+    async def submit(self, payload):
+        """校验指令并交给Tk线程执行，返回执行后的状态快照"""
+        mutations = payload if isinstance(payload, list) else [payload]
+        mutations = [validate_mutation(mutation) for mutation in mutations]
+        future = futures.Future()
+        self.requests += 1
+        self.commands.append((mutations, future))
+        return await asyncio.wrap_future(future)
+
+    async def handle_client(self, reader, writer):
+        """处理一个连接：支持HTTP keep-alive，收到WebSocket升级请求时转为WebSocket"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                path = target.split("?", 1)[0]
+                if not self.local_origin(headers.get("origin")):
+                    self.send_response(writer, 403, {"ok": False, "error": "只接受本机网页的请求"}, False)
+                    await writer.drain()
+                    break
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(reader, writer, headers)
+                    return
+
+                length = int(headers.get("content-length") or 0)
+                if length > CONTROL_MAX_BODY:
+                    self.send_response(writer, 413, {"ok": False, "error": "请求体过大"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.handle_http(method, path, body, headers.get("content-type", ""))
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self.send_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # stop()时取消仍在处理中的连接，正常结束即可
+            pass
+        finally:
+            writer.close()
+
+    @classmethod
+    def local_origin(cls, origin):
+        """请求的Origin头是否可以接受：没有Origin（非浏览器客户端）或来自本机的网页"""
+        if origin is None:
+            return True
+        try:
+            return urllib.parse.urlsplit(origin).hostname in cls.LOCAL_HOSTS
+        except ValueError:
+            return False
+
+    async def handle_http(self, method, path, body, content_type=""):
+        """处理HTTP请求，返回(状态码, JSON对象)"""
+        if path == "/state":
+            if method != "GET":
+                return 405, {"ok": False, "error": "只支持GET"}
+            return 200, self.snapshot
+        if path == "/mutate":
+            if method != "POST":
+                return 405, {"ok": False, "error": "只支持POST"}
+            if content_type.split(";", 1)[0].strip().lower() != "application/json":
+                return 403, {"ok": False, "error": "Content-Type必须为application/json"}
+            try:
+                snapshot = await self.submit(json.loads(body.decode("utf-8")))
+            except ValueError as e:
+                return 400, {"ok": False, "error": str(e)}
+            except Exception as e:
+                return 500, {"ok": False, "error": str(e)}
+            return 200, dict(snapshot, ok=True)
+        return 404, {"ok": False, "error": "未知的路径"}
+
+    def send_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {self.STATUS_TEXT[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+    async def handle_websocket(self, reader, writer, headers):
+        """完成WebSocket握手，推送当前状态，并执行客户端发送的指令"""
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + self.WEBSOCKET_GUID).encode("latin-1")).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        writer.write(self.encode_frame(0x1, json.dumps(dict(self.snapshot, type="state"),
+                                                       ensure_ascii=False).encode("utf-8")))
+        self.subscribers.add(writer)
+        try:
+            while True:
+                try:
+                    opcode, data = await self.read_message(reader, writer)
+                except ValueError:
+                    # 协议错误（1002）：关闭连接
+                    writer.write(self.encode_frame(0x8, struct.pack(">H", 1002)))
+                    break
+                if opcode == 0x8:  # 关闭
+                    writer.write(self.encode_frame(0x8, data[:2]))
+                    break
+                if opcode != 0x1:
+                    continue
+                request_id = None
+                try:
+                    payload = json.loads(data.decode("utf-8"))
+                    request_id = payload.get("id") if isinstance(payload, dict) else None
+                    await self.submit(payload.get("mutations", payload) if isinstance(payload, dict) else payload)
+                    result = {"type": "result", "ok": True, "id": request_id}
+                except Exception as e:
+                    result = {"type": "result", "ok": False, "id": request_id, "error": str(e)}
+                writer.write(self.encode_frame(0x1, json.dumps(result, ensure_ascii=False).encode("utf-8")))
+                await writer.drain()
+        finally:
+            self.subscribers.discard(writer)
+
+    async def read_message(self, reader, writer):
+        """读取一条完整的客户端消息（合并分片帧，期间收到的ping直接回复），返回(操作码, 数据)
+
+        协议错误（续帧没有起始帧、分片未结束又开始新消息、控制帧分片、消息过大）时抛出ValueError
+        """
+        opcode = None
+        fragments = []
+        size = 0
+        while True:
+            fin, frame_opcode, data = await self.read_frame(reader)
+            if frame_opcode & 0x8:
+                # 控制帧不能分片，但可以插在数据消息的分片之间
+                if not fin:
+                    raise ValueError("WebSocket控制帧不能分片")
+                if frame_opcode == 0x9:  # ping
+                    writer.write(self.encode_frame(0xA, data))
+                    continue
+                if frame_opcode == 0x8:  # 关闭
+                    return frame_opcode, data
+                continue
+            if frame_opcode == 0x0:
+                if opcode is None:
+                    raise ValueError("收到没有起始帧的WebSocket续帧")
+            elif opcode is not None:
+                raise ValueError("WebSocket分片消息尚未结束")
+            else:
+                opcode = frame_opcode
+            size += len(data)
+            if size > CONTROL_MAX_BODY:
+                raise ValueError("WebSocket消息过大")
+            fragments.append(data)
+            if fin:
+                return opcode, b"".join(fragments)
+
+    @staticmethod
+    async def read_frame(reader):
+        """读取一个客户端WebSocket帧，返回(是否为最后一帧, 操作码, 去掉掩码后的数据)"""
+        head = await reader.readexactly(2)
+        fin = bool(head[0] & 0x80)
+        opcode = head[0] & 0x0F
+        length = head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", await reader.readexactly(8))[0]
+        if length > CONTROL_MAX_BODY:
+            raise ValueError("WebSocket消息过大")
+        if not head[1] & 0x80:
+            raise ValueError("客户端WebSocket帧必须加掩码")
+        mask = await reader.readexactly(4)
+        data = await reader.readexactly(length)
+        # 把掩码重复到数据长度，作为整数一次异或
+        key = (mask * (length // 4 + 1))[:length]
+        data = (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+        return fin, opcode, data
+
+    @staticmethod
+    def encode_frame(opcode, data):
+        """编码服务端WebSocket帧（不加掩码）"""
+        length = len(data)
+        if length < 126:
+            head = struct.pack(">BB", 0x80 | opcode, length)
+        elif length < 65536:
+            head = struct.pack(">BBH", 0x80 | opcode, 126, length)
+        else:
+            head = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+        return head + data
+
+    def _broadcast(self, message):
+        """把状态推送给所有订阅者，发送缓冲区积压过多的订阅者直接断开"""
+        frame = self.encode_frame(0x1, message)
+        for writer in list(self.subscribers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > CONTROL_MAX_BUFFER:
+                self.subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(frame)
+
+
+def create_placeholder_image(width, height, message):
+    """创建带提示文字的透明占位背景（找不到背景图片或加载失败时使用）"""
+    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    draw.text((width // 2, height // 2), message, font=FONT_CACHE.get_default(), fill=(255, 0, 0))
+    return image
+
+
+class ScoreboardRenderer:
+    """无界面计分板渲染器：根据计分板状态在背景上绘制文字，输出PIL图片或RGBA原始数据，不依赖Tk"""
+
+    # 状态字段及其变化时需要重绘的元素
+    FIELD_ELEMENTS = {
+        "left_text": ("left_name",),
+        "right_text": ("right_name",),
+        "left_score": ("left_score",),
+        "right_score": ("right_score",),
+        "font_size": ("left_name", "right_name", "left_score", "right_score"),
+        "bout_number": ("bout",),
+        "left_region": ("left_name",),
+        "right_region": ("right_name",),
+        "left_score_region": ("left_score",),
+        "right_score_region": ("right_score",),
+        "bout_region_offset_x": ("bout",),
+        "bout_region_offset_y": ("bout",),
+        "font_path": RENDER_ELEMENTS,
+        "font_index": RENDER_ELEMENTS,
+        "left_color": ("left_name", "left_score"),
+        "right_color": ("right_name", "right_score"),
+        "outline_color": ("left_name", "right_name", "left_score", "right_score"),
+    }
+
+    def __init__(self, background, left_text="", right_text="", left_score=0, right_score=0,
+                 font_size=50, bout_number=0,
+                 left_region=LEFT_PARALLELOGRAM, right_region=RIGHT_PARALLELOGRAM,
+                 left_score_region=LEFT_SCORE_REGION, right_score_region=RIGHT_SCORE_REGION,
+                 bout_region_offset_x=BOUT_REGION_OFFSET_X, bout_region_offset_y=BOUT_REGION_OFFSET_Y,
+                 font_path=None, left_color=LEFT_COLOR, right_color=RIGHT_COLOR, outline_color=WHITEISH_COLOR,
+                 font_index=0):
+        self.background = background
+        self.left_text = left_text
+        self.right_text = right_text
+        self.left_score = left_score
+        self.right_score = right_score
+        self.font_size = font_size
+        self.bout_number = bout_number
+        self.left_region = left_region
+        self.right_region = right_region
+        self.left_score_region = left_score_region
+        self.right_score_region = right_score_region
+        self.bout_region_offset_x = bout_region_offset_x
+        self.bout_region_offset_y = bout_region_offset_y
+        self.font_path = font_path
+        self.font_index = font_index  # TTC/OTC字体集合中的字体索引
+
+        # 颜色配置
+        self.left_color = left_color
+        self.right_color = right_color
+        self.outline_color = outline_color
+
+        # 双缓冲：image为已完成的前台帧，新帧总是绘制在后台缓冲区，完成后再交换
+        self.image = None
+        self.back_image = None
+        self.back_stale_boxes = None  # 后台缓冲区落后于前台帧的区域，None表示需要整体同步
+        self.layouts = {}  # 各元素最近一次绘制的布局
+        self.dirty_elements = set()
+        self.full_redraw = True
+        self.checked_font_path = object()  # 尚未检查过的字体路径
+        self.usable_font_path = None
+        self.sinks = []  # 帧输出（PNG文件、共享内存等）
+        self.frame_measurements = 0  # 最近一帧实际测量文字的次数
+        self.measurements = 0  # 累计测量次数
+
+    def update(self, **fields):
+        """更新状态字段，返回需要重绘的元素集合"""
+        changed = set()
+        for name, value in fields.items():
+            if name not in self.FIELD_ELEMENTS:
+                raise ValueError(f"未知的计分板字段: {name}")
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed.update(self.FIELD_ELEMENTS[name])
+        self.dirty_elements |= changed
+        return changed
+
+    def set_background(self, background):
+        """更换背景图片，下次渲染时整帧重绘"""
+        self.background = background
+        self.invalidate()
+
+    def invalidate(self):
+        """标记下次渲染整帧重绘"""
+        self.full_redraw = True
+
+    def render(self, publish=True):
+        """渲染所有待更新的元素，返回变化的矩形列表，整帧重绘时返回None
+
+        publish为False时不输出到帧输出，由调用方在帧确定交付后调用publish_frame()
+        """
+        measured = TEXT_METRICS.thread_misses()
+        with PROFILER.stage("frame"):
+            boxes = self.render_elements()
+        self.frame_measurements = TEXT_METRICS.thread_misses() - measured
+        self.measurements += self.frame_measurements
+        if publish:
+            self.publish_frame(boxes)
+        return boxes
+
+    def publish_frame(self, boxes):
+        """把当前帧输出到所有帧输出，boxes为变化的矩形列表（None表示整帧变化，空列表时不输出）"""
+        if self.sinks and boxes != []:
+            for sink in self.sinks:
+                sink.publish(self.image, boxes)
+
+    def add_sink(self, sink):
+        """添加帧输出，已有渲染结果时立即输出当前帧"""
+        self.sinks.append(sink)
+        if self.image is not None:
+            sink.publish(self.image, None)
+
+    def render_elements(self):
+        """render()的实际实现"""
+        # 如果找不到指定字体，使用系统默认字体（每个字体路径只检查一次）
+        if self.font_path != self.checked_font_path:
+            self.checked_font_path = self.font_path
+            self.usable_font_path = self.font_path if FONT_INDEX.exists(self.font_path) else None
+            if self.usable_font_path is None:
+                print("警告: 未找到黑体字体，使用默认字体")
+        font_path = self.usable_font_path
+
+        if self.full_redraw or self.image is None or self.image.size != self.background.size:
+            # 整帧重绘：从原始背景复制并绘制所有元素
+            self.layouts = {}
+            for name in RENDER_ELEMENTS:
+                self.layouts[name] = self.layout_element(name, font_path)
+
+            with PROFILER.stage("background_copy"):
+                frame = self.background.copy()
+            draw = ImageDraw.Draw(frame)
+            for layout in self.layouts.values():
+                if layout:
+                    self.draw_layout(frame, draw, layout)
+            self.swap_buffers(frame, None)
+            self.full_redraw = False
+            self.dirty_elements.clear()
+            return None
+
+        # 没有需要重绘的元素时跳过整帧
+        if not self.dirty_elements:
+            return []
+
+        # 增量重绘：只恢复并重绘变化元素的新旧包围盒
+        dirty_boxes = []
+        for name in self.dirty_elements:
+            old_layout = self.layouts.get(name)
+            new_layout = self.layout_element(name, font_path)
+            self.layouts[name] = new_layout
+            for layout in (old_layout, new_layout):
+                if layout:
+                    dirty_boxes.append(layout[6])
+        self.dirty_elements.clear()
+
+        # 先把后台缓冲区同步到前台帧，再在其上绘制变化区域
+        with PROFILER.stage("background_copy"):
+            frame = self.back_image
+            if frame is None or self.back_stale_boxes is None or frame.size != self.image.size:
+                frame = self.image.copy()
+            else:
+                for box in self.back_stale_boxes:
+                    frame.paste(self.image.crop(box), box[:2])
+
+        boxes = merge_boxes(dirty_boxes)
+        for box in boxes:
+            layouts = [layout for layout in self.layouts.values() if layout and boxes_intersect(layout[6], box)]
+            # 直接绘制的文字在区域内的坐标必须与整帧绘制时同号，否则Pillow对小数坐标的取整不同，
+            # 因此区域向左上扩展到这些文字（含描边偏移）的绘制原点（只影响没有精灵的名称和赛制文字）
+            left = min([box[0]] + [max(0, math.floor(layout[2] - OUTLINE_WIDTH)) for layout in layouts if layout[7] is None])
+            top = min([box[1]] + [max(0, math.floor(layout[3] - OUTLINE_WIDTH)) for layout in layouts if layout[7] is None])
+            with PROFILER.stage("background_copy"):
+                tile = self.background.crop((left, top, box[2], box[3]))
+            draw = ImageDraw.Draw(tile)
+            # 重绘与该区域相交的所有元素（坐标平移到区域内）
+            for layout in layouts:
+                self.draw_layout(tile, draw, layout, left, top)
+            if (left, top) != box[:2]:
+                tile = tile.crop((box[0] - left, box[1] - top, box[2] - left, box[3] - top))
+            frame.paste(tile, box[:2])
+        self.swap_buffers(frame, boxes)
+        return boxes
+
+    def swap_buffers(self, frame, boxes):
+        """将绘制完成的帧切换为前台帧，旧前台帧成为后台缓冲区"""
+        self.back_image = self.image
+        self.image = frame
+        self.back_stale_boxes = boxes
+
+    def take_frame(self, boxes):
+        """复制出可交给其他线程使用的帧：整帧为("full", 图片)，增量为("tiles", [(矩形, 图块)])"""
+        with PROFILER.stage("take_frame"):
+            if boxes is None:
+                return "full", self.image.copy()
+            return "tiles", [(box, self.image.crop(box)) for box in boxes]
+
+    def render_image(self):
+        """渲染并返回当前完整帧（PIL RGBA图片）"""
+        self.render()
+        return self.image
+
+    def tobytes(self):
+        """渲染并返回当前完整帧的RGBA原始数据"""
+        return self.render_image().tobytes()
+
+    def layout_element(self, name, font_path):
+        """计算元素的文字、字体、位置、颜色、包围盒和精灵，元素不显示时返回None"""
+
+        def get_fitted_font(text, region):
+            x_min, y_min, x_max, y_max = region
+            size = FIT_CACHE.fit(text, x_max - x_min, self.font_size, font_path, self.font_index)
+            return FONT_CACHE.get(font_path, size, self.font_index)
+
+        if name == "bout":
+            # 绘制赛制显示（如果有设置）
+            if self.bout_number <= 0:
+                return None
+            text = f"BO{self.bout_number}"
+            img_width, img_height = self.background.size
+            center_x = img_width // 2 + self.bout_region_offset_x
+            center_y = img_height // 2 + self.bout_region_offset_y
+
+            # 确定字体大小（使用新的默认值60）
+            bout_font_size = min(BOUT_DEFAULT_FONT_SIZE, 200)  # 限制最大大小
+            if font_path:
+                font = FONT_CACHE.get(font_path, bout_font_size, self.font_index)
+            else:
+                # 使用系统默认字体（Arial加载失败时缓存会回退到默认字体）
+                font = FONT_CACHE.get("Arial", bout_font_size)
+
+            # 计算文本包围盒和位置（淡灰色字体黑色描边）
+            bbox, width, height = TEXT_METRICS.measure(text, font)
+            x = center_x - width // 2
+            y = center_y - height // 2
+            outline_color, fill_color = BOUT_OUTLINE_COLOR, BOUT_TEXT_COLOR
+        else:
+            # 名称和分数：左侧红色、右侧蓝色，居中显示在各自区域
+            if name == "left_name":
+                text, region, fill_color = self.left_text, self.left_region, self.left_color
+            elif name == "right_name":
+                text, region, fill_color = self.right_text, self.right_region, self.right_color
+            elif name == "left_score":
+                text, region, fill_color = str(self.left_score), self.left_score_region, self.left_color
+            else:
+                text, region, fill_color = str(self.right_score), self.right_score_region, self.right_color
+            if not text or not region:
+                return None
+
+            x_min, y_min, x_max, y_max = region
+            center_x = (x_min + x_max) / 2
+            center_y = (y_min + y_max) / 2
+            font = get_fitted_font(text, region)
+            outline_color = self.outline_color
+
+            if name in ("left_score", "right_score"):
+                # 分数直接使用图集中预渲染的精灵，无需逐帧绘制描边
+                sprite, x, y = SCORE_ATLAS.get(text, font, (center_x, center_y))
+                width, height = sprite[0].size
+                box = self.clip_box((x, y, x + width, y + height))
+                return text, font, x, y, outline_color, fill_color, box, sprite
+
+            bbox, width, height = TEXT_METRICS.measure(text, font)
+            x = center_x - width / 2
+            y = center_y - height / 2
+
+        if SMOOTH_FACTOR > 1:
+            # 超采样：使用缓存的抗锯齿图层，与分数精灵一样按颜色绘制
+            sprite, x, y = TEXT_LAYER_CACHE.get(text, font, x, y)
+            width, height = sprite[0].size
+            box = self.clip_box((x, y, x + width, y + height))
+            return text, font, x, y, outline_color, fill_color, box, sprite
+
+        # 包围盒包含描边宽度
+        box = self.clip_box((math.floor(x + bbox[0]) - OUTLINE_WIDTH,
+                             math.floor(y + bbox[1]) - OUTLINE_WIDTH,
+                             math.ceil(x + bbox[2]) + OUTLINE_WIDTH + 1,
+                             math.ceil(y + bbox[3]) + OUTLINE_WIDTH + 1))
+        return text, font, x, y, outline_color, fill_color, box, None
+
+    def clip_box(self, box):
+        """将包围盒限制在图片范围内，完全超出时返回空矩形"""
+        img_width, img_height = self.background.size
+        box = (max(0, box[0]), max(0, box[1]), min(img_width, box[2]), min(img_height, box[3]))
+        if box[0] >= box[2] or box[1] >= box[3]:
+            return 0, 0, 0, 0
+        return box
+
+    @staticmethod
+    def draw_layout(image, draw, layout, offset_x=0, offset_y=0):
+        """按布局绘制单个元素，offset为目标图片相对整张背景的左上角坐标"""
+        text, font, x, y, outline_color, fill_color, box, sprite = layout
+        with PROFILER.stage("outline"):
+            if sprite is not None:
+                blit_sprite(image, sprite, x - offset_x, y - offset_y, outline_color, fill_color)
+            else:
+                draw_outlined_text(draw, x - offset_x, y - offset_y, text, font, outline_color, fill_color)
+
+
+class BoardState:
+    """不可变的计分板状态快照：字段与ScoreboardRenderer.FIELD_ELEMENTS相同，带单调递增的版本号
+
+    修改通过replace()得到新对象（没有实际变化时返回原对象），diff()给出与另一快照不同的字段
+    """
+
+    FIELDS = tuple(ScoreboardRenderer.FIELD_ELEMENTS)
+    DEFAULTS = {
+        "left_text": "", "right_text": "", "left_score": 0, "right_score": 0,
+        "font_size": 50, "bout_number": 0,
+        "left_region": LEFT_PARALLELOGRAM, "right_region": RIGHT_PARALLELOGRAM,
+        "left_score_region": LEFT_SCORE_REGION, "right_score_region": RIGHT_SCORE_REGION,
+        "bout_region_offset_x": BOUT_REGION_OFFSET_X, "bout_region_offset_y": BOUT_REGION_OFFSET_Y,
+        "font_path": None, "font_index": 0, "left_color": LEFT_COLOR, "right_color": RIGHT_COLOR, "outline_color": WHITEISH_COLOR,
+    }
+    __slots__ = FIELDS + ("version",)
+
+    def __init__(self, version=0, **fields):
+        unknown = set(fields) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"未知的计分板字段: {'、'.join(sorted(unknown))}")
+        for field in self.FIELDS:
+            object.__setattr__(self, field, fields.get(field, self.DEFAULTS[field]))
+        object.__setattr__(self, "version", version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("BoardState不可修改，请使用replace()")
+
+    def replace(self, **changes):
+        """返回修改了指定字段、版本号加一的新状态，没有实际变化时返回自身"""
+        changes = {field: value for field, value in changes.items() if getattr(self, field) != value}
+        if not changes:
+            return self
+        return BoardState(self.version + 1, **{**self.as_dict(), **changes})
+
+    def diff(self, other):
+        """返回与other不同的字段集合，other为None时返回全部字段"""
+        if other is None:
+            return frozenset(self.FIELDS)
+        return frozenset(field for field in self.FIELDS if getattr(self, field) != getattr(other, field))
+
+    def as_dict(self):
+        """返回字段字典（不含版本号）"""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"BoardState(version={self.version}, left={self.left_text!r} {self.left_score}, " \
+               f"right={self.right_text!r} {self.right_score}, bout={self.bout_number})"
+
+
+def board_state_property(field):
+    """把应用的同名属性映射到不可变状态：读取当前状态的字段，赋值时替换为新状态"""
+
+    def get(self):
+        return getattr(self.state, field)
+
+    def set(self, value):
+        state = self.state.replace(**{field: value})
+        if state is self.state:
+            return
+        event_log = getattr(self, "event_log", None)
+        if event_log is not None:
+            event_log.record(field, getattr(self.state, field), value)
+        self.state = state
+
+    return property(get, set, doc=f"当前计分板状态的{field}字段")
+
+
+class EventLog:
+    """固定容量的环形事件日志：每个事件为(时间戳, 操作组, 字段序号, 旧值, 新值)，支持按操作组撤销/重做
+
+    一次界面操作或一批控制指令为一个操作组（同一字段在组内只保留最初的旧值和最终的新值）；
+    容量满时丢弃最旧的整组事件，撤销后有新操作时丢弃可重做的事件
+    """
+
+    def __init__(self, capacity=EVENT_LOG_CAPACITY):
+        if capacity < len(BoardState.FIELDS):
+            raise ValueError(f"事件日志容量不能小于{len(BoardState.FIELDS)}")
+        self.capacity = capacity
+        self._events = [None] * capacity
+        self._start = 0  # 最旧事件在环中的位置
+        self._size = 0  # 环中的事件数
+        self._applied = 0  # 未被撤销的事件数，其后的事件可以重做
+        self._pending = {}  # 当前操作组中尚未提交的修改：字段序号 -> [时间戳, 旧值, 新值]
+        self._group = 0
+
+    def record(self, field, old, new):
+        """记录一次字段修改，提交前属于当前操作组"""
+        index = BoardState.FIELDS.index(field)
+        change = self._pending.get(index)
+        if change is None:
+            self._pending[index] = [time.time(), old, new]
+        else:
+            change[2] = new
+
+    def commit(self):
+        """结束当前操作组（修改后又改回原值的字段不记录）"""
+        changes = [(index, change) for index, change in self._pending.items() if change[1] != change[2]]
+        self._pending = {}
+        if not changes:
+            return
+        self._group += 1
+        self._size = self._applied
+        for index, (timestamp, old, new) in changes:
+            if self._size == self.capacity:
+                self._drop_oldest_group()
+            self._events[(self._start + self._size) % self.capacity] = (timestamp, self._group, index, old, new)
+            self._size += 1
+        self._applied = self._size
+
+    def checkpoint(self):
+        """返回当前操作组中尚未提交的修改的副本，供discard()回滚到此处"""
+        return {index: list(change) for index, change in self._pending.items()}
+
+    def discard(self, checkpoint=None):
+        """丢弃当前操作组中尚未提交的修改（批量更新失败回滚时），checkpoint之前的修改保留"""
+        self._pending = checkpoint if checkpoint is not None else {}
+
+    def _drop_oldest_group(self):
+        group = self._events[self._start][1]
+        while self._size and self._events[self._start][1] == group:
+            self._events[self._start] = None
+            self._start = (self._start + 1) % self.capacity
+            self._size -= 1
+            self._applied -= 1
+
+    def _event(self, position):
+        """返回第position个事件(时间戳, 操作组, 字段名, 旧值, 新值)"""
+        timestamp, group, index, old, new = self._events[(self._start + position) % self.capacity]
+        return timestamp, group, BoardState.FIELDS[index], old, new
+
+    def undo(self):
+        """撤销最近一个操作组，返回其中的事件（按发生顺序），没有可撤销的操作时返回空列表"""
+        if not self._applied:
+            return []
+        group = self._event(self._applied - 1)[1]
+        events = []
+        while self._applied and self._event(self._applied - 1)[1] == group:
+            self._applied -= 1
+            events.append(self._event(self._applied))
+        events.reverse()
+        return events
+
+    def redo(self, steps=1):
+        """重做steps个已撤销的操作组（None表示全部），返回其中的事件（按发生顺序）"""
+        events = []
+        while self._applied < self._size and (steps is None or steps > 0):
+            group = self._event(self._applied)[1]
+            while self._applied < self._size and self._event(self._applied)[1] == group:
+                events.append(self._event(self._applied))
+                self._applied += 1
+            if steps is not None:
+                steps -= 1
+        return events
+
+    def applied_events(self):
+        """返回所有未被撤销的事件（按发生顺序）"""
+        return [self._event(position) for position in range(self._applied)]
+
+    def export(self, path, state, image_path=None):
+        """把会话导出为JSON（先写临时文件再替换）：日志中最早事件之前的状态、背景路径和所有未被撤销的事件"""
+        events = self.applied_events()
+        initial = state
+        for _, _, field, old, _ in reversed(events):
+            initial = initial.replace(**{field: old})
+        session = {
+            "format": SESSION_FORMAT_VERSION,
+            "image_path": image_path,
+            "initial": initial.as_dict(),
+            "events": [list(event) for event in events],
+        }
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(session, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return len(events)
+
+    def stats(self):
+        """返回事件数、未撤销的事件数和容量"""
+        return {"events": self._size, "applied": self._applied, "capacity": self.capacity}
+
+
+def session_value(value):
+    """JSON中的区域列表还原为元组"""
+    return tuple(value) if isinstance(value, list) else value
+
+
+def load_session(path):
+    """读取导出的会话，返回(初始状态, 背景路径, [(时间戳, {字段: 新值})])，每个操作组一项"""
+    with open(path, encoding="utf-8") as f:
+        session = json.load(f)
+    if session.get("format") != SESSION_FORMAT_VERSION:
+        raise ValueError(f"不支持的会话文件格式: {session.get('format')}")
+    initial = BoardState(**{field: session_value(value) for field, value in session["initial"].items()})
+    groups = []
+    last_group = None
+    for timestamp, group, field, old, new in session["events"]:
+        if group != last_group:
+            groups.append((timestamp, {}))
+            last_group = group
+        groups[-1][1][field] = session_value(new)
+    return initial, session.get("image_path"), groups
+
+
+def replay_session(path, background=None):
+    """无界面按最快速度回放会话：每个操作组渲染一帧，返回(渲染器, 每帧耗时毫秒列表)"""
+    state, image_path, groups = load_session(path)
+    if background is None:
+        if image_path and os.path.exists(image_path):
+            background = BACKGROUND_CACHE.open(image_path)
+        else:
+            background = create_placeholder_image(1920, 1080, "未找到背景图片")
+    renderer = ScoreboardRenderer(background, **state.as_dict())
+    renderer.render()
+    samples = []
+    for _, changes in groups:
+        start = time.perf_counter()
+        renderer.update(**changes)
+        boxes = renderer.render()
+        renderer.take_frame(boxes)
+        samples.append((time.perf_counter() - start) * 1000)
+    return renderer, samples
+
+
+# 预设中保存的配置项（与TransparentScoreboardApp的参数同名）
+PRESET_FIELDS = (
+    "left_text", "right_text", "left_score", "right_score", "font_size", "bout_number", "image_path",
+    "left_parallelogram", "right_parallelogram", "left_score_region", "right_score_region",
+    "bout_region_offset_x", "bout_region_offset_y",
+)
+
+# 区域类配置项（JSON中保存为列表，读取时转换为元组）
+PRESET_REGION_FIELDS = ("left_parallelogram", "right_parallelogram", "left_score_region", "right_score_region")
+
+
+def default_config():
+    """返回与配置窗口默认值一致的配置"""
+    return {
+        "left_text": "",
+        "right_text": "",
+        "left_score": 0,
+        "right_score": 0,
+        "font_size": 50,
+        "bout_number": 0,
+        "image_path": None,
+        "left_parallelogram": LEFT_PARALLELOGRAM,
+        "right_parallelogram": RIGHT_PARALLELOGRAM,
+        "left_score_region": LEFT_SCORE_REGION,
+        "right_score_region": RIGHT_SCORE_REGION,
+        "bout_region_offset_x": BOUT_REGION_OFFSET_X,
+        "bout_region_offset_y": BOUT_REGION_OFFSET_Y,
+    }
+
+
+def parse_config(values):
+    """校验并转换配置值（可以是输入框中的字符串或预设文件中的值），不合法时抛出ValueError"""
+    config = default_config()
+    config.update({field: value for field, value in values.items() if field in PRESET_FIELDS})
+
+    try:
+        config["left_score"] = int(config["left_score"])
+        config["right_score"] = int(config["right_score"])
+    except (TypeError, ValueError):
+        raise ValueError("分数必须为整数")
+
+    try:
+        config["font_size"] = int(config["font_size"])
+        if not (10 <= config["font_size"] <= 200):
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError("字体大小必须在10-200之间")
+
+    # 赛制为空或0时不显示
+    bout = config["bout_number"]
+    if isinstance(bout, str):
+        bout = bout.strip()
+    if bout in ("", "0", None, 0):
+        config["bout_number"] = 0
+    else:
+        try:
+            config["bout_number"] = int(bout)
+            if config["bout_number"] <= 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise ValueError("赛制必须为正整数")
+
+    try:
+        for field in PRESET_REGION_FIELDS:
+            config[field] = tuple(int(value) for value in config[field])
+        config["bout_region_offset_x"] = int(config["bout_region_offset_x"])
+        config["bout_region_offset_y"] = int(config["bout_region_offset_y"])
+    except (TypeError, ValueError):
+        raise ValueError("区域配置必须为整数")
+
+    config["image_path"] = config["image_path"] or None
+    return config
+
+
+def control_int(value, minimum, maximum, message):
+    """校验控制指令中的整数（不接受布尔值和小数）"""
+    if isinstance(value, bool) or not isinstance(value, int) or not (minimum <= value <= maximum):
+        raise ValueError(message)
+    return value
+
+
+def control_text(value):
+    """校验控制指令中的文字"""
+    if not isinstance(value, str):
+        raise ValueError("文字必须为字符串")
+    return value
+
+
+def control_region(value):
+    """校验控制指令中的区域(x1, y1, x2, y2)"""
+    if not isinstance(value, (list, tuple)) or len(value) != 4:
+        raise ValueError("区域必须为4个整数")
+    return tuple(control_int(v, -100000, 100000, "区域配置必须为整数") for v in value)
+
+
+# 控制接口可以修改的计分板字段及其校验函数（与TransparentScoreboardApp的属性同名）
+CONTROL_FIELDS = {
+    "left_text": control_text,
+    "right_text": control_text,
+    "left_score": lambda value: control_int(value, 0, 9999, "分数必须为非负整数"),
+    "right_score": lambda value: control_int(value, 0, 9999, "分数必须为非负整数"),
+    "font_size": lambda value: control_int(value, 10, 200, "字体大小必须在10-200之间"),
+    "bout_number": lambda value: control_int(value, 0, 99, "赛制必须为0-99的整数"),
+    "left_region": control_region,
+    "right_region": control_region,
+    "left_score_region": control_region,
+    "right_score_region": control_region,
+    "bout_region_offset_x": lambda value: control_int(value, -100000, 100000, "区域配置必须为整数"),
+    "bout_region_offset_y": lambda value: control_int(value, -100000, 100000, "区域配置必须为整数"),
+}
+
+
+def validate_mutation(mutation):
+    """校验一条控制指令，返回规范化后的指令，不合法时抛出ValueError
+
+    支持的指令：{"op": "score", "side": "left"/"right", "delta": 整数}
+              {"op": "set", "field": 字段名, "value": 值}
+    """
+    if not isinstance(mutation, dict):
+        raise ValueError("指令必须为JSON对象")
+    op = mutation.get("op")
+    if op == "score":
+        side = mutation.get("side")
+        if side not in ("left", "right"):
+            raise ValueError("side必须为left或right")
+        delta = control_int(mutation.get("delta", 1), -9999, 9999, "delta必须为整数")
+        return {"op": "score", "side": side, "delta": delta}
+    if op == "set":
+        field = mutation.get("field")
+        if field not in CONTROL_FIELDS:
+            raise ValueError(f"未知的计分板字段: {field}")
+        return {"op": "set", "field": field, "value": CONTROL_FIELDS[field](mutation.get("value"))}
+    raise ValueError(f"未知的指令: {op}")
+
+
+def load_presets(path=None):
+    """读取预设文件，返回{"last": 上次使用的配置或None, "presets": {名称: 配置}}，无效的配置会被跳过"""
+    path = path or CONFIG_FILE
+    presets = {"last": None, "presets": {}}
+    if not os.path.exists(path):
+        return presets
+    try:
+        with open(path, encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"警告: 无法读取预设文件 {path}: {e}")
+        return presets
+
+    def parse_stored(name, values):
+        try:
+            return parse_config(values)
+        except (AttributeError, ValueError) as e:
+            print(f"警告: 预设 {name} 无效: {e}")
+            return None
+
+    if stored.get("last"):
+        presets["last"] = parse_stored("上次配置", stored["last"])
+    for name, values in stored.get("presets", {}).items():
+        config = parse_stored(name, values)
+        if config is not None:
+            presets["presets"][name] = config
+    return presets
+
+
+def save_presets(presets, path=None):
+    """保存预设文件：先写入临时文件再替换，避免写入中断时损坏原文件"""
+    path = path or CONFIG_FILE
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(presets, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"警告: 无法保存预设文件 {path}: {e}")
+
+
+def prerender_first_frame(config):
+    """按配置解码背景并渲染首帧（可在创建Tk窗口的同时在后台线程中执行），失败时返回None"""
+    try:
+        image_path = config["image_path"] or find_image_path()
+        with STARTUP_PROFILER.stage("font_discovery"):
+            font_path, font_index = find_font_path(config["left_text"] + config["right_text"])
+        if not image_path or not os.path.exists(image_path):
+            background = create_placeholder_image(1920, 1080, "未找到背景图片")
+        else:
+            with STARTUP_PROFILER.stage("image_decode"):
+                background = TEMPLATE_INDEX.open(image_path)
+        renderer = ScoreboardRenderer(
+            background, config["left_text"], config["right_text"],
+            config["left_score"], config["right_score"], config["font_size"], config["bout_number"],
+            config["left_parallelogram"], config["right_parallelogram"],
+            config["left_score_region"], config["right_score_region"],
+            config["bout_region_offset_x"], config["bout_region_offset_y"],
+            font_path=font_path, font_index=font_index,
+        )
+        renderer.render()
+        return renderer
+    except Exception as e:
+        print(f"警告: 无法预渲染首帧: {e}")
+        return None
+
+
+class TemplatePicker:
+    """模板选择对话框：以缩略图列出UI文件夹中的模板，也可以浏览其他图片"""
+
+    def __init__(self, root, on_select, current_path=None, title="选择背景图片"):
+        self.on_select = on_select
+        self.dialog = tk.Toplevel(root)
+        self.dialog.title(title)
+        self.dialog.geometry("400x500")
+        self.dialog.transient(root)
+        self.dialog.grab_set()
+        self.photos = []  # 保留缩略图引用，避免被回收
+
+        # 可滚动的缩略图列表
+        list_frame = tk.Frame(self.dialog)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        canvas = tk.Canvas(list_frame, highlightthickness=0)
+        scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL, command=canvas.yview)
+        canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        inner = tk.Frame(canvas)
+        canvas.create_window((0, 0), window=inner, anchor="nw")
+        inner.bind("<Configure>", lambda event: canvas.configure(scrollregion=canvas.bbox("all")))
+
+        current = os.path.normcase(os.path.abspath(current_path)) if current_path else None
+        for entry, thumbnail in TEMPLATE_INDEX.thumbnails():
+            photo = ImageTk.PhotoImage(thumbnail)
+            self.photos.append(photo)
+            selected = os.path.normcase(os.path.abspath(entry["path"])) == current
+            tk.Button(inner, image=photo, text=f"{entry['name']} ({entry['width']}x{entry['height']})",
+                      compound=tk.TOP, font=("黑体", 10), relief=tk.SUNKEN if selected else tk.RAISED,
+                      command=lambda path=entry["path"]: self.select(path)).pack(fill=tk.X, pady=2)
+        if not self.photos:
+            tk.Label(inner, text=f"{CUSTOM_IMAGE_FOLDER}文件夹中没有模板", font=("黑体", 12), fg="gray").pack(pady=20)
+
+        button_frame = tk.Frame(self.dialog)
+        button_frame.pack(pady=10)
+        tk.Button(button_frame, text="其他图片...", command=self.browse, width=10,
+                  font=("黑体", 12)).pack(side=tk.LEFT, padx=10)
+        tk.Button(button_frame, text="取消", command=self.dialog.destroy, width=10,
+                  font=("黑体", 12)).pack(side=tk.LEFT, padx=10)
+
+    def browse(self):
+        """用文件对话框选择模板文件夹以外的图片"""
+        file_path = filedialog.askopenfilename(
+            parent=self.dialog,
+            title="选择背景图片",
+            filetypes=[("图片文件", "*.png;*.jpg;*.jpeg;*.bmp;*.gif")]
+        )
+        if file_path:
+            self.select(file_path)
+
+    def select(self, path):
+        """关闭对话框并回调选中的图片路径"""
+        self.dialog.destroy()
+        self.on_select(path)
+
+
 class ScoreboardConfigWindow:
     VERSION = "v1.0.2"  # 更新版本号
 
     def __init__(self, root):
         self.root = root
         self.root.title("计分板配置")
-        self.root.geometry("500x650")  # 增加窗口高度以容纳区域配置
+        self.root.geometry("500x720")  # 增加窗口高度以容纳区域配置和预设
         self.root.resizable(False, False)
         self.center_window()
 
@@ -168,7 +2996,13 @@ class ScoreboardConfigWindow:
         self.bout_region_offset_x = BOUT_REGION_OFFSET_X
         self.bout_region_offset_y = BOUT_REGION_OFFSET_Y
 
+        # 预设：启动时填入上次使用的配置
+        self.presets = load_presets()
+        if self.presets["last"]:
+            self.apply_config(self.presets["last"])
+
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
     def center_window(self):
         self.root.update_idletasks()
@@ -192,6 +3026,7 @@ class ScoreboardConfigWindow:
         left_frame.pack(fill=tk.X, padx=10, pady=2)
         tk.Label(left_frame, text="左侧文字:", width=10, font=("黑体", 12)).pack(side=tk.LEFT, padx=(0, 5))
         self.left_entry = tk.Entry(left_frame, font=("黑体", 12))
+        self.left_entry.insert(0, self.left_text)
         self.left_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
         # 右侧文字
@@ -199,6 +3034,7 @@ class ScoreboardConfigWindow:
         right_frame.pack(fill=tk.X, padx=10, pady=2)
         tk.Label(right_frame, text="右侧文字:", width=10, font=("黑体", 12)).pack(side=tk.LEFT, padx=(0, 5))
         self.right_entry = tk.Entry(right_frame, font=("黑体", 12))
+        self.right_entry.insert(0, self.right_text)
         self.right_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
         # 左侧分数
@@ -230,6 +3066,8 @@ class ScoreboardConfigWindow:
         bout_frame.pack(fill=tk.X, padx=10, pady=2)
         tk.Label(bout_frame, text="赛制(BO):", width=10, font=("黑体", 12)).pack(side=tk.LEFT, padx=(0, 5))
         self.bout_entry = tk.Entry(bout_frame, font=("黑体", 12), width=5)
+        if self.bout_number:
+            self.bout_entry.insert(0, str(self.bout_number))
         self.bout_entry.pack(side=tk.LEFT)
 
         # 图片选择区域
@@ -239,7 +3077,7 @@ class ScoreboardConfigWindow:
 
         # 图片路径显示
         self.image_path_var = tk.StringVar()
-        self.image_path_var.set("未选择图片")
+        self.image_path_var.set(os.path.basename(self.image_path) if self.image_path else "未选择图片")
         image_path_label = tk.Label(image_frame, textvariable=self.image_path_var, font=("黑体", 10),
                                     fg="gray", wraplength=200, justify=tk.LEFT)
         image_path_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
@@ -327,12 +3165,29 @@ class ScoreboardConfigWindow:
 
         tk.Label(bout_region_frame, text="(X偏移,Y偏移)", font=("黑体", 10), fg="gray").pack(side=tk.LEFT, padx=5)
 
+        # 预设
+        preset_frame = tk.LabelFrame(self.root, text="预设", font=("黑体", 12))
+        preset_frame.pack(fill=tk.X, padx=30, pady=5, ipady=5)
+
+        self.preset_var = tk.StringVar()
+        self.preset_menu = tk.OptionMenu(preset_frame, self.preset_var, "")
+        self.preset_menu.config(font=("黑体", 10), width=14)
+        self.preset_menu.pack(side=tk.LEFT, padx=10)
+        self.refresh_preset_menu()
+
+        tk.Button(preset_frame, text="载入", command=self.load_preset,
+                  font=("黑体", 10), bg=BUTTON_BG).pack(side=tk.LEFT, padx=2)
+        tk.Button(preset_frame, text="保存为预设", command=self.save_preset,
+                  font=("黑体", 10), bg=BUTTON_BG).pack(side=tk.LEFT, padx=2)
+        tk.Button(preset_frame, text="删除", command=self.delete_preset,
+                  font=("黑体", 10), bg=BUTTON_BG).pack(side=tk.LEFT, padx=2)
+
         # 按钮
         button_frame = tk.Frame(self.root)
         button_frame.pack(pady=10)
         tk.Button(button_frame, text="确认", command=self.confirm, width=10, font=("黑体", 12)).pack(side=tk.LEFT,
                                                                                                      padx=10)
-        tk.Button(button_frame, text="取消", command=self.root.destroy, width=10, font=("黑体", 12)).pack(side=tk.LEFT,
+        tk.Button(button_frame, text="取消", command=self.close, width=10, font=("黑体", 12)).pack(side=tk.LEFT,
                                                                                                           padx=10)
 
         # 底部信息（左下角版本号，右下角版权）
@@ -364,68 +3219,127 @@ class ScoreboardConfigWindow:
 
     def browse_image(self):
         """浏览并选择图片"""
-        file_path = filedialog.askopenfilename(
-            title="选择背景图片",
-            filetypes=[("图片文件", "*.png;*.jpg;*.jpeg;*.bmp;*.gif")]
-        )
-
-        if file_path:
-            self.image_path = file_path
-            self.image_path_var.set(os.path.basename(file_path))
+        TemplatePicker(self.root, self.select_image, self.image_path)
+
+    def select_image(self, file_path):
+        """记录选中的图片，并在后台预取，减少启动计分板时的等待"""
+        self.image_path = file_path
+        self.image_path_var.set(os.path.basename(file_path))
+        TEMPLATE_INDEX.prefetch(file_path)
+
+    def read_entries(self):
+        """读取并校验输入框中的配置，不合法时提示错误并返回None"""
+        values = {
+            "left_text": self.left_entry.get(),
+            "right_text": self.right_entry.get(),
+            "left_score": self.left_score_entry.get(),
+            "right_score": self.right_score_entry.get(),
+            "font_size": self.font_entry.get(),
+            "bout_number": self.bout_entry.get(),
+            "image_path": self.image_path,
+            "left_parallelogram": [entry.get() for entry in self.left_name_entries],
+            "right_parallelogram": [entry.get() for entry in self.right_name_entries],
+            "left_score_region": [entry.get() for entry in self.left_score_region_entries],
+            "right_score_region": [entry.get() for entry in self.right_score_region_entries],
+            "bout_region_offset_x": self.bout_offset_x_entry.get(),
+            "bout_region_offset_y": self.bout_offset_y_entry.get(),
+        }
+        try:
+            return parse_config(values)
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return None
+
+    def fill_entries(self, config):
+        """把配置填入输入框"""
+        def set_entry(entry, value):
+            entry.delete(0, tk.END)
+            entry.insert(0, str(value))
 
-    def confirm(self):
-        # 获取基本信息
-        self.left_text = self.left_entry.get()
-        self.right_text = self.right_entry.get()
+        set_entry(self.left_entry, config["left_text"])
+        set_entry(self.right_entry, config["right_text"])
+        set_entry(self.left_score_entry, config["left_score"])
+        set_entry(self.right_score_entry, config["right_score"])
+        set_entry(self.font_entry, config["font_size"])
+        set_entry(self.bout_entry, config["bout_number"] or "")
+        for entries, field in ((self.left_name_entries, "left_parallelogram"),
+                               (self.right_name_entries, "right_parallelogram"),
+                               (self.left_score_region_entries, "left_score_region"),
+                               (self.right_score_region_entries, "right_score_region")):
+            for entry, value in zip(entries, config[field]):
+                set_entry(entry, value)
+        set_entry(self.bout_offset_x_entry, config["bout_region_offset_x"])
+        set_entry(self.bout_offset_y_entry, config["bout_region_offset_y"])
+        self.image_path = config["image_path"]
+        self.image_path_var.set(os.path.basename(self.image_path) if self.image_path else "未选择图片")
+
+    def apply_config(self, config):
+        """把配置保存到窗口属性"""
+        for field in PRESET_FIELDS:
+            setattr(self, field, config[field])
+
+    def config_values(self):
+        """返回当前配置（键与TransparentScoreboardApp的参数同名）"""
+        return {field: getattr(self, field) for field in PRESET_FIELDS}
+
+    def refresh_preset_menu(self):
+        """刷新预设下拉菜单"""
+        menu = self.preset_menu["menu"]
+        menu.delete(0, tk.END)
+        names = sorted(self.presets["presets"])
+        for name in names:
+            menu.add_command(label=name, command=lambda value=name: self.preset_var.set(value))
+        if self.preset_var.get() not in names:
+            self.preset_var.set(names[0] if names else "")
+
+    def load_preset(self):
+        """把选中的预设填入输入框"""
+        config = self.presets["presets"].get(self.preset_var.get())
+        if config is None:
+            messagebox.showerror("错误", "请先选择预设")
+            return
+        self.fill_entries(config)
 
-        # 验证分数输入
-        try:
-            self.left_score = int(self.left_score_entry.get())
-            self.right_score = int(self.right_score_entry.get())
-        except ValueError:
-            messagebox.showerror("错误", "分数必须为整数")
+    def save_preset(self):
+        """把输入框中的配置保存为命名预设"""
+        config = self.read_entries()
+        if config is None:
+            return
+        name = simpledialog.askstring("保存预设", "预设名称:", initialvalue=self.preset_var.get(), parent=self.root)
+        if not name:
+            return
+        self.presets["presets"][name] = config
+        save_presets(self.presets)
+        self.preset_var.set(name)
+        self.refresh_preset_menu()
+
+    def delete_preset(self):
+        """删除选中的预设"""
+        name = self.preset_var.get()
+        if name not in self.presets["presets"]:
             return
+        if messagebox.askyesno("删除预设", f"确定删除预设 {name}？"):
+            del self.presets["presets"][name]
+            save_presets(self.presets)
+            self.refresh_preset_menu()
 
-        # 验证字体大小
-        try:
-            self.font_size = int(self.font_entry.get())
-            if not (10 <= self.font_size <= 200):
-                raise ValueError
-        except ValueError:
-            messagebox.showerror("错误", "字体大小必须在10-200之间")
+    def confirm(self):
+        config = self.read_entries()
+        if config is None:
             return
+        self.apply_config(config)
 
-        # 验证赛制输入
-        bout_text = self.bout_entry.get().strip()
-        if bout_text:
-            try:
-                self.bout_number = int(bout_text)
-                if self.bout_number <= 0:
-                    raise ValueError
-            except ValueError:
-                messagebox.showerror("错误", "赛制必须为正整数")
-                return
-        else:
-            self.bout_number = 0  # 不显示赛制
+        # 保存为上次使用的配置，下次启动时自动填入
+        self.presets["last"] = config
+        save_presets(self.presets)
 
-        # 获取区域配置
-        try:
-            # 左侧名称区域
-            self.left_parallelogram = tuple(int(entry.get()) for entry in self.left_name_entries)
-            # 右侧名称区域
-            self.right_parallelogram = tuple(int(entry.get()) for entry in self.right_name_entries)
-            # 左侧分数区域
-            self.left_score_region = tuple(int(entry.get()) for entry in self.left_score_region_entries)
-            # 右侧分数区域
-            self.right_score_region = tuple(int(entry.get()) for entry in self.right_score_region_entries)
-            # 赛制区域偏移
-            self.bout_region_offset_x = int(self.bout_offset_x_entry.get())
-            self.bout_region_offset_y = int(self.bout_offset_y_entry.get())
-        except ValueError:
-            messagebox.showerror("错误", "区域配置必须为整数")
-            return
+        self.close()
 
-        self.root.destroy()
+    def close(self):
+        """关闭配置界面：清空窗口内容并退出事件循环，根窗口留给计分板继续使用"""
+        for child in self.root.winfo_children():
+            child.destroy()
+        self.root.quit()
 
 
 class TransparentScoreboardApp:
@@ -433,15 +3347,18 @@ class TransparentScoreboardApp:
                  left_parallelogram, right_parallelogram,
                  left_score_region, right_score_region,
                  bout_region_offset_x, bout_region_offset_y,
-                 image_path=None):
+                 image_path=None, renderer=None, sinks=None, control_port=None, name=None, record_path=None,
+                 snap_distance=0):
         self.root = root
+        self.name = name  # 同一进程中运行多个计分板时用于区分窗口
         # 设置窗口标题
-        self.root.title("心灵终结计分板")
+        self.root.title(f"心灵终结计分板 - {name}" if name else "心灵终结计分板")
 
         # 设置应用程序ID（确保任务栏分组正确）
         if CURRENT_OS == "Windows":
             try:
                 # 设置应用程序ID，这有助于在任务栏中正确显示图标
+                import ctypes  # 用于设置Windows任务栏图标
                 myappid = 'com.mindcontrol.scoreboard.1.0'  # 任意字符串，建议使用反向域名格式
                 ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
             except:
@@ -453,7 +3370,7 @@ class TransparentScoreboardApp:
             self.root.attributes('-topmost', True)
             self.root.wm_attributes('-transparentcolor', 'white')
             # 延迟获取窗口句柄并设置样式（确保窗口已创建）
-            self.root.after(100, self.fix_windows_taskbar_icon)  # 延迟100ms执行
+            self.taskbar_fix_id = self.root.after(100, self.fix_windows_taskbar_icon)  # 延迟100ms执行
         else:
             # Linux和macOS保留简化窗口装饰
             self.root.overrideredirect(False)
@@ -467,30 +3384,65 @@ class TransparentScoreboardApp:
         # 设置图标
         self.set_window_icon()
 
-        # 核心配置参数
-        self.left_text = left_text
-        self.right_text = right_text
-        self.left_score = left_score
-        self.right_score = right_score
-        self.font_size = font_size
-        self.bout_number = bout_number  # 赛制数字
-        self.font_path = self.find_font_path()
-
-        # 区域配置
-        self.left_region = left_parallelogram
-        self.right_region = right_parallelogram
-        self.left_score_region = left_score_region
-        self.right_score_region = right_score_region
-        self.bout_region_offset_x = bout_region_offset_x
-        self.bout_region_offset_y = bout_region_offset_y
-
-        # 区域与颜色配置
-        self.left_color = LEFT_COLOR  # 左侧文字和分数颜色
-        self.right_color = RIGHT_COLOR  # 右侧文字和分数颜色
-        self.outline_color = WHITEISH_COLOR  # 描边颜色改为亮白灰色
-
-        # 初始化界面
-        self.load_and_display_image()
+        # 核心配置参数：计分板状态为不可变快照，left_text等属性的读写都映射到self.state
+        if renderer is not None:
+            font_path, font_index = renderer.font_path, renderer.font_index
+        else:
+            with STARTUP_PROFILER.stage("font_discovery"):
+                font_path, font_index = find_font_path(left_text + right_text)
+        self.state = BoardState(
+            left_text=left_text,
+            right_text=right_text,
+            left_score=left_score,
+            right_score=right_score,
+            font_size=font_size,
+            bout_number=bout_number,  # 赛制数字
+            font_path=font_path,
+            font_index=font_index,
+            # 区域配置
+            left_region=left_parallelogram,
+            right_region=right_parallelogram,
+            left_score_region=left_score_region,
+            right_score_region=right_score_region,
+            bout_region_offset_x=bout_region_offset_x,
+            bout_region_offset_y=bout_region_offset_y,
+            # 颜色配置
+            left_color=LEFT_COLOR,  # 左侧文字和分数颜色
+            right_color=RIGHT_COLOR,  # 右侧文字和分数颜色
+            outline_color=WHITEISH_COLOR,  # 描边颜色改为亮白灰色
+        )
+        self.rendered_state = None  # 最近一次交给渲染器的状态，None表示需要整体同步
+        self.event_log = EventLog()  # 撤销/重做历史
+        self.record_path = record_path  # 退出时导出会话的路径
+
+        # 渲染调度：连续的状态变化合并为一次渲染
+        self.render_scheduler = RenderScheduler(self.root, self.update_image_display)
+        self.batch_depth = 0  # 大于0时处于批量更新中，渲染推迟到批量结束
+        self.batch_render_pending = False
+
+        # 初始化界面（首帧在当前线程同步渲染）
+        with STARTUP_PROFILER.stage("first_frame"):
+            if renderer is not None:
+                # 使用预渲染的首帧
+                self.renderer = renderer
+                self.original_image = renderer.background
+                self.rendered_state = self.state
+                self.show_frame(renderer.take_frame(None))
+            else:
+                self.load_and_display_image()
+        if "total" not in STARTUP_PROFILER.last:
+            STARTUP_PROFILER.record("total", IMPORT_START, time.perf_counter())
+
+        # 帧输出（PNG文件、共享内存），添加时立即输出首帧
+        self.sinks = sinks or []
+        for sink in self.sinks:
+            self.renderer.add_sink(sink)
+
+        # 本地控制接口
+        self.control_server = None
+        if control_port is not None:
+            self.start_control_server(control_port)
+        self.render_worker = RenderWorker(self.renderer) if RENDER_IN_THREAD else None
         self.position_window()
         self.create_control_panel()
         self.create_floating_buttons()  # 创建浮动按钮
@@ -499,12 +3451,27 @@ class TransparentScoreboardApp:
         self.dragging = False
         self.offset_x = 0
         self.offset_y = 0
+        self.snap_distance = snap_distance  # 吸附距离（像素），0为不吸附
+        self.snap_targets = ((0,), (0,))  # 拖动开始时计算的吸附位置(x列表, y列表)
+        self.window_position = None  # 最近一次设置的窗口位置
+        self.drag_throttle = DragThrottle(self.root, self.move_window)
 
         # 绑定事件
+        self.bind_events()
+
+    def bind_events(self):
+        """绑定拖动、快捷键和窗口关闭事件"""
         self.root.bind("<Button-1>", self.on_drag_start)
         self.root.bind("<B1-Motion>", self.on_drag_motion)
+        self.root.bind("<ButtonRelease-1>", self.on_drag_end)
         self.root.bind("<Escape>", self.quit_app)
         self.root.bind("<Button-3>", self.toggle_minimize)  # 右键点击最小化
+        for key in UNDO_KEYS:
+            self.root.bind(key, self.on_undo_key)
+        for key in REDO_KEYS:
+            self.root.bind(key, self.on_redo_key)
+        # 从任务栏关闭窗口时同样导出会话、关闭帧输出和控制接口（替换配置窗口在同一根窗口上设置的处理函数）
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_app)
 
     def find_icon_path(self):
         """查找图标文件路径"""
@@ -562,7 +3529,7 @@ class TransparentScoreboardApp:
             # 获取当前窗口句柄（多种方式确保获取成功）
             hwnd = None
             # 尝试通过标题查找
-            hwnd = win32gui.FindWindow(None, "心灵终结计分板")
+            hwnd = win32gui.FindWindow(None, self.root.title())
             if not hwnd:
                 # 尝试获取前台窗口
                 hwnd = win32gui.GetForegroundWindow()
@@ -609,250 +3576,227 @@ class TransparentScoreboardApp:
 
     def get_resource_path(self, relative_path):
         """获取资源文件的绝对路径（适配PyInstaller打包）"""
-        if getattr(sys, 'frozen', False):
-            # 打包后环境：获取临时目录路径
-            base_path = sys._MEIPASS
-        else:
-            # 开发环境：使用当前文件所在目录
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        return os.path.join(base_path, relative_path)
+        return get_resource_path(relative_path)
 
     def find_image_path(self):
         """查找图片路径，支持不同系统的路径格式"""
-        global custom_image_path
-
-        # 如果有自定义图片路径，优先使用
-        if custom_image_path and os.path.exists(custom_image_path):
-            return custom_image_path
-
-        # 尝试UI文件夹
-        ui_dir = self.get_resource_path(CUSTOM_IMAGE_FOLDER)
-        if os.path.exists(ui_dir) and os.path.isdir(ui_dir):
-            # 查找默认图片
-            default_path = os.path.join(ui_dir, DEFAULT_IMAGE_NAME)
-            if os.path.exists(default_path):
-                return default_path
-
-            # 查找UI文件夹中的任何图片
-            for file in os.listdir(ui_dir):
-                if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
-                    return os.path.join(ui_dir, file)
-
-        # 如果找不到，尝试当前目录
-        for file in os.listdir(os.getcwd()):
-            if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
-                return os.path.join(os.getcwd(), file)
-
-        # 如果仍然找不到，返回None
-        return None
+        return find_image_path()
 
     def find_font_path(self):
-        """查找黑体字体路径，针对不同系统优化"""
-        if CURRENT_OS == "Windows":
-            win_fonts = [
-                "C:/Windows/Fonts/simhei.ttf",  # 黑体
-                "C:/Windows/Fonts/simsun.ttc",  # 宋体
-                "C:/Windows/Fonts/msyh.ttc",  # 微软雅黑
-            ]
-            for font_path in win_fonts:
-                if os.path.exists(font_path):
-                    return font_path
-
-        elif CURRENT_OS == "Linux":
-            linux_fonts = [
-                "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",  # 文泉驿微米黑
-                "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",  # Noto Sans CJK
-                "/usr/share/fonts/truetype/simhei.ttf",  # 常见黑体路径
-            ]
-            for font_path in linux_fonts:
-                if os.path.exists(font_path):
-                    return font_path
-
-        elif CURRENT_OS == "Darwin":  # macOS
-            mac_fonts = [
-                "/System/Library/Fonts/PingFang.ttc",  # 苹方
-                "/Library/Fonts/SimHei.ttf",  # 黑体
-                "/System/Library/Fonts/STHeiti Medium.ttc",  # 华文黑体
-            ]
-            for font_path in mac_fonts:
-                if os.path.exists(font_path):
-                    return font_path
-
-        # 如果找不到指定字体，返回None
-        return None
+        """查找黑体字体，针对不同系统优化，返回(路径, 索引)"""
+        return find_font_path(self.left_text + self.right_text)
 
     def load_and_display_image(self):
         try:
             if not self.image_path or not os.path.exists(self.image_path):
                 # 创建一个默认的空白图像
-                width, height = 1920, 1080
-                self.original_image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-                draw = ImageDraw.Draw(self.original_image)
-                font = ImageFont.load_default()
-                draw.text((width // 2, height // 2), "未找到背景图片", font=font, fill=(255, 0, 0))
+                self.original_image = create_placeholder_image(1920, 1080, "未找到背景图片")
             else:
-                self.original_image = Image.open(self.image_path).convert("RGBA")
-
-            self.display_image = self.original_image.copy()
-            self.update_image_display()
+                with STARTUP_PROFILER.stage("image_decode"):
+                    self.original_image = TEMPLATE_INDEX.open(self.image_path)
         except Exception as e:
             messagebox.showerror("错误", f"无法加载图片: {str(e)}")
             # 创建一个错误图像
-            width, height = 800, 600
-            self.original_image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(self.original_image)
-            font = ImageFont.load_default()
-            draw.text((width // 2, height // 2), f"错误: {str(e)}", font=font, fill=(255, 0, 0))
-            self.display_image = self.original_image.copy()
-            self.update_image_display()
+            self.original_image = create_placeholder_image(800, 600, f"错误: {str(e)}")
 
-    def update_image_display(self):
-        self.display_image = self.original_image.copy()
-        draw = ImageDraw.Draw(self.display_image)
+        # 空闲时在后台预取下一个模板，切换时无需等待解码
+        self.prefetch_id = self.root.after_idle(
+            lambda: TEMPLATE_INDEX.prefetch(TEMPLATE_INDEX.next_template(self.image_path)))
 
-        # 如果找不到指定字体，使用系统默认字体
-        if self.font_path and os.path.exists(self.font_path):
-            try:
-                base_font = ImageFont.truetype(self.font_path, self.font_size)
-            except:
-                print("警告: 无法加载指定字体，使用默认字体")
-                base_font = ImageFont.load_default()
+        if getattr(self, 'render_worker', None):
+            # 后台渲染时由工作线程更换背景
+            self.render_worker.submit(self.render_state(), self.original_image)
+            self.rendered_state = self.state
+            self.watch_render_worker()
+            return
+        if hasattr(self, 'renderer'):
+            self.renderer.set_background(self.original_image)
         else:
-            print("警告: 未找到黑体字体，使用默认字体")
-            base_font = ImageFont.load_default()
+            # 首帧在当前线程同步渲染，以便按图片尺寸定位窗口
+            self.renderer = ScoreboardRenderer(self.original_image, **self.render_state())
+        # 更换背景后整帧重绘，即使状态没有变化
+        self.rendered_state = None
+        self.update_image_display()
 
-        def get_fitted_font(text, region):
-            x_min, y_min, x_max, y_max = region
-            region_width = x_max - x_min
-            for size in range(self.font_size, 10, -1):
-                try:
-                    if self.font_path and os.path.exists(self.font_path):
-                        font = ImageFont.truetype(self.font_path, size)
-                    else:
-                        font = ImageFont.load_default()
-                except:
-                    font = ImageFont.load_default()
-                bbox = draw.textbbox((0, 0), text, font=font)
-                text_width = bbox[2] - bbox[0]
-                if text_width <= region_width * 0.9:
-                    return font
-            return base_font
-
-        # 绘制左侧文字（红色）
-        if self.left_text and self.left_region:
-            x_min, y_min, x_max, y_max = self.left_region
-            center_x = (x_min + x_max) / 2
-            center_y = (y_min + y_max) / 2
-            font = get_fitted_font(self.left_text, self.left_region)
-            bbox = draw.textbbox((0, 0), self.left_text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            text_x = center_x - text_width / 2
-            text_y = center_y - text_height / 2
-            self.draw_text_with_outline(draw, text_x, text_y, self.left_text, font, self.outline_color, self.left_color)
-
-        # 绘制右侧文字（蓝色）
-        if self.right_text and self.right_region:
-            x_min, y_min, x_max, y_max = self.right_region
-            center_x = (x_min + x_max) / 2
-            center_y = (y_min + y_max) / 2
-            font = get_fitted_font(self.right_text, self.right_region)
-            bbox = draw.textbbox((0, 0), self.right_text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            text_x = center_x - text_width / 2
-            text_y = center_y - text_height / 2
-            self.draw_text_with_outline(draw, text_x, text_y, self.right_text, font=font,
-                                        outline_color=self.outline_color,
-                                        fill_color=self.right_color)
-
-        # 绘制左侧分数（与左侧文字同色：红色）
-        if self.left_score_region:
-            x_min, y_min, x_max, y_max = self.left_score_region
-            center_x = (x_min + x_max) / 2
-            center_y = (y_min + y_max) / 2
-            score_text = str(self.left_score)
-            font = get_fitted_font(score_text, self.left_score_region)
-            bbox = draw.textbbox((0, 0), score_text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            text_x = center_x - text_width / 2
-            text_y = center_y - text_height / 2
-            self.draw_text_with_outline(draw, text_x, text_y, score_text, font, self.outline_color, self.left_color)
-
-        # 绘制右侧分数（与右侧文字同色：蓝色）
-        if self.right_score_region:
-            x_min, y_min, x_max, y_max = self.right_score_region
-            center_x = (x_min + x_max) / 2
-            center_y = (y_min + y_max) / 2
-            score_text = str(self.right_score)
-            font = get_fitted_font(score_text, self.right_score_region)
-            bbox = draw.textbbox((0, 0), score_text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            text_x = center_x - text_width / 2
-            text_y = center_y - text_height / 2
-            self.draw_text_with_outline(draw, text_x, text_y, score_text, font, self.outline_color, self.right_color)
-
-        # 绘制赛制显示（如果有设置）
-        if self.bout_number > 0:
-            bout_text = f"BO{self.bout_number}"
-            img_width, img_height = self.display_image.size
-            center_x = img_width // 2 + self.bout_region_offset_x
-            center_y = img_height // 2 + self.bout_region_offset_y
+    def render_state(self):
+        """收集渲染器需要的计分板状态"""
+        return self.state.as_dict()
 
-            # 确定字体大小（使用新的默认值60）
-            bout_font_size = min(BOUT_DEFAULT_FONT_SIZE, 200)  # 限制最大大小
-            try:
-                if self.font_path and os.path.exists(self.font_path):
-                    # 尝试加载粗体字体
-                    if CURRENT_OS == "Windows":
-                        # Windows系统使用字体文件直接加载
-                        bout_font = ImageFont.truetype(self.font_path, bout_font_size)
-                    else:
-                        # 其他系统尝试通过字体名指定粗体
-                        bout_font = ImageFont.truetype(self.font_path, bout_font_size)
-                else:
-                    # 使用系统默认字体
-                    try:
-                        # 尝试创建粗体字体
-                        bout_font = ImageFont.truetype("Arial", bout_font_size, encoding="unic")
-                    except:
-                        # 失败则使用默认字体
-                        bout_font = ImageFont.load_default()
-            except:
-                # 出错则使用默认字体
-                bout_font = ImageFont.load_default()
+    def update_image_display(self):
+        """把与上次渲染相比变化的字段交给渲染器，并把变化的区域显示到窗口；状态没有变化时跳过"""
+        state = self.state
+        changed = state.diff(self.rendered_state)
+        if not changed:
+            return
+        fields = {field: getattr(state, field) for field in changed}
+        self.rendered_state = state
+
+        if getattr(self, 'render_worker', None):
+            # 后台渲染：只提交变化的字段，完成的帧由watch_render_worker显示
+            self.render_worker.submit(fields)
+            self.watch_render_worker()
+            return
 
-            # 计算文本包围盒
-            bbox = draw.textbbox((0, 0), bout_text, font=bout_font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
+        self.renderer.update(**fields)
+        boxes = self.renderer.render()
+        if boxes != []:
+            self.show_frame(self.renderer.take_frame(boxes))
+
+    def watch_render_worker(self):
+        """在Tk线程中等待后台渲染完成的帧"""
+        if not getattr(self, 'render_watch_id', None):
+            self.render_watch_id = self.root.after(RENDER_POLL_INTERVAL, self.poll_render_worker)
+
+    def poll_render_worker(self):
+        """取走后台渲染完成的帧并显示，仍有未完成的快照时继续等待"""
+        self.render_watch_id = None
+        result = self.render_worker.poll()
+        if result is not None:
+            self.show_frame(result[1])
+        if not self.render_worker.idle():
+            self.watch_render_worker()
+
+    def show_frame(self, frame):
+        """把渲染完成的帧显示到窗口：整帧时重建PhotoImage，增量时只替换变化的图块"""
+        kind, content = frame
+        if kind == "full" or not hasattr(self, 'photo'):
+            if kind == "full":
+                self.display_image = content
+            else:
+                for box, tile in content:
+                    self.display_image.paste(tile, box[:2])
+            # 整帧重绘时重建PhotoImage
+            with PROFILER.stage("photo"):
+                self.photo = ImageTk.PhotoImage(self.display_image)
+            if hasattr(self, 'image_label'):
+                self.image_label.config(image=self.photo)
+                self.image_label.image = self.photo
+            else:
+                self.image_label = tk.Label(self.root, image=self.photo, bg='white')
+                self.image_label.pack()
+        else:
+            with PROFILER.stage("photo"):
+                for box, tile in content:
+                    self.display_image.paste(tile, box[:2])
+                    self.blit_to_photo(tile, box[:2])
+        self.update_profile_overlay()
+
+    def update_profile_overlay(self):
+        """在计分板左上角显示最近一帧的渲染和转换耗时"""
+        if not (PROFILER.enabled and PROFILE_OVERLAY):
+            return
+        text = (f"帧 {PROFILER.last.get('frame', 0):.2f} ms | 转换 {PROFILER.last.get('photo', 0):.2f} ms"
+                f" | 测量 {self.renderer.frame_measurements}")
+        if hasattr(self, 'profile_label'):
+            self.profile_label.config(text=text)
+        else:
+            self.profile_label = tk.Label(self.root, text=text, font=("黑体", 10), fg="yellow", bg="black")
+            self.profile_label.place(x=0, y=0)
 
-            # 计算文本位置
-            text_x = center_x - text_width // 2
-            text_y = center_y - text_height // 2
+    def request_render(self):
+        """标记计分板需要重绘，由渲染调度器合并后执行；批量更新中推迟到批量结束"""
+        if self.batch_depth:
+            self.batch_render_pending = True
+            return
+        # 一次操作（或一批指令）的所有修改作为一个撤销单位
+        self.event_log.commit()
+        if self.state is self.rendered_state:
+            # 状态没有变化（如分数已为0时再减分），无需渲染
+            return
+        self.render_scheduler.request()
 
-            # 使用现有的描边函数绘制赛制文本（淡灰色字体黑色描边）
-            self.draw_text_with_outline(draw, text_x, text_y, bout_text, bout_font, BOUT_OUTLINE_COLOR, BOUT_TEXT_COLOR)
+    def apply_batch(self, mutations):
+        """原子地执行一组控制指令（格式见validate_mutation），只触发一次渲染，返回状态是否变化
 
-        self.photo = ImageTk.PhotoImage(self.display_image)
-        if hasattr(self, 'image_label'):
-            self.image_label.config(image=self.photo)
-            self.image_label.image = self.photo
+        所有指令先一起校验，任何一条不合法时不做任何修改并抛出ValueError；执行中出错时恢复原状态
+        """
+        mutations = [validate_mutation(mutation) for mutation in mutations]
+        snapshot = self.state
+        checkpoint = self.event_log.checkpoint()
+        self.batch_depth += 1
+        try:
+            changed = [self.apply_mutation(mutation) for mutation in mutations]
+        except Exception:
+            # 回滚：恢复原状态，本批的修改不记入事件日志
+            self.state = snapshot
+            self.event_log.discard(checkpoint)
+            raise
+        finally:
+            self.batch_depth -= 1
+            # 回滚时也要清除标记，否则之后的单项修改不再触发渲染；恢复的状态与已显示的不同时会重绘
+            if self.batch_depth == 0 and self.batch_render_pending:
+                self.batch_render_pending = False
+                self.request_render()
+        return any(changed)
+
+    def focus_has_undo(self):
+        """输入焦点是否在自带撤销功能的控件中（开启了undo的Text，此时撤销/重做快捷键留给该控件）
+
+        Entry没有自己的撤销，点击按钮或图片也不会移走Entry的焦点，因此焦点在Entry中时仍然撤销计分板
+        """
+        try:
+            widget = self.root.focus_get()
+        except KeyError:
+            # 焦点在Tk无法识别的窗口（如系统对话框）中
+            return False
+        return isinstance(widget, tk.Text) and bool(widget.cget("undo"))
+
+    def on_undo_key(self, event):
+        """Ctrl+Z撤销，Ctrl+Shift+Z重做全部（按Shift位区分，不受大写锁定影响）"""
+        if self.focus_has_undo():
+            return
+        if event.state & SHIFT_MASK:
+            self.redo_all()
         else:
-            self.image_label = tk.Label(self.root, image=self.photo, bg='white')
-            self.image_label.pack()
+            self.undo()
 
-    def draw_text_with_outline(self, draw, x, y, text, font, outline_color, fill_color):
-        """改进的文字描边绘制方法，确保描边不透明"""
-        # 绘制文字描边（增加描边宽度以增强效果）
-        for dx in (-2, 0, 2):
-            for dy in (-2, 0, 2):
-                if dx != 0 or dy != 0:
-                    draw.text((x + dx, y + dy), text, font=font, fill=outline_color)
-        # 绘制主文字（使用指定颜色）
-        draw.text((x, y), text, font=font, fill=fill_color)
+    def on_redo_key(self, event):
+        """Ctrl+Y重做"""
+        if self.focus_has_undo():
+            return
+        self.redo()
+
+    def undo(self, event=None):
+        """撤销最近一次操作（Ctrl+Z）"""
+        self.event_log.commit()
+        self.restore_events(self.event_log.undo(), undo=True)
+
+    def redo(self, event=None):
+        """重做最近撤销的一次操作（Ctrl+Y）"""
+        self.event_log.commit()
+        self.restore_events(self.event_log.redo(), undo=False)
+
+    def redo_all(self, event=None):
+        """重做全部已撤销的操作，合并为一次渲染（Ctrl+Shift+Z）"""
+        self.event_log.commit()
+        self.restore_events(self.event_log.redo(None), undo=False)
+
+    def restore_events(self, events, undo):
+        """把事件中的旧值（撤销）或新值（重做）一次性写回状态（不记入历史），只渲染一次"""
+        if not events:
+            return
+        changes = {}
+        if undo:
+            for _, _, field, old, _ in reversed(events):
+                changes[field] = old
+        else:
+            for _, _, field, _, new in events:
+                changes[field] = new
+        self.state = self.state.replace(**changes)
+        self.request_render()
+
+    def export_session(self, path):
+        """导出当前会话（可用benchmark.py --replay无界面回放）"""
+        self.event_log.commit()
+        count = self.event_log.export(path, self.state, self.image_path)
+        print(f"已导出 {count} 个事件到 {path}")
+
+    def blit_to_photo(self, tile, position):
+        """只把变化的区域写入现有的PhotoImage，避免重建整张图片"""
+        tile_photo = ImageTk.PhotoImage(tile)
+        self.root.tk.call(str(self.photo), "copy", str(tile_photo),
+                          "-to", position[0], position[1],
+                          "-compositingrule", "set")
 
     def create_control_panel(self):
         # 底部控制面板
@@ -926,19 +3870,21 @@ class TransparentScoreboardApp:
 
     def change_image(self):
         """更换背景图片"""
-        global custom_image_path
+        TemplatePicker(self.root, self.switch_image, self.image_path, title="选择新的背景图片")
 
-        file_path = filedialog.askopenfilename(
-            title="选择新的背景图片",
-            filetypes=[("图片文件", "*.png;*.jpg;*.jpeg;*.bmp;*.gif")]
-        )
+    def switch_image(self, file_path):
+        """切换到选中的背景：图片仍在后台预取时等待完成，不阻塞计分板"""
+        global custom_image_path
 
-        if file_path:
-            # 保存自定义图片路径
-            custom_image_path = file_path
-            self.image_path = file_path
-            self.load_and_display_image()
-            messagebox.showinfo("成功", "背景图片已更新")
+        # 保存自定义图片路径
+        custom_image_path = file_path
+        self.image_path = file_path
+        if not TEMPLATE_INDEX.is_ready(file_path):
+            self.switch_image_id = self.root.after(RENDER_POLL_INTERVAL, self.switch_image, file_path)
+            return
+        self.switch_image_id = None
+        self.load_and_display_image()
+        messagebox.showinfo("成功", "背景图片已更新")
 
     def change_regions(self):
         """调整区域范围对话框"""
@@ -1034,16 +3980,16 @@ class TransparentScoreboardApp:
 
         def confirm_changes():
             try:
-                # 更新区域配置
-                self.left_region = tuple(int(entry.get()) for entry in left_name_entries)
-                self.right_region = tuple(int(entry.get()) for entry in right_name_entries)
-                self.left_score_region = tuple(int(entry.get()) for entry in left_score_region_entries)
-                self.right_score_region = tuple(int(entry.get()) for entry in right_score_region_entries)
-                self.bout_region_offset_x = int(bout_offset_x_entry.get())
-                self.bout_region_offset_y = int(bout_offset_y_entry.get())
-
-                # 更新显示
-                self.update_image_display()
+                # 所有区域作为一次批量更新，只渲染一次
+                values = {
+                    "left_region": tuple(int(entry.get()) for entry in left_name_entries),
+                    "right_region": tuple(int(entry.get()) for entry in right_name_entries),
+                    "left_score_region": tuple(int(entry.get()) for entry in left_score_region_entries),
+                    "right_score_region": tuple(int(entry.get()) for entry in right_score_region_entries),
+                    "bout_region_offset_x": int(bout_offset_x_entry.get()),
+                    "bout_region_offset_y": int(bout_offset_y_entry.get()),
+                }
+                self.apply_batch([{"op": "set", "field": field, "value": value} for field, value in values.items()])
 
                 # 关闭对话框
                 dialog.destroy()
@@ -1099,23 +4045,85 @@ class TransparentScoreboardApp:
         """更新左右侧文字并重新渲染"""
         self.left_text = left_text
         self.right_text = right_text
-        self.update_image_display()
+        # 当前字体不支持新名称中的字符时重新查找字体
+        if not FONT_INDEX.covers(self.font_path, left_text + right_text, self.font_index):
+            self.font_path, self.font_index = self.find_font_path()
+        FONT_INDEX.flush()
+        self.request_render()
+
+    def start_control_server(self, port):
+        """启动本地HTTP/WebSocket控制接口，指令在Tk线程中定时执行"""
+        self.control_server = ControlServer(port=port)
+        try:
+            port = self.control_server.start()
+        except OSError as e:
+            print(f"警告: 无法启动控制接口: {e}")
+            self.control_server = None
+            return
+        label = f"（{self.name}）" if self.name else ""
+        print(f"控制接口{label}: http://{CONTROL_HOST}:{port}/state  ws://{CONTROL_HOST}:{port}/ws")
+        self.control_server.publish(self.control_state(), self.state.version)
+        self.control_poll_id = self.root.after(CONTROL_POLL_INTERVAL, self.poll_control_server)
+
+    def control_state(self):
+        """返回可由控制接口读取和修改的计分板状态"""
+        return {field: getattr(self, field) for field in CONTROL_FIELDS}
+
+    def poll_control_server(self):
+        """执行控制接口收到的指令，每个请求作为一次批量更新"""
+        if self.control_server is None:
+            return
+        try:
+            for mutations, future in self.control_server.drain():
+                try:
+                    self.apply_batch(mutations)
+                except Exception as e:
+                    # 任何异常都交给请求方，不能让等待中的HTTP/WebSocket请求永远挂起
+                    future.set_exception(e)
+                    continue
+                future.set_result({"version": self.state.version, "state": self.control_state()})
+            # 本轮有变化（包括界面按钮的修改）时只发布一次新状态
+            if self.state.version != self.control_server.snapshot["version"]:
+                self.control_server.publish(self.control_state(), self.state.version)
+        finally:
+            # 执行指令时窗口可能已关闭（quit_app会断开控制接口）
+            if self.control_server is not None:
+                self.control_poll_id = self.root.after(CONTROL_POLL_INTERVAL, self.poll_control_server)
+
+    def apply_mutation(self, mutation):
+        """执行一条已校验的控制指令（与界面按钮调用相同的方法），返回状态是否变化"""
+        if mutation["op"] == "score":
+            before = getattr(self, f"{mutation['side']}_score")
+            self.update_score(mutation["side"], mutation["delta"])
+            return getattr(self, f"{mutation['side']}_score") != before
+
+        field, value = mutation["field"], mutation["value"]
+        if getattr(self, field) == value:
+            return False
+        if field in ("left_text", "right_text"):
+            texts = {"left_text": self.left_text, "right_text": self.right_text, field: value}
+            self.update_text(texts["left_text"], texts["right_text"])
+        elif field in ("left_score", "right_score"):
+            side = field.split("_")[0]
+            self.update_score(side, value - getattr(self, field))
+        else:
+            setattr(self, field, value)
+            self.request_render()
+        return True
 
     def update_score(self, side, delta):
         """更新分数并重新渲染"""
         if side == "left":
-            self.left_score += delta
-            # 确保分数不小于0
-            self.left_score = max(0, self.left_score)
+            # 确保分数不小于0（已为0时减分不会产生新状态）
+            self.left_score = max(0, self.left_score + delta)
             if hasattr(self, 'left_score_label'):
                 self.left_score_label.config(text=str(self.left_score))
         else:
-            self.right_score += delta
-            # 确保分数不小于0
-            self.right_score = max(0, self.right_score)
+            # 确保分数不小于0（已为0时减分不会产生新状态）
+            self.right_score = max(0, self.right_score + delta)
             if hasattr(self, 'right_score_label'):
                 self.right_score_label.config(text=str(self.right_score))
-        self.update_image_display()
+        self.request_render()
 
     def change_font_size(self):
         """调整字体大小对话框"""
@@ -1129,7 +4137,7 @@ class TransparentScoreboardApp:
         )
         if new_size:
             self.font_size = new_size
-            self.update_image_display()
+            self.request_render()
 
     def change_bout_number(self):
         """调整赛制数字对话框"""
@@ -1143,7 +4151,7 @@ class TransparentScoreboardApp:
         )
         if new_bout:
             self.bout_number = new_bout
-            self.update_image_display()
+            self.request_render()
 
     def position_window(self):
         """定位窗口至屏幕顶部居中"""
@@ -1169,33 +4177,136 @@ class TransparentScoreboardApp:
             self.dragging = True
             self.offset_x = event.x
             self.offset_y = event.y
+            self.window_position = None  # 窗口可能已被其他方式移动
+            if self.snap_distance:
+                # 吸附位置：屏幕左右边缘、水平居中、上下边缘（拖动过程中不再查询窗口和屏幕尺寸）
+                width, height = self.root.winfo_width(), self.root.winfo_height()
+                screen_width, screen_height = self.root.winfo_screenwidth(), self.root.winfo_screenheight()
+                self.snap_targets = ((0, (screen_width - width) // 2, screen_width - width),
+                                     (0, screen_height - height))
 
     def on_drag_motion(self, event):
-        """拖动窗口过程"""
+        """拖动窗口过程：使用事件自带的屏幕坐标，窗口移动由DragThrottle按刷新间隔合并"""
         if self.dragging:
-            new_x = self.root.winfo_pointerx() - self.offset_x
-            new_y = self.root.winfo_pointery() - self.offset_y
-            self.root.geometry(f"+{new_x}+{new_y}")
+            self.drag_throttle.motion(event.x_root - self.offset_x, event.y_root - self.offset_y)
+
+    def on_drag_end(self, event):
+        """结束拖动：立即移动到最终位置"""
+        if not self.dragging:
+            return
+        self.dragging = False
+        self.drag_throttle.flush()
+        if PROFILER.enabled:
+            stats = self.drag_throttle.stats()
+            print(f"拖动: 收到 {stats['events']} 个移动事件，移动窗口 {stats['geometry_calls']} 次")
+
+    def move_window(self, x, y):
+        """把窗口移动到(x, y)（按需吸附），位置没有变化时不调用geometry，返回是否移动了窗口"""
+        x = snap_position(x, self.snap_targets[0], self.snap_distance)
+        y = snap_position(y, self.snap_targets[1], self.snap_distance)
+        if (x, y) == self.window_position:
+            return False
+        self.window_position = (x, y)
+        with PROFILER.stage("drag_geometry"):
+            self.root.geometry(f"+{x}+{y}")
+        return True
 
     def quit_app(self, event=None):
-        """关闭应用"""
+        """关闭应用（多计分板时只关闭本窗口，其他计分板继续运行）"""
+        # 取消本计分板在Tk事件循环中安排的回调，避免窗口销毁后继续执行
+        for name in ('control_poll_id', 'render_watch_id', 'switch_image_id', 'prefetch_id', 'taskbar_fix_id'):
+            after_id = getattr(self, name, None)
+            if after_id:
+                self.root.after_cancel(after_id)
+                setattr(self, name, None)
+        self.render_scheduler.cancel()
+        if getattr(self, 'drag_throttle', None):
+            self.drag_throttle.cancel()
+        if getattr(self, 'render_worker', None):
+            self.render_worker.stop()
+        if self.control_server is not None:
+            self.control_server.stop()
+            self.control_server = None
+        for sink in self.sinks:
+            sink.close()
+        if self.record_path:
+            try:
+                self.export_session(self.record_path)
+            except OSError as e:
+                print(f"警告: 无法导出会话 {self.record_path}: {e}")
+        if PROFILER.enabled and PROFILER.trace_path:
+            PROFILER.dump_chrome_trace(PROFILER.trace_path)
         self.root.destroy()
 
 
-def main():
-    # 启动配置窗口
-    config_root = tk.Tk()
-    config_window = ScoreboardConfigWindow(config_root)
+# 计分板字段（left_text、left_score、区域、颜色等）读写当前的不可变状态
+for _field in BoardState.FIELDS:
+    setattr(TransparentScoreboardApp, _field, board_state_property(_field))
+del _field
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="心灵终结计分板")
+    parser.add_argument("--profile", action="store_true", help="开启渲染性能分析")
+    parser.add_argument("--profile-overlay", action="store_true", help="在计分板上显示最近一帧耗时（隐含--profile）")
+    parser.add_argument("--trace", metavar="PATH", help="退出时导出Chrome trace文件（隐含--profile）")
+    parser.add_argument("--preset", nargs="?", const="", metavar="NAME",
+                        help="跳过配置窗口，直接使用指定预设启动（不带名称时使用上次的配置）")
+    parser.add_argument("--config", metavar="PATH",
+                        help=f"使用指定的预设文件（默认{CONFIG_FILE}）；单独使用时直接以其中上次的配置启动")
+    parser.add_argument("--board", action="append", metavar="NAME",
+                        help="在同一进程中按预设启动多个计分板，可重复指定（空名称表示上次的配置）；"
+                             "各计分板的输出和会话文件名加上预设名称后缀，控制接口端口依次加一")
+    parser.add_argument("--png", metavar="PATH", help="把每个变化的帧写入PNG文件（先写临时文件再替换，可作为OBS图片源）")
+    parser.add_argument("--shm", metavar="PATH", help="把每帧写入内存映射的RGBA帧缓冲区文件（供本地合成程序零拷贝读取）")
+    parser.add_argument("--control", nargs="?", const=CONTROL_PORT, type=int, metavar="PORT",
+                        help=f"开启本机HTTP/WebSocket控制接口（默认端口{CONTROL_PORT}）")
+    parser.add_argument("--snap", nargs="?", const=DRAG_SNAP_DISTANCE, default=0, type=int, metavar="PX",
+                        help=f"拖动时吸附到屏幕边缘和水平居中位置（默认距离{DRAG_SNAP_DISTANCE}像素）")
+    parser.add_argument("--record", metavar="PATH",
+                        help="退出时把本次操作记录导出为会话文件（可用benchmark.py --replay回放）")
+    parser.add_argument("--startup-report", action="store_true", help="首帧显示后打印启动耗时报告")
+    parser.add_argument("--startup-check", action="store_true",
+                        help="首帧显示后打印启动耗时报告并退出，超出预算时返回非零退出码")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    global PROFILE_OVERLAY
+    args = parse_args(argv)
+    if args.profile or args.profile_overlay or args.trace:
+        PROFILER.enabled = True
+        PROFILER.trace_path = args.trace
+        PROFILE_OVERLAY = PROFILE_OVERLAY or args.profile_overlay
+
+    # 多个计分板：每个计分板使用一个预设
+    if args.board:
+        configs = [load_launch_config(name, args.config) for name in args.board]
+        if any(config is None for config in configs):
+            return 1
+        return launch_boards(list(zip(args.board, configs)), args)
+
+    # 指定预设时跳过配置窗口
+    if args.preset is not None or args.config:
+        config = load_launch_config(args.preset or "", args.config)
+        if config is None:
+            return 1
+        return launch_app(config, args)
+
+    # 启动配置窗口（配置窗口和计分板共用同一个Tk根窗口）
+    root = tk.Tk()
+    config_window = ScoreboardConfigWindow(root)
 
     # 设置配置窗口图标
     icon_path = find_icon_path()
     if icon_path and os.path.exists(icon_path):
         try:
-            config_root.iconbitmap(icon_path)
+            root.iconbitmap(icon_path)
         except:
             print("警告: 无法设置配置窗口图标")
 
-    config_root.mainloop()
+    root.mainloop()
 
     # 获取配置参数
     left_text = config_window.left_text
@@ -1216,7 +4327,9 @@ def main():
 
     # 启动主窗口
     if left_text or right_text or left_score is not None or right_score is not None:
-        root = tk.Tk()
+        # 隐藏后重新配置根窗口，避免再创建一个Tk解释器
+        root.withdraw()
+        root.resizable(True, True)
         root.title("心灵终结计分板")  # 设置窗口标题，显示在任务栏
         app = TransparentScoreboardApp(
             root, left_text, right_text,
@@ -1224,9 +4337,121 @@ def main():
             left_parallelogram, right_parallelogram,
             left_score_region, right_score_region,
             bout_region_offset_x, bout_region_offset_y,
-            image_path
+            image_path, sinks=create_frame_sinks(args.png, args.shm), control_port=args.control,
+            record_path=args.record, snap_distance=args.snap
         )
-        root.mainloop()
+        root.deiconify()
+        return run_app([app], args)
+    root.destroy()
+    return 0
+
+
+def load_launch_config(name, path=None):
+    """从预设文件读取启动配置，name为空时使用上次的配置，找不到时返回None"""
+    presets = load_presets(path)
+    if not name:
+        if presets["last"] is None:
+            print(f"错误: 预设文件 {path or CONFIG_FILE} 中没有上次使用的配置")
+        return presets["last"]
+    config = presets["presets"].get(name)
+    if config is None:
+        available = "、".join(sorted(presets["presets"])) or "无"
+        print(f"错误: 找不到预设 {name}（可用预设: {available}）")
+    return config
+
+
+def launch_app(config, args):
+    """跳过配置窗口直接启动计分板：创建Tk窗口的同时在后台线程中预渲染首帧"""
+    prerendered = {}
+    prerender_thread = threading.Thread(
+        target=lambda: prerendered.setdefault("renderer", prerender_first_frame(config)), daemon=True)
+    prerender_thread.start()
+
+    root = tk.Tk()
+    root.withdraw()
+    root.title("心灵终结计分板")  # 设置窗口标题，显示在任务栏
+    prerender_thread.join()
+
+    app = TransparentScoreboardApp(root, **config, renderer=prerendered.get("renderer"),
+                                   sinks=create_frame_sinks(args.png, args.shm), control_port=args.control,
+                                   record_path=args.record, snap_distance=args.snap)
+    root.deiconify()
+    return run_app([app], args)
+
+
+def board_output_path(path, name):
+    """多个计分板时在输出文件名后加上计分板名称，如 frame.png -> frame-主舞台.png"""
+    if not path or not name:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}-{name}{ext}"
+
+
+def launch_boards(configs, args):
+    """在同一进程中启动多个计分板：共用一个Tk解释器以及字体、背景和字形缓存，每个计分板有独立的窗口、状态和区域
+
+    configs为(名称, 配置)列表，每个计分板是隐藏根窗口下的一个Toplevel，全部关闭后退出
+    """
+    root = tk.Tk()
+    root.withdraw()
+
+    apps = []
+
+    def board_closed(event, window):
+        # 只处理计分板窗口本身（子控件销毁时也会触发）
+        if event.widget is not window:
+            return
+        if not any(app.root is not window and app.root.winfo_exists() for app in apps):
+            root.after_idle(root.destroy)
+
+    names = set()
+    for index, (name, config) in enumerate(configs):
+        name = name or "上次"
+        if name in names:
+            name = f"{name}{index + 1}"
+        names.add(name)
+
+        window = tk.Toplevel(root)
+        window.withdraw()
+        output_name = name if len(configs) > 1 else None
+        app = TransparentScoreboardApp(
+            window, **config, name=name,
+            sinks=create_frame_sinks(board_output_path(args.png, output_name), board_output_path(args.shm, output_name)),
+            control_port=None if args.control is None else args.control + index,
+            record_path=board_output_path(args.record, output_name), snap_distance=args.snap)
+        window.bind("<Destroy>", lambda event, window=window: board_closed(event, window), add="+")
+        apps.append(app)
+
+    # 计分板窗口从屏幕顶部依次向下排列
+    offset = 0
+    for app in apps:
+        if hasattr(app, 'photo'):
+            screen_width, screen_height = app.root.winfo_screenwidth(), app.root.winfo_screenheight()
+            x = max(0, (screen_width - app.photo.width()) // 2)
+            app.root.geometry(f"+{x}+{offset}")
+            offset = (offset + app.photo.height()) % max(1, screen_height)
+        app.root.deiconify()
+    return run_app(apps, args)
+
+
+def run_app(apps, args):
+    """进入计分板事件循环，按需在首帧显示后输出启动耗时报告"""
+    result = {"code": 0}
+
+    def report_startup():
+        lines, over_budget = startup_report()
+        print("启动耗时:")
+        for line in lines:
+            print(f"  {line}")
+        if args.startup_check:
+            result["code"] = 1 if over_budget else 0
+            for app in apps:
+                app.quit_app()
+
+    if args.startup_report or args.startup_check:
+        apps[0].root.after_idle(report_startup)
+    apps[0].root.mainloop()
+    return result["code"]
 
 
 def find_icon_path():
@@ -1252,5 +4477,89 @@ def find_icon_path():
     return None
 
 
+def get_resource_path(relative_path):
+    """获取资源文件的绝对路径（适配PyInstaller打包，独立函数，用于预渲染首帧）"""
+    if getattr(sys, 'frozen', False):
+        # 打包后环境：获取临时目录路径
+        base_path = sys._MEIPASS
+    else:
+        # 开发环境：使用当前文件所在目录
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+def find_image_path():
+    """查找图片路径，支持不同系统的路径格式（独立函数，用于预渲染首帧）"""
+    # 如果有自定义图片路径，优先使用
+    if custom_image_path and os.path.exists(custom_image_path):
+        return custom_image_path
+
+    # 尝试UI文件夹
+    ui_dir = get_resource_path(CUSTOM_IMAGE_FOLDER)
+    if os.path.exists(ui_dir) and os.path.isdir(ui_dir):
+        # 查找默认图片
+        default_path = os.path.join(ui_dir, DEFAULT_IMAGE_NAME)
+        if os.path.exists(default_path):
+            return default_path
+
+        # 使用模板索引中的第一个模板
+        templates = TEMPLATE_INDEX.templates()
+        if templates:
+            return templates[0]["path"]
+
+    # 如果找不到，尝试当前目录
+    for file in os.listdir(os.getcwd()):
+        if file.lower().endswith(IMAGE_EXTENSIONS):
+            return os.path.join(os.getcwd(), file)
+
+    # 如果仍然找不到，返回None
+    return None
+
+
+def find_font_path(text=""):
+    """查找黑体字体（独立函数，用于无界面渲染），text为需要显示的文字，硬编码字体不支持时查询系统字体索引
+
+    返回(字体路径, TTC/OTC中的字体索引)，找不到任何字体时返回(None, 0)
+    """
+    if CURRENT_OS == "Windows":
+        win_fonts = [
+            "C:/Windows/Fonts/simhei.ttf",  # 黑体
+            "C:/Windows/Fonts/simsun.ttc",  # 宋体
+            "C:/Windows/Fonts/msyh.ttc",  # 微软雅黑
+        ]
+        for font_path in win_fonts:
+            if FONT_INDEX.covers(font_path, text):
+                FONT_INDEX.flush()
+                return font_path, 0
+
+    elif CURRENT_OS == "Linux":
+        linux_fonts = [
+            "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",  # 文泉驿微米黑
+            "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",  # Noto Sans CJK
+            "/usr/share/fonts/truetype/simhei.ttf",  # 常见黑体路径
+        ]
+        for font_path in linux_fonts:
+            if FONT_INDEX.covers(font_path, text):
+                FONT_INDEX.flush()
+                return font_path, 0
+
+    elif CURRENT_OS == "Darwin":  # macOS
+        mac_fonts = [
+            "/System/Library/Fonts/PingFang.ttc",  # 苹方
+            "/Library/Fonts/SimHei.ttf",  # 黑体
+            "/System/Library/Fonts/STHeiti Medium.ttc",  # 华文黑体
+        ]
+        for font_path in mac_fonts:
+            if FONT_INDEX.covers(font_path, text):
+                FONT_INDEX.flush()
+                return font_path, 0
+
+    # 如果找不到指定字体，从系统字体索引中查找支持这些文字的字体，仍找不到时返回None
+    face = FONT_INDEX.best_font(text)
+    return (face["path"], face["index"]) if face else (None, 0)
+
+
+STARTUP_PROFILER.record("import", IMPORT_START, time.perf_counter())
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""计分板批量渲染（无界面运行）：从CSV/JSON比赛列表渲染静态计分板图片（赛果卡片、录像封面等）
+
+比赛列表的字段与预设相同（left_text, right_text, left_score, right_score, font_size, bout_number,
+image_path, left_parallelogram, ...），未填写的字段使用配置窗口的默认值；区域在CSV中写作"380 60 780 90"。
+可选的output字段指定输出文件名（只能是文件名，不能包含目录），image_path为相对路径时相对于比赛列表所在目录。
+
+用法示例:
+    python batch_render.py matches.csv --out cards         # 使用所有CPU核心渲染，PNG保存到cards目录
+    python batch_render.py matches.json --workers 4        # 指定进程数
+    python batch_render.py matches.csv --scaling           # 测量1到N个进程的渲染速度（图片/秒）
+"""
+import argparse
+import concurrent.futures
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import Scoreboard
+from Scoreboard import ScoreboardRenderer, create_placeholder_image, find_font_path, find_image_path, parse_config
+
+# 每个工作进程自己的背景缓存（字体、字号适配和分数字形缓存本来就是进程级的）
+_backgrounds = {}
+
+
+def load_matches(path):
+    """读取CSV或JSON比赛列表，返回校验后的配置列表，不合法时抛出ValueError"""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get("matches", [])
+        if not isinstance(rows, list):
+            raise ValueError("JSON比赛列表必须为数组或包含matches数组的对象")
+    else:
+        # utf-8-sig兼容Excel导出的带BOM的CSV
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    matches = []
+    for number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            raise ValueError(f"第{number}场比赛必须为对象")
+        # CSV中的空白单元格使用默认值
+        values = {field: value for field, value in row.items() if field and value not in ("", None)}
+        for field in Scoreboard.PRESET_REGION_FIELDS:
+            if isinstance(values.get(field), str):
+                values[field] = values[field].replace(",", " ").split()
+        try:
+            config = parse_config(values)
+        except ValueError as e:
+            raise ValueError(f"第{number}场比赛: {e}")
+        image_path = config["image_path"]
+        if image_path and not os.path.isabs(image_path) and os.path.exists(os.path.join(base_dir, image_path)):
+            config["image_path"] = os.path.join(base_dir, image_path)
+        try:
+            config["output"] = output_name(values["output"]) if "output" in values else default_output_name(number, config)
+        except ValueError as e:
+            raise ValueError(f"第{number}场比赛: {e}")
+        matches.append(config)
+    return matches
+
+
+def output_name(output):
+    """校验比赛列表中的输出文件名：只能是文件名，不能是绝对路径或包含目录，不合法时抛出ValueError"""
+    output = str(output)
+    name = os.path.basename(output.replace("\\", "/"))
+    if name != output or name in (".", "..") or os.path.isabs(output) or os.path.splitdrive(output)[0]:
+        raise ValueError(f"输出文件名不能包含目录: {output}")
+    return name
+
+
+def output_path(out_dir, name):
+    """返回输出文件的路径，name不是文件名或解析后（包括符号链接）不在out_dir中时抛出ValueError"""
+    root = os.path.realpath(out_dir)
+    path = os.path.realpath(os.path.join(root, output_name(name)))
+    if os.path.dirname(path) != root:
+        raise ValueError(f"输出路径不在输出目录中: {name}")
+    return path
+
+
+def default_output_name(number, config):
+    """按序号和队伍名称生成输出文件名"""
+    name = f"{number:04d}_{config['left_text']}_vs_{config['right_text']}"
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name) + ".png"
+
+
+def open_background(image_path):
+    """打开背景图片，同一工作进程中只解码（或映射）一次"""
+    background = _backgrounds.get(image_path)
+    if background is None:
+        if not image_path or not os.path.exists(image_path):
+            background = create_placeholder_image(1920, 1080, "未找到背景图片")
+        else:
+            background = Scoreboard.BACKGROUND_CACHE.open(image_path)
+        _backgrounds[image_path] = background
+    return background
+
+
+def render_match(task):
+    """渲染一场比赛并保存PNG，返回(输出路径, 耗时毫秒, 错误信息或None)"""
+    config, output_path, compress_level = task
+    start = time.perf_counter()
+    try:
+        background = open_background(config["image_path"] or find_image_path())
+        font_path, font_index = find_font_path(config["left_text"] + config["right_text"])
+        renderer = ScoreboardRenderer(
+            background, config["left_text"], config["right_text"],
+            config["left_score"], config["right_score"], config["font_size"], config["bout_number"],
+            config["left_parallelogram"], config["right_parallelogram"],
+            config["left_score_region"], config["right_score_region"],
+            config["bout_region_offset_x"], config["bout_region_offset_y"],
+            font_path=font_path, font_index=font_index,
+        )
+        renderer.render()
+        renderer.image.save(output_path, "PNG", compress_level=compress_level)
+    except Exception as e:
+        return output_path, (time.perf_counter() - start) * 1000, str(e)
+    return output_path, (time.perf_counter() - start) * 1000, None
+
+
+def render_all(matches, out_dir, workers, compress_level=Scoreboard.FRAME_PNG_COMPRESS_LEVEL):
+    """渲染所有比赛，workers大于1时分配到进程池，返回(结果列表, 总耗时秒)
+
+    输出路径不在out_dir中的比赛不渲染，作为失败结果返回
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = []
+    rejected = []
+    for config in matches:
+        try:
+            tasks.append((config, output_path(out_dir, config["output"]), compress_level))
+        except ValueError as e:
+            rejected.append((os.path.join(out_dir, config["output"]), 0.0, str(e)))
+    start = time.perf_counter()
+    if workers <= 1:
+        results = [render_match(task) for task in tasks]
+    else:
+        # 分块提交，减少进程间通信次数；每个进程保留自己的字体和背景缓存
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(render_match, tasks, chunksize=chunksize))
+    return rejected + results, time.perf_counter() - start
+
+
+def worker_counts(max_workers):
+    """测量扩展性时使用的进程数：1, 2, 4, ... 以及max_workers"""
+    counts = []
+    count = 1
+    while count < max_workers:
+        counts.append(count)
+        count *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="计分板批量渲染")
+    parser.add_argument("matches", help="比赛列表（.csv或.json）")
+    parser.add_argument("--out", default="scoreboard_cards", help="输出目录")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数（默认CPU核心数）")
+    parser.add_argument("--compress-level", type=int, default=Scoreboard.FRAME_PNG_COMPRESS_LEVEL,
+                        choices=range(10), metavar="0-9", help="PNG压缩级别")
+    parser.add_argument("--scaling", action="store_true",
+                        help="不保留输出，测量1到--workers个进程的渲染速度（图片/秒）")
+    args = parser.parse_args(argv)
+
+    try:
+        matches = load_matches(args.matches)
+    except (OSError, ValueError) as e:
+        print(f"错误: 无法读取比赛列表 {args.matches}: {e}")
+        return 1
+    if not matches:
+        print("比赛列表为空")
+        return 0
+
+    if args.scaling:
+        out_dir = tempfile.mkdtemp(prefix="scoreboard_cards_")
+        try:
+            baseline = None
+            print("进程数      图片/秒    加速比")
+            for workers in worker_counts(max(1, args.workers)):
+                _, elapsed = render_all(matches, out_dir, workers, args.compress_level)
+                rate = len(matches) / elapsed
+                baseline = baseline or rate
+                print(f"{workers:6d}  {rate:10.1f}  {rate / baseline:7.2f}x")
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+        return 0
+
+    results, elapsed = render_all(matches, args.out, args.workers, args.compress_level)
+    failures = [(path, error) for path, _, error in results if error]
+    for path, error in failures:
+        print(f"错误: {path}: {error}")
+    rendered = len(results) - len(failures)
+    print(f"已渲染 {rendered} 张图片到 {args.out}，耗时 {elapsed:.2f} 秒（{rendered / elapsed:.1f} 张/秒，{args.workers} 个进程）")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""计分板渲染基准测试（无界面运行）
+
+用法示例:
+    python benchmark.py                       # 运行全部场景并打印结果
+    python benchmark.py --json result.json    # 同时保存JSON结果
+    python benchmark.py --compare old.json    # 与旧版本结果对比，性能退化时返回非零退出码
+    python benchmark.py --profile --trace t.json  # 按渲染阶段统计耗时并导出Chrome trace
+    python benchmark.py --startup             # 在新进程中测量冷启动耗时，超出预算时返回非零退出码
+    python benchmark.py --sink png            # 测量包含帧输出（png/shm）的耗时
+    python benchmark.py --boards 8            # 测量同一进程中1-8个计分板的内存占用和每帧耗时
+    python benchmark.py --replay session.json # 按最快速度回放Scoreboard.py --record录制的会话
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import PIL
+from PIL import Image
+
+import Scoreboard
+from Scoreboard import ScoreboardRenderer, create_placeholder_image, find_font_path
+
+# 测试用队伍名称
+NAME_SETS = {
+    "ascii": ("Team Liquid", "Natus Vincere"),
+    "cjk": ("纳瑞亚之星战队", "心灵终结俱乐部"),
+}
+
+# 测试用字体大小
+FONT_SIZES = (10, 50, 100, 200)
+
+# 测试的操作（对应界面上的更新分数、更新文字、调整字体大小、调整区域）
+OPERATIONS = ("update_score", "update_text", "change_font_size", "change_regions")
+
+
+def load_backgrounds():
+    """准备测试背景：默认模板、无背景时的1920x1080占位图、4K背景"""
+    backgrounds = {}
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                Scoreboard.CUSTOM_IMAGE_FOLDER, Scoreboard.DEFAULT_IMAGE_NAME)
+    if os.path.exists(default_path):
+        backgrounds["default"] = Image.open(default_path).convert("RGBA")
+    backgrounds["fallback_1080p"] = create_placeholder_image(1920, 1080, "未找到背景图片")
+    # 4K背景：默认模板放大2倍后置于3840x2160画布顶部，区域坐标同样放大2倍
+    source = backgrounds.get("default", backgrounds["fallback_1080p"])
+    background_4k = Image.new("RGBA", (3840, 2160), (0, 0, 0, 0))
+    background_4k.paste(source.resize((source.width * 2, source.height * 2), Image.BILINEAR), (0, 0))
+    backgrounds["4k"] = background_4k
+    return backgrounds
+
+
+def scale_region(region, scale):
+    """按背景宽度缩放区域坐标"""
+    return tuple(round(value * scale) for value in region)
+
+
+def make_renderer(background, names, font_size, font_path, font_index=0):
+    """创建与界面默认配置一致的渲染器，区域按背景宽度相对1920像素缩放"""
+    scale = background.width / 1920
+    return ScoreboardRenderer(
+        background, names[0], names[1], 0, 0, font_size, 5,
+        scale_region(Scoreboard.LEFT_PARALLELOGRAM, scale),
+        scale_region(Scoreboard.RIGHT_PARALLELOGRAM, scale),
+        scale_region(Scoreboard.LEFT_SCORE_REGION, scale),
+        scale_region(Scoreboard.RIGHT_SCORE_REGION, scale),
+        round(Scoreboard.BOUT_REGION_OFFSET_X * scale), round(Scoreboard.BOUT_REGION_OFFSET_Y * scale),
+        font_path=font_path, font_index=font_index,
+    )
+
+
+def make_operation(renderer, operation, names, font_size):
+    """返回执行第i次操作的函数，每次操作都会产生真实的状态变化"""
+    if operation == "update_score":
+        def step(i):
+            renderer.update(left_score=(i + 1) % 21)
+    elif operation == "update_text":
+        def step(i):
+            renderer.update(left_text=f"{names[0]}{i}", right_text=f"{names[1]}{i}")
+    elif operation == "change_font_size":
+        def step(i):
+            # 在10-200之间游走，与基准字号交替
+            renderer.update(font_size=font_size if i % 2 else 10 + (i * 7) % 191)
+    else:
+        left, right = renderer.left_region, renderer.right_region
+
+        def step(i):
+            shift = (i % 10) + 1
+            renderer.update(left_region=(left[0] + shift, left[1], left[2] + shift, left[3]),
+                            right_region=(right[0] - shift, right[1], right[2] - shift, right[3]))
+    return step
+
+
+def startup_stages():
+    """在当前进程中执行启动流程（无界面），返回各阶段耗时（毫秒），需在刚导入Scoreboard的新进程中调用"""
+    startup = Scoreboard.STARTUP_PROFILER
+    with startup.stage("font_discovery"):
+        font_path, font_index = find_font_path()
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                Scoreboard.CUSTOM_IMAGE_FOLDER, Scoreboard.DEFAULT_IMAGE_NAME)
+    with startup.stage("first_frame"):
+        if os.path.exists(default_path):
+            with startup.stage("image_decode"):
+                background = Scoreboard.BACKGROUND_CACHE.open(default_path)
+        else:
+            background = create_placeholder_image(1920, 1080, "未找到背景图片")
+        renderer = make_renderer(background, NAME_SETS["cjk"], 50, font_path, font_index)
+        renderer.take_frame(renderer.render())
+    startup.record("total", Scoreboard.IMPORT_START, time.perf_counter())
+    return dict(startup.last)
+
+
+def measure_startup():
+    """启动新的Python进程测量冷启动（导入、字体查找、图片解码、首帧），返回各阶段耗时（毫秒）"""
+    code = "import Scoreboard, benchmark, json; print(json.dumps(benchmark.startup_stages()))"
+    output = subprocess.check_output([sys.executable, "-c", code],
+                                     cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def current_rss_mb():
+    """返回当前进程的常驻内存（MB），无法获取时返回None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # 没有/proc时使用峰值常驻内存（macOS单位为字节，其他系统为KB）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def board_scaling_stats(boards, iterations):
+    """在当前进程中创建boards个计分板渲染器（共用字体、背景和字形缓存），轮流更新分数，
+    返回常驻内存和每帧耗时，需在刚导入Scoreboard的新进程中调用
+    """
+    font_path, font_index = find_font_path()
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                Scoreboard.CUSTOM_IMAGE_FOLDER, Scoreboard.DEFAULT_IMAGE_NAME)
+    renderers = []
+    for index in range(boards):
+        if os.path.exists(default_path):
+            background = Scoreboard.BACKGROUND_CACHE.open(default_path)
+        else:
+            background = create_placeholder_image(1920, 1080, "未找到背景图片")
+        names = tuple(f"{name}{index}" for name in NAME_SETS["cjk"])
+        renderer = make_renderer(background, names, 50, font_path, font_index)
+        renderer.take_frame(renderer.render())
+        renderers.append(renderer)
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        for renderer in renderers:
+            renderer.update(left_score=(i + 1) % 21)
+            renderer.take_frame(renderer.render())
+    elapsed = time.perf_counter() - start
+    return {"boards": boards, "rss_mb": current_rss_mb(),
+            "frame_ms": elapsed * 1000 / (iterations * boards)}
+
+
+def measure_board_scaling(max_boards, iterations):
+    """分别在新进程中运行1到max_boards个计分板，返回每种数量的结果列表"""
+    results = []
+    for boards in range(1, max_boards + 1):
+        code = (f"import benchmark, json; "
+                f"print(json.dumps(benchmark.board_scaling_stats({boards}, {iterations})))")
+        output = subprocess.check_output([sys.executable, "-c", code],
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+        results.append(json.loads(output.decode("utf-8").strip().splitlines()[-1]))
+    return results
+
+
+def percentile(sorted_values, fraction):
+    """最近秩法计算百分位数"""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(background, names, font_size, operation, font_path, iterations, warmup, sink=None, font_index=0):
+    """运行单个场景，返回延迟统计（毫秒），sink为"png"或"shm"时同时测量帧输出"""
+    renderer = make_renderer(background, names, font_size, font_path, font_index)
+    renderer.render()
+    frame_sink = None
+    if sink:
+        output_path = os.path.join(tempfile.gettempdir(), f"scoreboard_benchmark.{sink}")
+        frame_sink = Scoreboard.PngFileSink(output_path) if sink == "png" else Scoreboard.SharedMemorySink(output_path)
+        renderer.add_sink(frame_sink)
+    step = make_operation(renderer, operation, names, font_size)
+
+    for i in range(warmup):
+        step(i)
+        renderer.render()
+
+    samples = []
+    measurements = 0
+    for i in range(warmup, warmup + iterations):
+        start = time.perf_counter()
+        step(i)
+        boxes = renderer.render()
+        measurements += renderer.frame_measurements
+        # 与界面一致：整帧或变化区域需要取出交给PhotoImage
+        if boxes is None:
+            renderer.image.tobytes()
+        else:
+            for box in boxes:
+                renderer.image.crop(box).tobytes()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    total = sum(samples)
+    sink_stats = {}
+    if frame_sink is not None:
+        sink_stats = {"sink_" + key: value for key, value in frame_sink.stats().items()}
+        frame_sink.close()
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+        "p99_ms": percentile(samples, 0.99),
+        "mean_ms": total / len(samples),
+        "ops_per_sec": len(samples) / (total / 1000) if total else float("inf"),
+        "measurements_per_frame": measurements / iterations,
+        **sink_stats,
+    }
+
+
+def run_benchmarks(iterations=100, warmup=5, font_path=None, only=None, sink=None, font_index=0):
+    """运行所有场景，返回可序列化的结果字典"""
+    Scoreboard.FONT_CACHE.clear()
+    Scoreboard.FIT_CACHE.clear()
+    Scoreboard.SCORE_ATLAS.clear()
+    Scoreboard.TEXT_LAYER_CACHE.clear()
+    Scoreboard.TEXT_METRICS.clear()
+
+    results = {}
+    for background_name, background in load_backgrounds().items():
+        for names_name, names in NAME_SETS.items():
+            for font_size in FONT_SIZES:
+                for operation in OPERATIONS:
+                    scenario = f"{background_name}/{names_name}/size{font_size}/{operation}"
+                    if only and only not in scenario:
+                        continue
+                    results[scenario] = run_scenario(background, names, font_size, operation,
+                                                     font_path, iterations, warmup, sink, font_index)
+                    print(f"{scenario:<50} p50 {results[scenario]['p50_ms']:8.3f} ms  "
+                          f"p95 {results[scenario]['p95_ms']:8.3f} ms  "
+                          f"p99 {results[scenario]['p99_ms']:8.3f} ms  "
+                          f"{results[scenario]['ops_per_sec']:10.1f} ops/s  "
+                          f"测量 {results[scenario]['measurements_per_frame']:6.2f} 次/帧")
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "font_path": font_path,
+            "font_index": font_index,
+            "outline_mode": Scoreboard.OUTLINE_MODE,
+            "smooth_factor": Scoreboard.SMOOTH_FACTOR,
+            "sink": sink,
+            "iterations": iterations,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "caches": {
+            "font": Scoreboard.FONT_CACHE.stats(),
+            "fit": Scoreboard.FIT_CACHE.stats(),
+            "score_atlas": Scoreboard.SCORE_ATLAS.stats(),
+            "text_layer": Scoreboard.TEXT_LAYER_CACHE.stats(),
+            "text_metrics": Scoreboard.TEXT_METRICS.stats(),
+        },
+        "scenarios": results,
+    }
+
+
+def compare_results(baseline, current, threshold):
+    """对比两次结果的p50，返回退化超过阈值（百分比）的场景列表"""
+    regressions = []
+    for scenario, stats in current["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(scenario)
+        if not old or not old["p50_ms"]:
+            continue
+        change = (stats["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+        marker = ""
+        if change > threshold:
+            marker = "  <-- 退化"
+            regressions.append(scenario)
+        print(f"{scenario:<50} {old['p50_ms']:8.3f} -> {stats['p50_ms']:8.3f} ms ({change:+6.1f}%){marker}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="计分板渲染基准测试")
+    parser.add_argument("--iterations", type=int, default=100, help="每个场景的测量次数")
+    parser.add_argument("--warmup", type=int, default=5, help="每个场景的预热次数")
+    parser.add_argument("--font", default=None, help="字体文件路径（默认自动查找）")
+    parser.add_argument("--only", default=None, help="只运行名称包含该字符串的场景")
+    parser.add_argument("--json", default=None, help="保存JSON结果的路径")
+    parser.add_argument("--compare", default=None, help="用于对比的旧JSON结果")
+    parser.add_argument("--threshold", type=float, default=10.0, help="判定为退化的p50增幅（百分比）")
+    parser.add_argument("--profile", action="store_true", help="按渲染阶段统计耗时")
+    parser.add_argument("--trace", default=None, help="导出Chrome trace的路径（隐含--profile）")
+    parser.add_argument("--smooth", type=int, default=None, metavar="N",
+                        help=f"文字超采样倍数（默认{Scoreboard.SMOOTH_FACTOR}，1表示不超采样）")
+    parser.add_argument("--sink", choices=("png", "shm"), default=None, help="同时测量帧输出的耗时")
+    parser.add_argument("--startup", action="store_true", help="只测量冷启动耗时并与预算对比")
+    parser.add_argument("--replay", default=None, metavar="PATH",
+                        help="只回放录制的会话（Scoreboard.py --record导出），每个操作渲染一帧")
+    parser.add_argument("--boards", type=int, default=None, metavar="N",
+                        help="只测量同一进程中1到N个计分板的内存占用和每帧耗时")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        lines, over_budget = Scoreboard.startup_report(measure_startup())
+        print("启动耗时:")
+        for line in lines:
+            print(f"  {line}")
+        return 1 if over_budget else 0
+
+    if args.replay:
+        _, samples = Scoreboard.replay_session(args.replay)
+        if not samples:
+            print("会话中没有事件")
+            return 0
+        total = sum(samples)
+        samples.sort()
+        print(f"回放 {len(samples)} 帧  p50 {percentile(samples, 0.50):8.3f} ms  "
+              f"p95 {percentile(samples, 0.95):8.3f} ms  p99 {percentile(samples, 0.99):8.3f} ms  "
+              f"{len(samples) / (total / 1000) if total else float('inf'):10.1f} 帧/秒")
+        return 0
+
+    if args.boards:
+        results = measure_board_scaling(args.boards, args.iterations)
+        standalone = results[0]["rss_mb"]
+        print("计分板数  常驻内存      每增加一个计分板      每帧耗时")
+        for stats in results:
+            line = f"{stats['boards']:8d}  "
+            if stats["rss_mb"] is None:
+                line += f"{'未知':>10}  {'':>22}"
+            else:
+                line += f"{stats['rss_mb']:7.1f} MB  "
+                if stats["boards"] > 1:
+                    extra = (stats["rss_mb"] - standalone) / (stats["boards"] - 1)
+                    line += f"{extra:7.1f} MB ({extra / standalone * 100:5.1f}% 单进程)"
+                else:
+                    line += f"{'':>22}"
+            print(line + f"  {stats['frame_ms']:8.3f} ms")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"boards": results}, f, ensure_ascii=False, indent=2)
+            print(f"结果已保存到 {args.json}")
+        return 0
+
+    if args.smooth is not None:
+        Scoreboard.set_smooth_factor(args.smooth)
+
+    if args.profile or args.trace:
+        Scoreboard.PROFILER.enabled = True
+        Scoreboard.PROFILER.reset()
+
+    font_path, font_index = (args.font, 0) if args.font else find_font_path()
+    if not font_path:
+        print("警告: 未找到黑体字体，使用默认字体（不可缩放，字号场景结果相同）")
+
+    result = run_benchmarks(args.iterations, args.warmup, font_path, args.only, args.sink, font_index)
+
+    if Scoreboard.PROFILER.enabled:
+        result["stages"] = Scoreboard.PROFILER.summary()
+        for stage, stats in result["stages"].items():
+            print(f"阶段 {stage:<16} {stats['count']:8d} 次  平均 {stats['mean_ms']:8.3f} ms  "
+                  f"p95 {stats['p95_ms']:8.3f} ms  最大 {stats['max_ms']:8.3f} ms")
+        if args.trace:
+            Scoreboard.PROFILER.dump_chrome_trace(args.trace)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, result, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} 个场景性能退化超过 {args.threshold}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import os
+import sys
+
+import pytest
+
+# 测试直接导入仓库根目录下的Scoreboard.py等脚本
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Scoreboard  # noqa: E402
+
+
+class FakeRoot:
+    """代替Tk根窗口：after/after_idle只记录回调，由pump()按顺序执行"""
+
+    def __init__(self):
+        self.queue = {}
+        self.next_id = 0
+        self.destroyed = False
+        self.focus = None  # focus_get()返回的控件
+        self.bindings = {}
+        self.protocols = {}
+        self.tk = self
+
+    def after(self, ms, func=None, *args):
+        self.next_id += 1
+        self.queue[self.next_id] = (func, args)
+        return self.next_id
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, after_id):
+        self.queue.pop(after_id, None)
+
+    def bind(self, sequence, func):
+        self.bindings[sequence] = func
+
+    def protocol(self, name, func):
+        self.protocols[name] = func
+
+    def destroy(self):
+        self.destroyed = True
+
+    def focus_get(self):
+        return self.focus
+
+    def pump(self):
+        """执行所有已安排的回调（包括执行过程中新安排的）"""
+        while self.queue:
+            after_id = min(self.queue)
+            func, args = self.queue.pop(after_id)
+            func(*args)
+
+    def call(self, photo, command, tile, *args):
+        # 模拟PhotoImage的copy命令：把图块贴到目标位置
+        if command == "copy":
+            FakePhoto.instances[photo].image.paste(FakePhoto.instances[tile].image, (args[1], args[2]))
+
+
+class FakePhoto:
+    """代替ImageTk.PhotoImage，保存图片副本"""
+
+    instances = {}
+
+    def __init__(self, image=None, **kwargs):
+        self.image = image.copy()
+        FakePhoto.instances[str(id(self))] = self
+
+    def __str__(self):
+        return str(id(self))
+
+
+class FakeLabel:
+    def config(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def headless_app(monkeypatch):
+    """不创建Tk窗口的计分板应用：使用占位背景，渲染结果保存在app.photo.image中"""
+    monkeypatch.setattr(Scoreboard.ImageTk, "PhotoImage", FakePhoto)
+    font_path, font_index = Scoreboard.find_font_path("Alpha Bravo")
+    app = Scoreboard.TransparentScoreboardApp.__new__(Scoreboard.TransparentScoreboardApp)
+    app.root = FakeRoot()
+    app.state = Scoreboard.BoardState(left_text="Alpha", right_text="Bravo", bout_number=5,
+                                      font_path=font_path, font_index=font_index)
+    app.rendered_state = None
+    app.image_path = None
+    app.image_label = FakeLabel()
+    app.batch_depth = 0
+    app.batch_render_pending = False
+    app.event_log = Scoreboard.EventLog()
+    app.record_path = None
+    app.control_server = None
+    app.sinks = []
+    app.name = None
+    app.render_scheduler = Scoreboard.RenderScheduler(app.root, app.update_image_display, fps_cap=0)
+    app.load_and_display_image()
+    app.root.pump()
+    yield app
+    FakePhoto.instances.clear()
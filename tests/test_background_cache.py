@@ -0,0 +1,65 @@
+"""背景缓存测试：命中时内存映射的像素与解码结果相同，并发写入互不干扰，替换失败时只跳过本次写入"""
+import os
+import threading
+
+from PIL import Image
+
+import Scoreboard
+from Scoreboard import BackgroundCache
+
+
+def make_background(path, color=(10, 20, 30, 255)):
+    image = Image.new("RGBA", (64, 32), color)
+    image.putpixel((5, 7), (255, 0, 0, 128))
+    image.save(path)
+    return image
+
+
+def test_cached_background_matches_decoded(tmp_path):
+    expected = make_background(tmp_path / "bg.png")
+    cache = BackgroundCache(cache_dir=str(tmp_path / "cache"))
+    first = cache.open(str(tmp_path / "bg.png"))
+    assert first.tobytes() == expected.tobytes()
+    del first  # 进程中不再使用时，再次打开从磁盘映射
+
+    other = BackgroundCache(cache_dir=str(tmp_path / "cache"))
+    mapped = other.open(str(tmp_path / "bg.png"))
+    assert (other.hits, other.misses) == (1, 0)
+    assert mapped.tobytes() == expected.tobytes()
+
+
+def test_concurrent_stores_do_not_clobber(tmp_path):
+    expected = make_background(tmp_path / "bg.png")
+    caches = [BackgroundCache(cache_dir=str(tmp_path / "cache")) for _ in range(8)]
+    barrier = threading.Barrier(len(caches))
+
+    def store(cache):
+        barrier.wait()
+        cache.store("key", expected)
+
+    threads = [threading.Thread(target=store, args=(cache,)) for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(cache.enabled for cache in caches)
+    assert sorted(os.listdir(tmp_path / "cache")) == ["key_64x32.rgba"]
+    assert caches[0].map_cached("key").tobytes() == expected.tobytes()
+
+
+def test_failed_replace_skips_write(tmp_path, monkeypatch):
+    expected = make_background(tmp_path / "bg.png")
+    cache = BackgroundCache(cache_dir=str(tmp_path / "cache"))
+
+    def locked(src, dst):
+        raise PermissionError("文件正被其他进程使用")
+
+    monkeypatch.setattr(Scoreboard.os, "replace", locked)
+    cache.store("key", expected)
+    monkeypatch.undo()
+
+    assert cache.enabled
+    assert os.listdir(tmp_path / "cache") == []
+    cache.store("key", expected)
+    assert cache.map_cached("key").tobytes() == expected.tobytes()
@@ -0,0 +1,70 @@
+"""批量更新测试：一批指令只渲染一次，校验失败或执行出错时状态、渲染和事件日志都回到批量之前"""
+import pytest
+from PIL import ImageChops
+
+from Scoreboard import ScoreboardRenderer
+
+
+def displayed_matches_state(app):
+    expected = ScoreboardRenderer(app.original_image, **app.render_state()).render_image()
+    return ImageChops.difference(app.photo.image.convert("RGB"), expected.convert("RGB")).getbbox() is None
+
+
+def test_batch_renders_once(headless_app):
+    app = headless_app
+    renders = app.render_scheduler.renders
+    changed = app.apply_batch([
+        {"op": "set", "field": "left_text", "value": "New A"},
+        {"op": "set", "field": "right_text", "value": "New B"},
+        {"op": "set", "field": "bout_number", "value": 3},
+        {"op": "score", "side": "left", "delta": 2},
+    ])
+    app.root.pump()
+    assert changed is True
+    assert app.render_scheduler.renders - renders == 1
+    assert (app.left_text, app.right_text, app.bout_number, app.left_score) == ("New A", "New B", 3, 2)
+    assert displayed_matches_state(app)
+    # 整批为一个撤销单位
+    assert app.event_log.stats()["applied"] == 4
+
+
+def test_invalid_batch_changes_nothing(headless_app):
+    app = headless_app
+    state = app.state
+    with pytest.raises(ValueError):
+        app.apply_batch([{"op": "set", "field": "left_text", "value": "X"},
+                         {"op": "set", "field": "font_size", "value": 3}])
+    assert app.state is state
+    assert not app.root.queue
+    assert app.event_log.stats()["events"] == 0
+
+
+def test_failed_batch_rolls_back_and_keeps_rendering(headless_app):
+    app = headless_app
+    app.update_score("right", 1)  # 尚未渲染的修改，回滚后仍要显示
+    state = app.state
+    events = app.event_log.stats()
+
+    def broken_update_score(side, delta):
+        raise RuntimeError("出错")
+
+    app.update_score = broken_update_score
+    with pytest.raises(RuntimeError):
+        app.apply_batch([{"op": "set", "field": "left_text", "value": "X"},
+                         {"op": "score", "side": "left", "delta": 1}])
+    del app.update_score
+
+    assert app.state is state
+    assert app.batch_render_pending is False
+    assert app.event_log.stats() == events
+    app.root.pump()
+    assert displayed_matches_state(app)
+
+    # 回滚后单项修改仍然触发渲染
+    renders = app.render_scheduler.renders
+    app.update_score("left", 1)
+    app.root.pump()
+    assert app.render_scheduler.renders == renders + 1
+    assert app.left_score == 1
+    assert displayed_matches_state(app)
+    assert [event[2] for event in app.event_log.undo()] == ["left_score"]
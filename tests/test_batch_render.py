@@ -0,0 +1,56 @@
+"""批量渲染测试：比赛列表的读取和校验，输出文件只能写入输出目录"""
+import json
+import os
+
+import pytest
+from PIL import Image
+
+import batch_render
+
+
+def write_csv(path, rows):
+    path.write_text("left_text,right_text,left_score,right_score,bout_number,output\n"
+                    + "".join(",".join(row) + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_load_matches_csv(tmp_path):
+    matches = batch_render.load_matches(write_csv(tmp_path / "matches.csv", [
+        ("Alpha", "Bravo", "3", "1", "5", ""),
+        ("队伍甲", "队伍乙", "", "", "0", "final.png"),
+    ]))
+    assert [(m["left_text"], m["left_score"], m["bout_number"]) for m in matches] == [("Alpha", 3, 5), ("队伍甲", 0, 0)]
+    assert matches[0]["output"] == "0001_Alpha_vs_Bravo.png"
+    assert matches[1]["output"] == "final.png"
+
+
+@pytest.mark.parametrize("output", ["../escape.png", "/tmp/escape.png", "sub/card.png", "sub\\\\card.png", ".."])
+def test_load_matches_rejects_output_outside_directory(tmp_path, output):
+    path = tmp_path / "matches.json"
+    path.write_text(json.dumps([{"left_text": "A", "right_text": "B"},
+                                {"left_text": "A", "right_text": "B", "output": output}]), encoding="utf-8")
+    with pytest.raises(ValueError, match="第2场比赛"):
+        batch_render.load_matches(str(path))
+
+
+def test_render_all_reports_rejected_rows(tmp_path):
+    out_dir = tmp_path / "cards"
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    out_dir.mkdir()
+    # 输出目录中指向目录外的符号链接同样拒绝
+    os.symlink(outside / "linked.png", out_dir / "linked.png")
+    matches = batch_render.load_matches(write_csv(tmp_path / "matches.csv", [
+        ("Alpha", "Bravo", "1", "2", "3", "ok.png"),
+        ("Alpha", "Bravo", "1", "2", "3", "linked.png"),
+    ]))
+    matches.append(dict(matches[0], output="../escape.png"))
+
+    results, _ = batch_render.render_all(matches, str(out_dir), workers=1)
+    errors = {os.path.basename(path): error for path, _, error in results}
+    assert errors["ok.png"] is None
+    assert "输出目录" in errors["linked.png"]
+    assert "不能包含目录" in errors["escape.png"]
+    assert Image.open(out_dir / "ok.png").mode == "RGBA"
+    assert not (outside / "linked.png").exists()
+    assert not (tmp_path / "escape.png").exists()
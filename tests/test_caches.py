@@ -0,0 +1,180 @@
+"""进程级缓存测试：字体、文字测量、字号适配、分数精灵图集、系统字体索引和模板索引"""
+import json
+import os
+import threading
+
+import pytest
+from PIL import Image
+
+import Scoreboard
+from Scoreboard import (FONT_CACHE, FitCache, FontCache, FontIndex, ScoreSpriteAtlas, TemplateIndex,
+                        TextMetricsCache, find_font_path)
+
+DEJAVU_DIR = "/usr/share/fonts/truetype/dejavu"
+
+
+@pytest.fixture
+def font_path():
+    path, _ = find_font_path("Alpha 12")
+    if not path:
+        pytest.skip("没有可用的系统字体")
+    return path
+
+
+def test_font_cache_lru(font_path):
+    cache = FontCache(max_size=2)
+    a = cache.get(font_path, 20)
+    assert cache.get(font_path, 20) is a
+    cache.get(font_path, 30)
+    cache.get(font_path, 20)  # 20号最近使用过，淘汰30号
+    cache.get(font_path, 40)
+    assert cache.stats() == {"hits": 2, "misses": 3, "size": 2}
+    assert cache.get(font_path, 20) is a
+    cache.get(font_path, 30)
+    assert cache.stats()["misses"] == 4
+
+
+def test_font_cache_default_font_respects_bound(font_path):
+    cache = FontCache(max_size=2)
+    cache.get(font_path, 20)
+    cache.get(font_path, 30)
+    default = cache.get_default()
+    assert cache.stats()["size"] == 2
+    cache.get(font_path, 20)  # 默认字体是最近加入的，淘汰30号
+    assert cache.get_default() is default
+    assert cache.stats()["size"] == 2
+
+
+def test_font_cache_falls_back_to_default(font_path, tmp_path):
+    cache = FontCache()
+    default = cache.get(None, 30)
+    assert cache.get(str(tmp_path / "missing.ttf"), 20) is default
+    # 索引也是缓存键的一部分：TTF文件没有第二个字体
+    assert cache.get(font_path, 20, 1) is default
+    assert cache.get(font_path, 20, 0) is not default
+
+
+def test_text_metrics_hits_and_thread_misses(font_path):
+    cache = TextMetricsCache()
+    font = FONT_CACHE.get(font_path, 24)
+    first = cache.measure("Alpha", font)
+    assert cache.measure("Alpha", font) == first
+    assert first[1] == first[0][2] - first[0][0]
+    assert cache.stats()["hits"] == 1
+    assert cache.thread_misses() == 1
+
+    # 测量次数按线程统计
+    other = []
+    thread = threading.Thread(target=lambda: (cache.measure("Bravo", font), other.append(cache.thread_misses())))
+    thread.start()
+    thread.join()
+    assert other == [1]
+    assert cache.thread_misses() == 1
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.parametrize("text, region_width, max_size", [
+    ("Alpha", 400, 50),
+    ("A very long team name that never fits", 400, 50),
+    ("队伍甲", 60, 80),
+    ("W", 10, 200),
+])
+def test_fit_matches_linear_search(font_path, text, region_width, max_size):
+    cache = FitCache()
+    expected = max_size
+    for size in range(max_size, FitCache.MIN_SIZE - 1, -1):
+        font = FONT_CACHE.get(font_path, size)
+        if font.getbbox(text)[2] - font.getbbox(text)[0] <= region_width * FitCache.WIDTH_RATIO:
+            expected = size
+            break
+    assert cache.fit(text, region_width, max_size, font_path) == expected
+    measurements = cache.measurements
+    assert cache.fit(text, region_width, max_size, font_path) == expected
+    assert cache.measurements == measurements
+    assert cache.stats()["hits"] == 1
+
+
+def test_fit_without_font_path_needs_no_measurement():
+    cache = FitCache()
+    assert cache.fit("Alpha", 100, 42, None) == 42
+    assert cache.measurements == 0
+
+
+def test_score_atlas_prebuilds_digits(font_path):
+    atlas = ScoreSpriteAtlas(prebuilt=("0", "1", "2"))
+    font = FONT_CACHE.get(font_path, 40)
+    masks, x, y = atlas.get("1", font, (100, 50))
+    assert atlas.stats() == {"hits": 1, "misses": 3, "atlases": 1}
+    assert atlas.get("1", font, (100, 50)) == (masks, x, y)
+    atlas.get("12", font, (100, 50))  # 不在预渲染范围内，单独渲染一次
+    atlas.get("12", font, (100, 50))
+    assert atlas.stats() == {"hits": 3, "misses": 4, "atlases": 1}
+    # 小数部分不同的中心点使用另一个图集，整数部分不同的复用同一个
+    assert atlas.get("1", font, (300, 80))[1:] == (x + 200, y + 30)
+    atlas.get("1", font, (100.5, 50))
+    assert atlas.stats()["atlases"] == 2
+
+
+@pytest.mark.skipif(not os.path.isdir(DEJAVU_DIR), reason="没有DejaVu字体目录")
+def test_font_index_saves_once_per_lookup(tmp_path, monkeypatch):
+    path = str(tmp_path / "font_index.json")
+    index = FontIndex(path=path, font_dirs=[DEJAVU_DIR])
+    saves = []
+    save = index.save
+    monkeypatch.setattr(index, "save", lambda: (saves.append(1), save()))
+    face = index.best_font("Alpha")
+    assert face is not None and face["family"]
+    assert len(saves) == 2  # 首次扫描一次，查找结束一次
+    assert not index.dirty
+    index.best_font("Alpha")
+    assert len(saves) == 2  # 覆盖情况已缓存，不再保存
+    assert index.find("DejaVu Sans")["family"] == "DejaVu Sans"
+    assert index.find("No Such Family") is None
+
+    # 新实例直接读取磁盘上的索引和覆盖情况
+    loaded = FontIndex(path=path, font_dirs=[DEJAVU_DIR])
+    assert loaded.load()
+    assert loaded.covers(face["path"], "Alpha", face["index"])
+    assert not loaded.dirty
+
+
+def make_templates(folder):
+    folder.mkdir()
+    for name, size in (("default.png", (64, 16)), ("wide.png", (128, 16))):
+        Image.new("RGBA", size).save(folder / name)
+
+
+def test_template_index_concurrent_saves(tmp_path):
+    make_templates(tmp_path / "UI")
+    cache_dir = str(tmp_path / "cache")
+    indexes = [TemplateIndex(folder=str(tmp_path / "UI"), cache_dir=cache_dir) for _ in range(8)]
+    barrier = threading.Barrier(len(indexes))
+
+    def scan(index):
+        barrier.wait()
+        index.scan()
+
+    threads = [threading.Thread(target=scan, args=(index,)) for index in indexes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 每次保存使用自己的临时文件，不会互相覆盖或留下临时文件
+    assert os.listdir(cache_dir) == [TemplateIndex.INDEX_NAME]
+    with open(os.path.join(cache_dir, TemplateIndex.INDEX_NAME), encoding="utf-8") as f:
+        assert [entry["name"] for entry in json.load(f)] == ["default.png", "wide.png"]
+
+
+def test_template_index_failed_save_removes_temp_file(tmp_path, monkeypatch):
+    make_templates(tmp_path / "UI")
+    cache_dir = tmp_path / "cache"
+
+    def locked(src, dst):
+        raise PermissionError("文件正被其他进程使用")
+
+    monkeypatch.setattr(Scoreboard.os, "replace", locked)
+    index = TemplateIndex(folder=str(tmp_path / "UI"), cache_dir=str(cache_dir))
+    index.scan()
+    assert len(index.templates()) == 2
+    assert os.listdir(cache_dir) == []
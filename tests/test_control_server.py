@@ -0,0 +1,275 @@
+"""控制接口的回环测试：在127.0.0.1的随机端口启动ControlServer，用HTTP和WebSocket发送指令"""
+import base64
+import hashlib
+import http.client
+import json
+import os
+import socket
+import struct
+import threading
+
+import pytest
+
+from Scoreboard import BoardState, ControlServer
+
+
+class Board:
+    """代替Tk线程：定时取出指令修改BoardState并发布新状态"""
+
+    def __init__(self, server):
+        self.server = server
+        self.state = BoardState(left_text="Alpha", right_text="Bravo")
+        self.fail_next = False
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def apply(self, mutation):
+        if mutation["op"] == "score":
+            field = f"{mutation['side']}_score"
+            self.state = self.state.replace(**{field: getattr(self.state, field) + mutation["delta"]})
+        else:
+            self.state = self.state.replace(**{mutation["field"]: mutation["value"]})
+
+    def snapshot(self):
+        return {"left_text": self.state.left_text, "left_score": self.state.left_score,
+                "right_score": self.state.right_score}
+
+    def run(self):
+        while not self._stop.wait(0.005):
+            for mutations, future in self.server.drain():
+                if self.fail_next:
+                    self.fail_next = False
+                    future.set_exception(RuntimeError("渲染失败"))
+                    continue
+                for mutation in mutations:
+                    self.apply(mutation)
+                future.set_result({"version": self.state.version, "state": self.snapshot()})
+            if self.state.version != self.server.snapshot["version"]:
+                self.server.publish(self.snapshot(), self.state.version)
+
+    def stop(self):
+        self._stop.set()
+        self.thread.join()
+
+
+@pytest.fixture
+def board():
+    server = ControlServer(host="127.0.0.1", port=0)
+    server.start()
+    board = Board(server)
+    board.thread.start()
+    yield board
+    board.stop()
+    server.stop()
+    assert not server.thread.is_alive()
+
+
+def post(port, body, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    connection.request("POST", "/mutate", body if isinstance(body, bytes) else json.dumps(body), headers)
+    response = connection.getresponse()
+    result = response.status, json.loads(response.read())
+    connection.close()
+    return result
+
+
+def websocket_handshake(port, key, origin=None):
+    """发送WebSocket升级请求，返回(套接字, 响应读取文件, 状态行)"""
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    origin_header = f"Origin: {origin}\r\n" if origin else ""
+    sock.sendall((f"GET /ws HTTP/1.1\r\nHost: 127.0.0.1\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n{origin_header}"
+                  f"Sec-WebSocket-Version: 13\r\n\r\n").encode())
+    file = sock.makefile("rb")
+    return sock, file, file.readline()
+
+
+class WebSocketClient:
+    def __init__(self, port, origin=None):
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock, self.file, status = websocket_handshake(port, key, origin)
+        assert b"101" in status
+        headers = {}
+        while True:
+            line = self.file.readline()
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        expected = base64.b64encode(hashlib.sha1((key + ControlServer.WEBSOCKET_GUID).encode()).digest())
+        assert headers["sec-websocket-accept"] == expected.decode()
+
+    def send_frame(self, opcode, data, fin=True):
+        mask = os.urandom(4)
+        length = len(data)
+        if length < 126:
+            head = struct.pack(">BB", (0x80 if fin else 0) | opcode, 0x80 | length)
+        else:
+            head = struct.pack(">BBH", (0x80 if fin else 0) | opcode, 0x80 | 126, length)
+        self.sock.sendall(head + mask + bytes(byte ^ mask[i % 4] for i, byte in enumerate(data)))
+
+    def read_frame(self):
+        head = self.file.read(2)
+        length = head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self.file.read(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self.file.read(8))[0]
+        return head[0] & 0x0F, self.file.read(length)
+
+    def read_json(self):
+        opcode, data = self.read_frame()
+        assert opcode == 0x1
+        return json.loads(data)
+
+    def read_result(self):
+        """跳过状态推送，返回下一条指令结果"""
+        while True:
+            message = self.read_json()
+            if message["type"] == "result":
+                return message
+
+    def close(self):
+        self.sock.close()
+
+
+def test_http_post_mutation(board):
+    status, payload = post(board.server.port, {"op": "score", "side": "left", "delta": 2})
+    assert status == 200
+    assert payload["ok"] is True
+    assert payload["state"]["left_score"] == 2
+
+    status, payload = post(board.server.port, [{"op": "set", "field": "left_text", "value": "队伍甲"},
+                                               {"op": "score", "side": "right", "delta": 1}])
+    assert status == 200
+    assert payload["state"] == {"left_text": "队伍甲", "left_score": 2, "right_score": 1}
+
+
+def test_http_rejects_invalid_mutation(board):
+    status, payload = post(board.server.port, {"op": "set", "field": "font_size", "value": 5})
+    assert status == 400
+    assert payload["ok"] is False
+    status, _ = post(board.server.port, b"{not json")
+    assert status == 400
+    assert board.state.version == 0
+
+
+def test_http_rejects_cross_site_requests(board):
+    port = board.server.port
+    # 网页可以不经预检发送text/plain的POST
+    status, payload = post(port, b'{"op": "score", "side": "left"}', {"Content-Type": "text/plain"})
+    assert status == 403
+    assert payload["ok"] is False
+    status, _ = post(port, {"op": "score", "side": "left"}, {"Origin": "https://example.com"})
+    assert status == 403
+    status, _ = post(port, {"op": "score", "side": "left"}, {"Origin": "null"})
+    assert status == 403
+    assert board.state.version == 0
+
+    for origin in ("http://localhost:8080", "http://127.0.0.1", "http://[::1]:3000"):
+        status, _ = post(port, {"op": "score", "side": "left"}, {"Origin": origin})
+        assert status == 200
+    assert board.state.left_score == 3
+
+
+def test_websocket_rejects_foreign_origin(board):
+    sock, file, status = websocket_handshake(board.server.port, base64.b64encode(os.urandom(16)).decode(),
+                                             "https://evil.example")
+    try:
+        assert b"403" in status
+    finally:
+        sock.close()
+    client = WebSocketClient(board.server.port, origin="http://localhost")
+    try:
+        assert client.read_json()["type"] == "state"
+    finally:
+        client.close()
+
+
+def test_http_reports_unexpected_errors(board):
+    board.fail_next = True
+    status, payload = post(board.server.port, {"op": "score", "side": "left", "delta": 1})
+    assert status == 500
+    assert payload["error"] == "渲染失败"
+    # 出错后仍继续处理后续指令
+    status, payload = post(board.server.port, {"op": "score", "side": "left", "delta": 1})
+    assert status == 200
+    assert payload["state"]["left_score"] == 1
+
+
+def test_websocket_mutation_and_broadcast(board):
+    client = WebSocketClient(board.server.port)
+    try:
+        assert client.read_json()["type"] == "state"
+        client.send_frame(0x1, json.dumps({"id": 7, "op": "score", "side": "right", "delta": 3}).encode())
+        # 指令结果和状态推送的先后顺序不固定
+        result = None
+        broadcast = None
+        while result is None or broadcast is None:
+            message = client.read_json()
+            if message["type"] == "result":
+                result = message
+            elif message["state"]["right_score"] == 3:
+                broadcast = message
+        assert result == {"type": "result", "ok": True, "id": 7}
+        assert broadcast["version"] == board.state.version
+    finally:
+        client.close()
+    assert board.state.right_score == 3
+
+
+def test_websocket_error_echoes_request_id(board):
+    client = WebSocketClient(board.server.port)
+    try:
+        client.read_json()
+        client.send_frame(0x1, json.dumps({"id": "a1", "op": "score", "side": "middle"}).encode())
+        result = client.read_result()
+        assert (result["ok"], result["id"]) == (False, "a1")
+        assert result["error"]
+    finally:
+        client.close()
+    assert board.state.version == 0
+
+
+def test_websocket_reassembles_fragmented_message(board):
+    client = WebSocketClient(board.server.port)
+    try:
+        client.read_json()
+        payload = json.dumps({"id": 1, "mutations": [{"op": "set", "field": "left_text", "value": "分片消息"}]},
+                             ensure_ascii=False).encode()
+        client.send_frame(0x1, payload[:10], fin=False)
+        client.send_frame(0x9, b"ping")  # 控制帧可以插在分片之间
+        client.send_frame(0x0, payload[10:20], fin=False)
+        client.send_frame(0x0, payload[20:])
+        assert client.read_frame() == (0xA, b"ping")
+        assert client.read_result()["ok"] is True
+    finally:
+        client.close()
+    assert board.state.left_text == "分片消息"
+
+
+def test_websocket_rejects_orphan_continuation(board):
+    client = WebSocketClient(board.server.port)
+    try:
+        client.read_json()
+        client.send_frame(0x0, b'{"op": "score", "side": "left"}')
+        opcode, data = client.read_frame()
+        assert opcode == 0x8
+        assert struct.unpack(">H", data)[0] == 1002
+    finally:
+        client.close()
+    assert board.state.version == 0
+
+
+def test_websocket_unmasks_large_payload(board):
+    client = WebSocketClient(board.server.port)
+    try:
+        client.read_json()
+        text = "长" * 300  # 超过125字节，使用16位长度
+        client.send_frame(0x1, json.dumps({"op": "set", "field": "left_text", "value": text},
+                                          ensure_ascii=False).encode())
+        assert client.read_result()["ok"] is True
+    finally:
+        client.close()
+    assert board.state.left_text == text
@@ -0,0 +1,133 @@
+"""不可变状态和事件日志测试：按操作组撤销/重做、容量限制、会话导出与回放"""
+import pytest
+from PIL import Image
+
+from Scoreboard import BoardState, EventLog, load_session, replay_session
+
+
+def test_replace_returns_new_state():
+    state = BoardState(left_text="Alpha")
+    assert state.replace(left_text="Alpha") is state  # 没有实际变化
+    changed = state.replace(left_text="Bravo", left_score=2)
+    assert (changed.left_text, changed.left_score, changed.version) == ("Bravo", 2, state.version + 1)
+    assert state.left_text == "Alpha"
+    assert changed.diff(state) == {"left_text", "left_score"}
+    assert state.diff(None) == set(BoardState.FIELDS)
+
+
+def test_state_is_immutable():
+    state = BoardState()
+    with pytest.raises(AttributeError):
+        state.left_score = 1
+    with pytest.raises(ValueError):
+        BoardState(colour="red")
+
+
+def record(log, **changes):
+    """按给定的(旧值, 新值)记录一个操作组"""
+    for field, (old, new) in changes.items():
+        log.record(field, old, new)
+    log.commit()
+
+
+def changes(events):
+    return [(field, old, new) for _, _, field, old, new in events]
+
+
+def test_group_keeps_first_old_and_last_new_value():
+    log = EventLog()
+    log.record("left_score", 0, 1)
+    log.record("left_score", 1, 2)
+    log.record("right_text", "A", "B")
+    log.record("right_text", "B", "A")  # 改回原值，不记录
+    log.commit()
+    assert changes(log.applied_events()) == [("left_score", 0, 2)]
+    log.commit()  # 空操作组不记录
+    assert log.stats()["events"] == 1
+
+
+def test_undo_and_redo_by_group():
+    log = EventLog()
+    record(log, left_score=(0, 1))
+    record(log, left_score=(1, 2), right_score=(0, 1))
+    record(log, bout_number=(0, 3))
+    assert changes(log.undo()) == [("bout_number", 0, 3)]
+    assert changes(log.undo()) == [("left_score", 1, 2), ("right_score", 0, 1)]
+    assert log.stats()["applied"] == 1
+    assert changes(log.redo()) == [("left_score", 1, 2), ("right_score", 0, 1)]
+    log.undo()
+    assert changes(log.redo(None)) == [("left_score", 1, 2), ("right_score", 0, 1), ("bout_number", 0, 3)]
+    assert log.redo() == []
+    log.undo()
+    log.undo()
+    log.undo()
+    assert log.undo() == []
+
+
+def test_new_group_after_undo_drops_redo():
+    log = EventLog()
+    record(log, left_score=(0, 1))
+    record(log, left_score=(1, 2))
+    log.undo()
+    record(log, right_score=(0, 5))
+    assert log.redo() == []
+    assert changes(log.applied_events()) == [("left_score", 0, 1), ("right_score", 0, 5)]
+
+
+def test_full_log_drops_oldest_whole_group():
+    fields = BoardState.FIELDS
+    log = EventLog(capacity=len(fields))
+    record(log, **{field: (0, 1) for field in fields[:3]})
+    record(log, **{field: (0, 1) for field in fields[3:]})
+    record(log, left_score=(1, 2))
+    # 第一组的三个事件一起被丢弃
+    assert log.stats()["events"] == len(fields) - 2
+    assert [field for _, _, field, _, _ in log.applied_events()][0] == fields[3]
+    with pytest.raises(ValueError):
+        EventLog(capacity=len(fields) - 1)
+
+
+def test_discard_rolls_back_to_checkpoint():
+    log = EventLog()
+    log.record("left_score", 0, 1)
+    checkpoint = log.checkpoint()
+    log.record("left_score", 1, 5)
+    log.record("right_score", 0, 3)
+    log.discard(checkpoint)
+    log.commit()
+    assert changes(log.applied_events()) == [("left_score", 0, 1)]
+
+
+def test_exported_session_replays_to_same_state(tmp_path):
+    state = BoardState(left_text="Alpha", right_text="Bravo", bout_number=5)
+    initial = state
+    log = EventLog()
+    for group in ({"left_score": 1}, {"right_text": "Charlie", "right_score": 2},
+                  {"left_region": (300, 40, 700, 120)}, {"bout_number": 0}):
+        for field, value in group.items():
+            log.record(field, getattr(state, field), value)
+        state = state.replace(**group)
+        log.commit()
+    # 撤销的操作组不导出
+    undone = log.undo()
+    for _, _, field, old, _ in undone:
+        state = state.replace(**{field: old})
+
+    path = str(tmp_path / "session.json")
+    assert log.export(path, state, image_path="bg.png") == 4
+    loaded, image_path, groups = load_session(path)
+    assert image_path == "bg.png"
+    assert loaded.as_dict() == initial.as_dict()
+    assert [group for _, group in groups] == [
+        {"left_score": 1}, {"right_text": "Charlie", "right_score": 2}, {"left_region": (300, 40, 700, 120)}]
+
+    renderer, samples = replay_session(path, Image.new("RGBA", (1920, 200), (0, 0, 0, 0)))
+    assert len(samples) == 3
+    assert {field: getattr(renderer, field) for field in BoardState.FIELDS} == state.as_dict()
+
+
+def test_unsupported_session_format(tmp_path):
+    path = tmp_path / "session.json"
+    path.write_text('{"format": 999}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_session(str(path))
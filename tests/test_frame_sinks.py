@@ -0,0 +1,109 @@
+"""帧输出测试：共享内存帧缓冲区的布局和序号协议、PNG文件输出"""
+import mmap
+import threading
+
+from PIL import Image
+
+from Scoreboard import (FRAME_BUFFER_HEADER, FRAME_BUFFER_MAGIC, FRAME_BUFFER_VERSION, PngFileSink,
+                        SharedMemorySink, create_frame_sinks)
+
+
+def read_frame(path, attempts=1000):
+    """按读取方的协议读取一帧：序号为偶数且读取前后一致时返回(序号, 图片)，否则重试"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for _ in range(attempts):
+            magic, version, width, height, stride, sequence = FRAME_BUFFER_HEADER.unpack_from(buffer)
+            assert (magic, version, stride) == (FRAME_BUFFER_MAGIC, FRAME_BUFFER_VERSION, width * 4)
+            if sequence % 2:
+                continue
+            data = buffer[FRAME_BUFFER_HEADER.size:FRAME_BUFFER_HEADER.size + height * stride]
+            if FRAME_BUFFER_HEADER.unpack_from(buffer)[5] == sequence:
+                return sequence, Image.frombytes("RGBA", (width, height), data)
+    raise AssertionError("没有读到完整的帧")
+
+
+def solid(size, color):
+    return Image.new("RGBA", size, color)
+
+
+def test_full_frame_and_tiles_round_trip(tmp_path):
+    path = str(tmp_path / "frame.bin")
+    sink = SharedMemorySink(path)
+    image = Image.linear_gradient("L").resize((64, 40)).convert("RGBA")
+    sink.publish(image, None)
+    sequence, frame = read_frame(path)
+    assert sequence == 2
+    assert frame.tobytes() == image.tobytes()
+
+    # 只写入变化的区域（包括超出图片的部分和整行区域）
+    image.paste(solid((10, 8), (255, 0, 0, 128)), (5, 3))
+    image.paste(solid((64, 2), (0, 255, 0, 255)), (0, 30))
+    image.paste(solid((4, 4), (0, 0, 255, 255)), (60, 36))
+    sink.publish(image, [(5, 3, 15, 11), (0, 30, 64, 32), (60, 36, 70, 50)])
+    sequence, frame = read_frame(path)
+    assert sequence == 4
+    assert frame.tobytes() == image.tobytes()
+    sink.close()
+
+
+def test_resize_reopens_buffer(tmp_path):
+    path = str(tmp_path / "frame.bin")
+    sink = SharedMemorySink(path)
+    sink.publish(solid((16, 16), (1, 2, 3, 4)), None)
+    larger = solid((32, 8), (5, 6, 7, 8))
+    sink.publish(larger, [(0, 0, 1, 1)])  # 尺寸变化时忽略区域，整帧写入
+    sequence, frame = read_frame(path)
+    assert sequence == 4
+    assert frame.size == (32, 8)
+    assert frame.tobytes() == larger.tobytes()
+    assert sink.stats()["frames"] == 2
+    sink.close()
+
+
+def test_reader_never_sees_torn_frame(tmp_path):
+    path = str(tmp_path / "frame.bin")
+    sink = SharedMemorySink(path)
+    size = (256, 64)
+    sink.publish(solid(size, (0, 0, 0, 255)), None)
+    done = threading.Event()
+
+    def writer():
+        for value in range(1, 200):
+            sink.publish(solid(size, (value, value, value, 255)), None)
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    frames = 0
+    while not done.is_set() or frames == 0:
+        _, frame = read_frame(path, attempts=100000)
+        # 每帧都是纯色，读到一致的序号时不应混有两帧的像素
+        assert len(frame.getcolors()) == 1
+        frames += 1
+    thread.join()
+    assert read_frame(path)[1].getpixel((0, 0)) == (199, 199, 199, 255)
+    sink.close()
+
+
+def test_png_sink_replaces_file(tmp_path):
+    path = tmp_path / "frame.png"
+    sink = PngFileSink(str(path))
+    for color in ((255, 0, 0, 255), (0, 0, 255, 128)):
+        sink.publish(solid((8, 8), color), None)
+        with Image.open(path) as written:
+            assert written.convert("RGBA").getpixel((0, 0)) == color
+    assert sink.frames == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["frame.png"]
+
+
+def test_failed_sink_is_disabled(tmp_path):
+    sink = PngFileSink(str(tmp_path / "missing" / "frame.png"))
+    sink.publish(solid((8, 8), (0, 0, 0, 0)), None)
+    assert sink.failed
+    assert sink.frames == 0
+
+
+def test_create_frame_sinks(tmp_path):
+    assert create_frame_sinks() == []
+    sinks = create_frame_sinks(str(tmp_path / "frame.png"), str(tmp_path / "frame.bin"))
+    assert [type(sink) for sink in sinks] == [PngFileSink, SharedMemorySink]
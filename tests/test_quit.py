@@ -0,0 +1,42 @@
+"""关闭计分板测试：quit_app取消本窗口安排的所有Tk回调并断开控制接口，从任务栏关闭窗口时同样执行"""
+from Scoreboard import DragThrottle, load_session
+
+
+def test_quit_cancels_scheduled_callbacks(headless_app):
+    app = headless_app
+    app.start_control_server(0)
+    server = app.control_server
+    app.drag_throttle = DragThrottle(app.root, lambda x, y: True, refresh_rate=60)
+    app.drag_throttle.motion(10, 10)
+    app.drag_throttle.motion(20, 20)  # 刷新间隔内的移动安排在之后执行
+    app.update_score("left", 1)  # 安排渲染
+    app.load_and_display_image()  # 安排预取
+    assert app.root.queue
+
+    app.quit_app()
+    assert app.root.destroyed
+    assert app.root.queue == {}
+    assert app.control_server is None
+    assert not server.thread.is_alive()
+
+
+def test_control_poll_stops_after_quit(headless_app):
+    app = headless_app
+    app.start_control_server(0)
+    poll = app.root.queue[app.control_poll_id][0]
+    app.quit_app()
+    poll()  # 已经取出的回调在关闭后执行时不再重新安排
+    assert app.root.queue == {}
+
+
+def test_closing_window_exports_session(headless_app, tmp_path):
+    app = headless_app
+    app.record_path = str(tmp_path / "session.json")
+    app.bind_events()
+    app.update_score("left", 1)
+    app.root.pump()
+    # 窗口管理器的关闭请求（任务栏关闭、标题栏关闭按钮）
+    app.root.protocols["WM_DELETE_WINDOW"]()
+    assert app.root.destroyed
+    _, _, groups = load_session(app.record_path)
+    assert [changes for _, changes in groups] == [{"left_score": 1}]
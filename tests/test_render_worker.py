@@ -0,0 +1,86 @@
+"""后台渲染线程测试：过期被丢弃的帧不输出到帧输出，交付的帧包含被丢弃帧的变化区域"""
+import threading
+import time
+
+from PIL import Image, ImageChops
+
+from Scoreboard import RenderWorker, ScoreboardRenderer, find_font_path
+
+
+class RecordingSink:
+    """记录每次输出的帧和变化区域"""
+
+    def __init__(self):
+        self.frames = []
+
+    def publish(self, image, boxes):
+        self.frames.append((image.copy(), boxes))
+
+    def close(self):
+        pass
+
+
+def make_renderer(**fields):
+    font_path, font_index = find_font_path("Alpha Bravo")
+    background = Image.new("RGBA", (1920, 1080), (20, 40, 60, 255))
+    return ScoreboardRenderer(background, "Alpha", "Bravo", bout_number=3,
+                              font_path=font_path, font_index=font_index, **fields)
+
+
+def image_diff(a, b):
+    """返回两张图片不同像素的包围盒（RGBA的getbbox只看透明度，先转为RGB）"""
+    return ImageChops.difference(a.convert("RGB"), b.convert("RGB")).getbbox()
+
+
+def wait_idle(worker, timeout=10):
+    deadline = time.monotonic() + timeout
+    delivered = []
+    while not worker.idle():
+        result = worker.poll()
+        if result is not None:
+            delivered.append(result)
+        assert time.monotonic() < deadline, "后台渲染没有结束"
+        time.sleep(0.001)
+    return delivered
+
+
+def test_stale_frames_are_not_published():
+    renderer = make_renderer()
+    renderer.render()
+    sink = RecordingSink()
+    renderer.add_sink(sink)  # 立即输出当前整帧
+    assert len(sink.frames) == 1
+
+    # 第一个提交渲染期间到达第二个提交，使第一帧过期
+    entered = threading.Event()
+    release = threading.Event()
+    update = renderer.update
+
+    def slow_update(**fields):
+        update(**fields)
+        if "left_score" in fields and not entered.is_set():
+            entered.set()
+            release.wait(5)
+
+    renderer.update = slow_update
+    worker = RenderWorker(renderer)
+    try:
+        worker.submit({"left_score": 1})
+        assert entered.wait(5)
+        worker.submit({"right_score": 2})
+        release.set()
+        delivered = wait_idle(worker)
+    finally:
+        worker.stop()
+
+    assert worker.stats()["stale_frames"] == 1
+    assert len(delivered) == 1
+    assert len(sink.frames) == 2
+    image, boxes = sink.frames[1]
+    expected = make_renderer(left_score=1, right_score=2).render_image()
+    assert image_diff(image, expected) is None
+    # 交付帧的变化区域包含被丢弃帧修改的左侧分数
+    changed = image_diff(sink.frames[0][0], expected)
+    assert changed is not None
+    assert boxes is None or (min(box[0] for box in boxes) <= changed[0]
+                             and max(box[2] for box in boxes) >= changed[2])
@@ -0,0 +1,132 @@
+"""渲染器测试：增量渲染与整帧渲染的结果逐像素相同，状态不变时不重绘也不测量文字"""
+import pytest
+from PIL import Image, ImageChops
+
+import Scoreboard
+from Scoreboard import OUTLINE_MODES, PngFileSink, ScoreboardRenderer, find_font_path
+
+# 依次应用的修改，覆盖每个字段（包括会移动元素位置和改变字号的修改）
+UPDATES = [
+    {"left_score": 1},
+    {"right_score": 12},
+    {"left_text": "Charlie Team"},
+    {"right_text": "队伍乙"},
+    {"bout_number": 0},
+    {"bout_number": 7},
+    {"font_size": 36},
+    {"left_region": (300, 40, 700, 120)},
+    {"right_score_region": (1040, 50, 1120, 100)},
+    {"bout_region_offset_x": -40, "bout_region_offset_y": 10},
+    {"left_color": (0, 200, 0), "outline_color": (10, 10, 10)},
+    {"left_score": 0, "right_score": 0},
+    {"font_size": 80, "left_text": "A"},
+]
+
+
+@pytest.fixture
+def background():
+    # 非纯色背景，重绘区域没有正确恢复时能发现差异
+    image = Image.linear_gradient("L").resize((1920, 200)).convert("RGBA")
+    image.putalpha(200)
+    return image
+
+
+def make_renderer(background, **fields):
+    font_path, font_index = find_font_path("Alpha Bravo Charlie Team 队伍乙")
+    fields = {"left_text": "Alpha", "right_text": "Bravo", "bout_number": 5,
+              "font_path": font_path, "font_index": font_index, **fields}
+    return ScoreboardRenderer(background, **fields)
+
+
+def image_diff(a, b):
+    """返回两张图片不同像素的包围盒（RGBA的getbbox只看透明度，分别比较RGB和透明度）"""
+    difference = ImageChops.difference(a, b)
+    return difference.convert("RGB").getbbox() or difference.getchannel("A").getbbox()
+
+
+def current_fields(renderer):
+    return {field: getattr(renderer, field) for field in ScoreboardRenderer.FIELD_ELEMENTS}
+
+
+@pytest.mark.parametrize("smooth_factor", [1, 2])
+@pytest.mark.parametrize("outline_mode", OUTLINE_MODES)
+def test_incremental_render_matches_full_render(background, monkeypatch, smooth_factor, outline_mode):
+    monkeypatch.setattr(Scoreboard, "SMOOTH_FACTOR", smooth_factor)
+    monkeypatch.setattr(Scoreboard, "OUTLINE_MODE", outline_mode)
+    renderer = make_renderer(background)
+    renderer.render()
+    for changes in UPDATES:
+        renderer.update(**changes)
+        boxes = renderer.render()
+        assert boxes is not None, "单项修改不应整帧重绘"
+        expected = make_renderer(background, **current_fields(renderer)).render_image()
+        assert image_diff(renderer.image, expected) is None, changes
+
+
+def test_tiles_rebuild_the_frame(background):
+    renderer = make_renderer(background)
+    renderer.render()
+    displayed = renderer.image.copy()
+    for changes in UPDATES:
+        renderer.update(**changes)
+        kind, tiles = renderer.take_frame(renderer.render())
+        assert kind == "tiles"
+        for box, tile in tiles:
+            displayed.paste(tile, box[:2])
+        assert image_diff(displayed, renderer.image) is None, changes
+
+
+def test_unchanged_state_skips_render(background):
+    renderer = make_renderer(background)
+    renderer.render()
+    renderer.update(left_score=3)
+    renderer.render()
+    image = renderer.image
+    renderer.update(left_score=3)  # 与当前值相同
+    assert renderer.render() == []
+    assert renderer.image is image
+    assert renderer.frame_measurements == 0
+
+
+def test_repeated_state_needs_no_measurements(background):
+    renderer = make_renderer(background)
+    renderer.render()
+    for changes in UPDATES:
+        renderer.update(**changes)
+        renderer.render()
+    renderer.update(**current_fields(make_renderer(background)))
+    renderer.render()
+    # 所有文字都测量过，再次切换时全部命中缓存
+    for changes in UPDATES:
+        renderer.update(**changes)
+        renderer.render()
+        assert renderer.frame_measurements == 0, changes
+
+
+def test_background_change_redraws_full_frame(background):
+    renderer = make_renderer(background)
+    renderer.render()
+    other = Image.new("RGBA", background.size, (200, 30, 30, 255))
+    renderer.set_background(other)
+    assert renderer.render() is None
+    assert image_diff(renderer.image, make_renderer(other).render_image()) is None
+
+
+def test_unknown_field_rejected(background):
+    with pytest.raises(ValueError):
+        make_renderer(background).update(colour=(1, 2, 3))
+
+
+def test_sinks_receive_rendered_frames(background, tmp_path):
+    renderer = make_renderer(background)
+    renderer.render()
+    sink = PngFileSink(str(tmp_path / "frame.png"))
+    renderer.add_sink(sink)  # 立即输出当前帧
+    assert sink.frames == 1
+    renderer.update(right_score=4)
+    renderer.render()
+    assert sink.frames == 2
+    with Image.open(tmp_path / "frame.png") as written:
+        assert image_diff(written.convert("RGBA"), renderer.image) is None
+    renderer.render()  # 没有变化的帧不输出
+    assert sink.frames == 2
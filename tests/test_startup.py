@@ -0,0 +1,33 @@
+"""冷启动耗时测试：在新进程中执行启动流程（无界面），各阶段耗时不超过STARTUP_BUDGET_MS"""
+import json
+import os
+import subprocess
+import sys
+
+import benchmark
+from Scoreboard import STARTUP_BUDGET_MS, startup_report
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_startup_within_budget():
+    # 第一次启动会建立字体索引和背景缓存，按再次启动的耗时检查预算
+    benchmark.measure_startup()
+    stages = benchmark.measure_startup()
+    lines, over_budget = startup_report(stages)
+    assert set(STARTUP_BUDGET_MS) <= set(stages)
+    assert over_budget == [], "\n".join(lines)
+
+
+def test_startup_report_flags_stages_over_budget():
+    lines, over_budget = startup_report({"import": 10.0, "first_frame": 30.0},
+                                        {"import": 20, "first_frame": 25})
+    assert over_budget == ["first_frame"]
+    assert "超出预算" not in lines[0]
+    assert "超出预算 25 ms" in lines[1]
+
+
+def test_import_skips_control_server_modules():
+    code = "import sys, json, Scoreboard; print(json.dumps(sorted(set(sys.modules) & {'asyncio', 'concurrent.futures'})))"
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=REPO_DIR)
+    assert json.loads(output.decode("utf-8").strip().splitlines()[-1]) == []
@@ -0,0 +1,75 @@
+"""撤销/重做测试：快捷键按Shift位区分撤销和重做全部，焦点在自带撤销的Text中时不处理"""
+import tkinter as tk
+from types import SimpleNamespace
+
+CONTROL = 0x4
+CAPS_LOCK = 0x2
+SHIFT = 0x1
+
+
+def key(state):
+    return SimpleNamespace(state=state)
+
+
+def scored_app(app):
+    for _ in range(3):
+        app.update_score("left", 1)
+        app.root.pump()
+    return app
+
+
+def test_ctrl_z_undoes_with_caps_lock(headless_app):
+    app = scored_app(headless_app)
+    app.on_undo_key(key(CONTROL))
+    assert app.left_score == 2
+    # 开启大写锁定时Ctrl+Z的按键为Z，仍然是撤销而不是重做全部
+    app.on_undo_key(key(CONTROL | CAPS_LOCK))
+    assert app.left_score == 1
+
+
+def test_ctrl_shift_z_redoes_all(headless_app):
+    app = scored_app(headless_app)
+    app.undo()
+    app.undo()
+    app.undo()
+    assert app.left_score == 0
+    app.on_redo_key(key(CONTROL))
+    assert app.left_score == 1
+    app.on_undo_key(key(CONTROL | SHIFT))
+    assert app.left_score == 3
+    app.root.pump()
+
+
+class FakeText(tk.Text):
+    """不创建Tk控件的Text，undo选项由构造参数指定"""
+
+    def __init__(self, undo):
+        self.options = {"undo": undo}
+
+    def cget(self, option):
+        return self.options[option]
+
+
+def test_shortcuts_work_with_focus_in_entry(headless_app):
+    app = scored_app(headless_app)
+    # Entry没有自己的撤销，修改名称后焦点留在Entry中时快捷键仍然撤销计分板
+    app.root.focus = tk.Entry.__new__(tk.Entry)
+    app.on_undo_key(key(CONTROL))
+    assert app.left_score == 2
+    app.on_redo_key(key(CONTROL))
+    assert app.left_score == 3
+    app.root.focus = FakeText(undo=0)
+    app.on_undo_key(key(CONTROL))
+    assert app.left_score == 2
+
+
+def test_shortcuts_left_to_text_with_undo(headless_app):
+    app = scored_app(headless_app)
+    app.root.focus = FakeText(undo=1)
+    app.on_undo_key(key(CONTROL))
+    app.on_undo_key(key(CONTROL | SHIFT))
+    app.on_redo_key(key(CONTROL))
+    assert app.left_score == 3
+    app.root.focus = None
+    app.on_undo_key(key(CONTROL))
+    assert app.left_score == 2
@@ -0,0 +1,98 @@
+"""配置和控制指令校验测试"""
+import pytest
+
+from Scoreboard import LEFT_PARALLELOGRAM, board_output_path, env_positive_int, parse_config, validate_mutation
+
+
+@pytest.mark.parametrize("mutation, expected", [
+    ({"op": "score", "side": "left"}, {"op": "score", "side": "left", "delta": 1}),
+    ({"op": "score", "side": "right", "delta": -2}, {"op": "score", "side": "right", "delta": -2}),
+    ({"op": "set", "field": "left_text", "value": "队伍甲"}, {"op": "set", "field": "left_text", "value": "队伍甲"}),
+    ({"op": "set", "field": "bout_number", "value": 0}, {"op": "set", "field": "bout_number", "value": 0}),
+    ({"op": "set", "field": "left_region", "value": [1, 2, 3, 4]},
+     {"op": "set", "field": "left_region", "value": (1, 2, 3, 4)}),
+])
+def test_valid_mutation_is_normalized(mutation, expected):
+    assert validate_mutation(mutation) == expected
+
+
+@pytest.mark.parametrize("mutation", [
+    ["score", "left"],
+    {"op": "reset"},
+    {"side": "left"},
+    {"op": "score", "side": "middle"},
+    {"op": "score", "side": "left", "delta": True},
+    {"op": "score", "side": "left", "delta": 1.5},
+    {"op": "score", "side": "left", "delta": "1"},
+    {"op": "score", "side": "left", "delta": 10000},
+    {"op": "set", "field": "font_path", "value": "/etc/passwd"},
+    {"op": "set", "field": "left_text", "value": 5},
+    {"op": "set", "field": "left_score", "value": -1},
+    {"op": "set", "field": "font_size", "value": 9},
+    {"op": "set", "field": "font_size", "value": 201},
+    {"op": "set", "field": "bout_number", "value": 100},
+    {"op": "set", "field": "left_region", "value": [1, 2, 3]},
+    {"op": "set", "field": "left_region", "value": [1, 2, 3, "4"]},
+    {"op": "set", "field": "left_region", "value": "1 2 3 4"},
+])
+def test_invalid_mutation_is_rejected(mutation):
+    with pytest.raises(ValueError):
+        validate_mutation(mutation)
+
+
+def test_parse_config_converts_strings():
+    config = parse_config({
+        "left_text": "Alpha", "left_score": "3", "right_score": "0", "font_size": "40", "bout_number": " 5 ",
+        "left_parallelogram": ["300", "40", "700", "120"], "bout_region_offset_x": "-10", "image_path": "",
+        "unknown": "ignored",
+    })
+    assert config["left_text"] == "Alpha"
+    assert (config["left_score"], config["right_score"], config["font_size"]) == (3, 0, 40)
+    assert config["bout_number"] == 5
+    assert config["left_parallelogram"] == (300, 40, 700, 120)
+    assert config["right_parallelogram"] != config["left_parallelogram"]
+    assert config["bout_region_offset_x"] == -10
+    assert config["image_path"] is None
+    assert "unknown" not in config
+
+
+def test_parse_config_defaults():
+    config = parse_config({})
+    assert config["bout_number"] == 0
+    assert config["left_parallelogram"] == LEFT_PARALLELOGRAM
+
+
+@pytest.mark.parametrize("bout", ["", "0", "  ", None, 0])
+def test_empty_bout_is_hidden(bout):
+    assert parse_config({"bout_number": bout})["bout_number"] == 0
+
+
+@pytest.mark.parametrize("values", [
+    {"left_score": "x"},
+    {"font_size": "9"},
+    {"font_size": "201"},
+    {"font_size": "big"},
+    {"bout_number": "-1"},
+    {"bout_number": "two"},
+    {"left_score_region": ["1", "2", "3", "x"]},
+    {"bout_region_offset_y": "up"},
+])
+def test_parse_config_rejects_invalid_values(values):
+    with pytest.raises(ValueError):
+        parse_config(values)
+
+
+def test_board_output_path():
+    assert board_output_path("frame.png", "主舞台") == "frame-主舞台.png"
+    assert board_output_path("out/frame", "b") == "out/frame-b"
+    assert board_output_path("frame.png", None) == "frame.png"
+    assert board_output_path(None, "b") is None
+
+
+@pytest.mark.parametrize("value, expected", [(None, 2), ("1", 1), ("4", 4), ("x", 2), ("0", 2), ("-3", 2), ("", 2)])
+def test_env_positive_int(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("SCOREBOARD_TEST_FACTOR", raising=False)
+    else:
+        monkeypatch.setenv("SCOREBOARD_TEST_FACTOR", value)
+    assert env_positive_int("SCOREBOARD_TEST_FACTOR", 2) == expected